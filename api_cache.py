@@ -0,0 +1,124 @@
+# api_cache.py
+# Process-wide cache for FPL API JSON responses.
+#
+# Every caller asking for the same URL inside the TTL window shares one parsed
+# payload. Once the TTL expires the entry is revalidated with ETag /
+# Last-Modified, so an unchanged endpoint costs a 304 instead of a fresh
+# download and JSON parse. The last good response is also written to disk and
+# served if the API is unreachable.
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+import fpl_http
+
+CACHE_TTL = float(os.environ.get("FPL_CACHE_TTL", 300))  # seconds
+CACHE_DIR = os.environ.get("FPL_CACHE_DIR", ".fpl_cache")
+
+_entries = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _url_lock(url):
+    with _locks_guard:
+        if url not in _locks:
+            _locks[url] = threading.Lock()
+        return _locks[url]
+
+
+def _disk_path(url):
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _load_from_disk(url):
+    try:
+        with open(_disk_path(url), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Force revalidation: we don't know how old the file is relative to this process
+    entry["fetched_at"] = 0
+    return entry
+
+
+def _save_to_disk(url, entry):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = _disk_path(url)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(entry, url=url), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Could not write cache file for {url}: {e}")
+
+
+def get_json(url, ttl=None):
+    """Return the parsed JSON body for `url`, shared across callers for `ttl` seconds."""
+    ttl = CACHE_TTL if ttl is None else ttl
+
+    with _url_lock(url):
+        entry = _entries.get(url)
+        if entry and time.time() - entry["fetched_at"] < ttl:
+            return entry["payload"]
+
+        if entry is None:
+            entry = _load_from_disk(url)
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            res = fpl_http.get(url, headers=headers)
+            if res.status_code == 304 and entry:
+                entry["fetched_at"] = time.time()
+                _entries[url] = entry
+                return entry["payload"]
+            res.raise_for_status()
+            payload = res.json()
+        except (requests.RequestException, ValueError) as e:
+            # A cassette miss in replay mode is a bug in the recording – don't paper over it
+            if entry and not isinstance(e, fpl_http.CassetteMiss):
+                print(f"⚠️ Serving cached copy of {url} after fetch failure: {e}")
+                _entries[url] = entry
+                return entry["payload"]
+            raise
+
+        etag = res.headers.get("ETag")
+        entry = {
+            "payload": payload,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": res.headers.get("Last-Modified"),
+            "version": etag or hashlib.sha1(res.content).hexdigest(),
+        }
+        _entries[url] = entry
+        _save_to_disk(url, entry)
+        return payload
+
+
+def get_version(url):
+    """Version stamp (ETag or content hash) of the cached payload for `url`, if any."""
+    entry = _entries.get(url)
+    return entry.get("version") if entry else None
+
+
+def clear_cache(url=None, disk=False):
+    """Drop cached entries (all of them, or just `url`) from memory and optionally disk."""
+    urls = [url] if url else list(_entries)
+    for u in urls:
+        _entries.pop(u, None)
+        if disk:
+            try:
+                os.remove(_disk_path(u))
+            except OSError:
+                pass
@@ -0,0 +1,283 @@
+# artifact_store.py
+# Content-addressed cache of trained models.
+#
+# An artifact's key is the SHA-256 of everything that determines the fit: the
+# training (and evaluation) data's contents, the feature list, the estimator
+# class and its parameters. fit_cached() returns the stored model when the key
+# already exists and only trains otherwise, so rerunning a train_*.py script on
+# unchanged data is instant. Each artifact is a directory
+#   <FPL_ARTIFACT_STORE>/<key>/model.pkl
+#   <FPL_ARTIFACT_STORE>/<key>/meta.json   name, features, params, metrics, training time, ...
+# save_fitted() stores a model fitted elsewhere (retrain_gw_model.py's warm-start
+# updates), keyed by its data, parameters and parent artifact instead.
+# publish() copies a model to a serving path (e.g. gw_score_model.pkl) with its
+# metadata next to it, and FPL_MODEL_PATH=artifact:<name> serves the newest
+# artifact of that name directly (see model_registry.py).
+#
+#   python artifact_store.py list
+#   python artifact_store.py show <key>
+#   python artifact_store.py publish <key or name> gw_score_model.pkl
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import joblib
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+
+ARTIFACT_DIR = os.environ.get("FPL_ARTIFACT_STORE", "fpl_artifacts")
+ARTIFACT_PREFIX = "artifact:"
+MODEL_FILE = "model.pkl"
+META_FILE = "meta.json"
+SCHEMA_VERSION = 1
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def dataset_hash(X, y=None):
+    """SHA-256 of a feature frame's columns, dtypes and values (plus the target's)."""
+    h = hashlib.sha256()
+    X = pd.DataFrame(X)
+    h.update(json.dumps([[str(c), str(t)] for c, t in X.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    if y is not None:
+        y = pd.Series(y)
+        h.update(str(y.dtype).encode())
+        h.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def estimator_name(estimator):
+    cls = type(estimator)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def artifact_key(estimator, X, y, eval_set=None):
+    spec = {
+        "schema_version": SCHEMA_VERSION,
+        "estimator": estimator_name(estimator),
+        "params": estimator.get_params(deep=True),
+        "features": [str(c) for c in pd.DataFrame(X).columns],
+        "data": dataset_hash(X, y),
+        "eval_data": dataset_hash(*eval_set) if eval_set is not None else None,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def artifact_dir(key, store_dir=None):
+    return os.path.join(store_dir or ARTIFACT_DIR, key)
+
+
+def load_meta(key, store_dir=None):
+    try:
+        with open(os.path.join(artifact_dir(key, store_dir), META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_artifact(key, store_dir=None):
+    """(model, meta) for `key`."""
+    meta = load_meta(key, store_dir)
+    if meta is None:
+        raise KeyError(f"No artifact {key} in {store_dir or ARTIFACT_DIR}")
+    return joblib.load(os.path.join(artifact_dir(key, store_dir), MODEL_FILE)), meta
+
+
+def _metrics(model, X, y, prefix=""):
+    pred = model.predict(X)
+    return {f"{prefix}mae": float(mean_absolute_error(y, pred)), f"{prefix}r2": float(r2_score(y, pred))}
+
+
+def _versions(estimator):
+    import sklearn
+    versions = {"python": sys.version.split()[0], "sklearn": sklearn.__version__}
+    package = type(estimator).__module__.split(".")[0]
+    module = sys.modules.get(package)
+    if package not in versions and getattr(module, "__version__", None):
+        versions[package] = module.__version__
+    return versions
+
+
+def fit_cached(name, estimator, X, y, eval_set=None, source=None, store_dir=None):
+    """Fit `estimator` on X / y, or load the identical fit from the store: (model, meta).
+
+    `eval_set` (X_test, y_test) is scored into meta["metrics"] as mae / r2;
+    without one the training fit is scored as train_mae / train_r2.
+    """
+    store_dir = store_dir or ARTIFACT_DIR
+    key = artifact_key(estimator, X, y, eval_set)
+    meta = load_meta(key, store_dir)
+    if meta is not None:
+        model, meta = load_artifact(key, store_dir)
+        print(f"♻️ {name}: unchanged inputs – using cached artifact {key[:12]} (trained in {meta['train_seconds']:.1f}s)")
+        return model, meta
+
+    start = time.perf_counter()
+    estimator.fit(X, y)
+    train_seconds = time.perf_counter() - start
+    meta = _store(key, name, estimator, X, y, eval_set, train_seconds, source, None, store_dir)
+    print(f"📦 {name}: trained in {train_seconds:.1f}s → artifact {key[:12]}")
+    return estimator, meta
+
+
+def save_fitted(name, model, X, y, train_seconds, lineage, eval_set=None, source=None, store_dir=None):
+    """Store a model fitted outside fit_cached (e.g. a warm-start update of another artifact): meta.
+
+    `lineage` (JSON-able, e.g. the parent artifact's key and the update kind) is
+    part of the key and kept in the metadata; X / y are the rows this fit saw.
+    """
+    store_dir = store_dir or ARTIFACT_DIR
+    key = hashlib.sha256(json.dumps({"fit": artifact_key(model, X, y, eval_set), "lineage": lineage},
+                                    sort_keys=True, default=repr).encode()).hexdigest()
+    meta = load_meta(key, store_dir)
+    if meta is None:
+        meta = _store(key, name, model, X, y, eval_set, train_seconds, source, lineage, store_dir)
+    return meta
+
+
+def _store(key, name, estimator, X, y, eval_set, train_seconds, source, lineage, store_dir):
+    metrics = _metrics(estimator, *eval_set) if eval_set is not None else _metrics(estimator, X, y, prefix="train_")
+    tmp = f"{artifact_dir(key, store_dir)}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    joblib.dump(estimator, os.path.join(tmp, MODEL_FILE))
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "key": key,
+        "name": name,
+        "estimator": estimator_name(estimator),
+        "params": json.loads(json.dumps(estimator.get_params(deep=True), default=repr)),
+        "features": [str(c) for c in pd.DataFrame(X).columns],
+        "target": str(getattr(y, "name", None)),
+        "source": source,
+        "lineage": lineage,
+        "rows": len(X),
+        "eval_rows": len(eval_set[0]) if eval_set is not None else None,
+        "metrics": metrics,
+        "train_seconds": train_seconds,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        # Orders artifacts stored within the same second (created_at has 1s resolution)
+        "created_ns": time.time_ns(),
+        "model_sha256": _sha256_file(os.path.join(tmp, MODEL_FILE)),
+        "versions": _versions(estimator),
+    }
+    with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    if os.path.exists(artifact_dir(key, store_dir)):
+        shutil.rmtree(tmp, ignore_errors=True)  # another run stored the same fit meanwhile
+    else:
+        os.replace(tmp, artifact_dir(key, store_dir))
+    return meta
+
+
+def list_artifacts(name=None, store_dir=None):
+    """Metadata of every artifact (optionally only `name`'s), newest first."""
+    store_dir = store_dir or ARTIFACT_DIR
+    try:
+        keys = os.listdir(store_dir)
+    except OSError:
+        return []
+    metas = [m for m in (load_meta(k, store_dir) for k in keys if not k.endswith(".tmp")) if m]
+    if name is not None:
+        metas = [m for m in metas if m["name"] == name]
+    # Artifacts from before created_ns existed sort by created_at, behind every newer one
+    return sorted(metas, key=lambda m: (m.get("created_ns", 0), m["created_at"]), reverse=True)
+
+
+def find_artifact(ref, store_dir=None):
+    """Metadata for `ref`: a key, a unique key prefix, or a name (its newest artifact)."""
+    metas = list_artifacts(store_dir=store_dir)
+    by_name = [m for m in metas if m["name"] == ref]
+    if by_name:
+        return by_name[0]
+    by_key = [m for m in metas if m["key"].startswith(ref)]
+    if len(by_key) == 1:
+        return by_key[0]
+    raise KeyError(f"No single artifact matches {ref!r} ({len(by_key)} keys start with it)")
+
+
+def metadata_path(model_path):
+    return f"{os.path.splitext(model_path)[0]}.meta.json"
+
+
+def publish(meta, path, store_dir=None):
+    """Copy the artifact's model to `path`, with its metadata in <path>.meta.json, unless it is already there."""
+    source = os.path.join(artifact_dir(meta["key"], store_dir), MODEL_FILE)
+    # Metadata first, so it never describes an older model than the one being served
+    meta_tmp = f"{metadata_path(path)}.{os.getpid()}.tmp"
+    with open(meta_tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_tmp, metadata_path(path))
+    if os.path.exists(path) and _sha256_file(path) == meta["model_sha256"]:
+        return path
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, path)  # the model registry hot-reloads on the content change
+    print(f"🚀 Published {meta['name']} ({meta['key'][:12]}) → {path}")
+    return path
+
+
+# (reference, store_dir) -> (store directory mtime, resolved model path)
+_resolved = {}
+
+
+def resolve_model_path(path, store_dir=None):
+    """`path` itself, or the model file of the artifact an `artifact:<key or name>` reference points to.
+
+    Artifacts are only ever added as whole directories, so the store is re-scanned
+    only when its directory's mtime changes (the model registry asks every few seconds).
+    """
+    if not path.startswith(ARTIFACT_PREFIX):
+        return path
+    store_dir = store_dir or ARTIFACT_DIR
+    try:
+        mtime = os.stat(store_dir).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _resolved.get((path, store_dir))
+    if cached is not None and mtime is not None and cached[0] == mtime:
+        return cached[1]
+    meta = find_artifact(path[len(ARTIFACT_PREFIX):], store_dir)
+    resolved = os.path.join(artifact_dir(meta["key"], store_dir), MODEL_FILE)
+    if mtime is not None:
+        _resolved[(path, store_dir)] = (mtime, resolved)
+    return resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed trained model store")
+    parser.add_argument("--store", default=None, help=f"store directory (default {ARTIFACT_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    listing = sub.add_parser("list", help="artifacts, newest first")
+    listing.add_argument("--name")
+    show = sub.add_parser("show", help="an artifact's metadata")
+    show.add_argument("ref", help="key, key prefix or name")
+    pub = sub.add_parser("publish", help="copy an artifact's model to a serving path")
+    pub.add_argument("ref", help="key, key prefix or name")
+    pub.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for meta in list_artifacts(args.name, args.store):
+            metrics = " ".join(f"{k}={v:.4f}" for k, v in meta["metrics"].items())
+            print(f"{meta['key'][:12]}  {meta['created_at']}  {meta['name']:<16} "
+                  f"{meta['estimator'].rsplit('.', 1)[-1]:<22} {meta['rows']:>7} rows  {metrics}")
+    elif args.command == "show":
+        print(json.dumps(find_artifact(args.ref, args.store), indent=2))
+    else:
+        publish(find_artifact(args.ref, args.store), args.path, args.store)
+
+
+if __name__ == "__main__":
+    main()
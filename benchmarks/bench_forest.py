@@ -0,0 +1,80 @@
+# benchmarks/bench_forest.py
+# sklearn RandomForestRegressor.predict vs. the compiled forest_eval walk.
+#
+#   python -m benchmarks.bench_forest [--model forest.pkl] [--repeat 5]
+#
+# Without --model a forest shaped like train_gw_model.py's (300 trees, depth 12)
+# is fitted on fpl_gw_2024_25_enriched.csv, so it runs offline. That both paths
+# return identical predictions is checked by tests/test_forest_eval.py. The last
+# column times predict_distribution (mean, variance and floor/median/ceiling in one pass).
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_eval import CompiledForest
+
+BATCH_SIZES = (1, 50, 800, 50_000)
+FEATURES = [
+    "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat",
+    "form", "fixture_difficulty",
+]
+
+
+def load_rows(features):
+    df = pd.read_csv("fpl_gw_2024_25_enriched.csv").dropna()
+    return df, df[features].to_numpy(dtype=np.float64)
+
+
+def build_bench_forest(n_estimators=300, max_depth=12):
+    df, X = load_rows(FEATURES)
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=-1)
+    model.fit(pd.DataFrame(X, columns=FEATURES), df["total_points"])
+    model.n_jobs = None  # predict the way the served model does
+    return model
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="fitted forest .pkl (default: fit a 300-tree, depth-12 forest)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model) if args.model else build_bench_forest()
+    features = list(getattr(model, "feature_names_in_", FEATURES))
+    _, pool = load_rows(features)
+
+    start = time.perf_counter()
+    compiled = CompiledForest.from_model(model)
+    t_compile = time.perf_counter() - start
+    print(f"trees={compiled.n_trees} max_depth={compiled.max_depth} nodes={len(compiled.value)} "
+          f"layout={'dense' if compiled.dense else 'linked'} compile={t_compile * 1000:.1f} ms")
+
+    rng = np.random.default_rng(0)
+    print(f"{'batch':>7} {'sklearn':>12} {'compiled':>12} {'speedup':>8} {'distribution':>14}")
+    for n in BATCH_SIZES:
+        X = pool[rng.integers(0, len(pool), n)]
+        X_df = pd.DataFrame(X, columns=features)
+
+        repeat = args.repeat if n < 10_000 else max(1, args.repeat // 2)
+        t_sklearn = best_of(lambda: model.predict(X_df), repeat)
+        t_compiled = best_of(lambda: compiled.predict(X), repeat)
+        t_distribution = best_of(lambda: compiled.predict_distribution(X), repeat)
+        print(f"{n:>7} {t_sklearn * 1000:9.2f} ms {t_compiled * 1000:9.2f} ms {t_sklearn / t_compiled:7.1f}x {t_distribution * 1000:11.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_smart_score.py
+# Per-player calculate_smart_score loop vs. the vectorized smart_score engine.
+#
+#   python -m benchmarks.bench_smart_score [--scale 10] [--repeat 20]
+#
+# Players come from fpl_player_data.csv (tiled --scale times) with a synthetic
+# 38-round fixture list, so it runs offline. Both paths must agree exactly.
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from fpl_api import calculate_smart_score
+from smart_score import score_pool
+from snapshot import build_snapshot
+
+
+def build_bench_payload(scale=1, seed=42):
+    """(bootstrap-static payload, fixtures) built offline from fpl_player_data.csv."""
+    rng = random.Random(seed)
+    base = pd.read_csv("fpl_player_data.csv").to_dict("records")
+    teams = [{"id": t, "name": f"Team {t}"} for t in range(1, 21)]
+
+    elements = []
+    for i in range(scale):
+        for row in base:
+            elements.append(dict(
+                row,
+                id=len(elements) + 1,
+                element_type=rng.randint(1, 4),
+                form=str(row["form"]),
+                chance_of_playing_next_round=rng.choice([None, 0, 25, 50, 75, 100, 100, 100]),
+            ))
+
+    fixtures = []
+    for event in range(1, 39):
+        ids = list(range(1, 21))
+        rng.shuffle(ids)
+        for h, a in zip(ids[::2], ids[1::2]):
+            fixtures.append({
+                "id": len(fixtures) + 1, "event": event, "finished": event < 10,
+                "team_h": h, "team_a": a,
+                "team_h_difficulty": rng.randint(2, 5), "team_a_difficulty": rng.randint(2, 5),
+            })
+    return {"elements": elements, "teams": teams}, fixtures
+
+
+def build_bench_snapshot(scale=1, seed=42):
+    data, fixtures = build_bench_payload(scale, seed)
+    return build_snapshot(data, fixtures, version=f"bench-{scale}-{seed}")
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="tile the ~800-player pool this many times")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot = build_bench_snapshot(args.scale)
+    # calculate_smart_score writes fixture_info, so it gets its own copies of the read-only players
+    players = [dict(p) for p in snapshot.players]
+
+    def scalar():
+        # The pre-vectorization path: raw fixture list, one scan per player
+        return [calculate_smart_score(p, snapshot.fixtures, snapshot.team_names) for p in players]
+
+    def vectorized():
+        from smart_score import _score_cache
+        _score_cache.clear()
+        return score_pool(snapshot)
+
+    assert scalar() == vectorized(), "vectorized smart scores differ from calculate_smart_score"
+
+    t_scalar = best_of(scalar, args.repeat)
+    t_vector = best_of(vectorized, args.repeat)
+    t_cached = best_of(lambda: score_pool(snapshot), args.repeat)
+    print(f"players={len(players)}")
+    print(f"scalar loop   {t_scalar * 1000:9.2f} ms")
+    print(f"vectorized    {t_vector * 1000:9.2f} ms  ({t_scalar / t_vector:.1f}x)")
+    print(f"cached        {t_cached * 1000:9.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# benchmarks/suite.py
+# Offline benchmark suite for the scoring, ranking and prediction hot paths.
+#
+#   python -m benchmarks.suite                                   # 1x, 10x, 100x pools
+#   python -m benchmarks.suite --cassette cassettes/fpl          # replay recorded FPL data
+#   python -m benchmarks.suite --save-baseline                   # write benchmarks/baseline.json
+#   python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.2
+#
+# The player pool comes from a recorded cassette (see fpl_http.py) or, without
+# one, from fpl_player_data.csv with a synthetic fixture list, and is tiled to
+# each --scales factor. Results are written as JSON; with --baseline any case
+# whose median is more than --threshold slower exits non-zero.
+import argparse
+import copy
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+import feature_store
+import fpl_api
+import history_store
+import fpl_http
+import smart_score
+from benchmarks.bench_smart_score import build_bench_payload
+from formation_logic import get_best_xi_by_formation
+from prediction_cache import prediction_cache
+from snapshot import build_snapshot
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results.json")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+MIN_RUN_TIME = 0.5  # seconds spent per case before stopping early
+NOISE_FLOOR_MS = 0.05  # regressions smaller than this are timer noise
+
+CASES = []
+
+
+def case(name, scaled=True):
+    """Register fn(ctx) -> zero-argument callable to be timed."""
+    def register(fn):
+        CASES.append((name, scaled, fn))
+        return fn
+    return register
+
+
+def load_payload(cassette=None):
+    if cassette is None:
+        data, fixtures = build_bench_payload(1)
+        return data, fixtures, "fpl_player_data.csv + synthetic fixtures"
+    fpl_http.set_mode("replay", cassette)
+    data = fpl_http.get(fpl_api.BOOTSTRAP_URL).json()
+    fixtures = fpl_http.get(fpl_api.FIXTURES_URL).json()
+    return data, fixtures, f"cassette {cassette}"
+
+
+def scale_payload(data, scale):
+    """Tile the player pool `scale` times with fresh ids (teams and fixtures are unchanged)."""
+    base = data["elements"]
+    elements = []
+    for i in range(scale):
+        for p in base:
+            elements.append(dict(p, id=len(elements) + 1))
+    return dict(data, elements=elements)
+
+
+def build_context(data, fixtures, scale):
+    snapshot = build_snapshot(scale_payload(data, scale), fixtures, version=f"suite-{scale}-{len(data['elements'])}")
+    # Scored copies – calculate_smart_score annotates the players it is given
+    players = [p for p in fpl_api.apply_smart_scores(snapshot) if p.get("element_type") in fpl_api.POSITION_MAP]
+    return {
+        "snapshot": snapshot,
+        "players": players,
+        "raw_fixtures": list(snapshot.fixtures),
+    }
+
+
+@case("calculate_smart_score")
+def bench_calculate_smart_score(ctx):
+    snapshot = ctx["snapshot"]
+    return lambda: [fpl_api.calculate_smart_score(p, snapshot.fixtures, snapshot.team_names) for p in ctx["players"]]
+
+
+@case("score_pool")
+def bench_score_pool(ctx):
+    def run():
+        smart_score._score_cache.clear()
+        return smart_score.score_pool(ctx["snapshot"])
+    return run
+
+
+@case("get_upcoming_fixtures.raw")
+def bench_upcoming_raw(ctx):
+    snapshot, fixtures = ctx["snapshot"], ctx["raw_fixtures"]
+    return lambda: [fpl_api.get_upcoming_fixtures(p["team"], fixtures, snapshot.team_names) for p in ctx["players"]]
+
+
+@case("get_upcoming_fixtures.index")
+def bench_upcoming_index(ctx):
+    snapshot = ctx["snapshot"]
+    return lambda: [fpl_api.get_upcoming_fixtures(p["team"], snapshot.fixture_index, snapshot.team_names) for p in ctx["players"]]
+
+
+@case("get_top_picks_by_position")
+def bench_top_picks(ctx):
+    def run():
+        prediction_cache.clear()  # measure the model, not the memo
+        return [fpl_api.get_top_picks_by_position(pos, top_n=5, snapshot=ctx["snapshot"]) for pos in fpl_api.POSITION_MAP.values()]
+    return run
+
+
+@case("get_captain_picks")
+def bench_captain_picks(ctx):
+    def run():
+        smart_score._score_cache.clear()
+        return fpl_api.get_captain_picks(top_n=5, snapshot=ctx["snapshot"])
+    return run
+
+
+@case("get_best_xi_by_formation")
+def bench_best_xi(ctx):
+    return lambda: get_best_xi_by_formation(ctx["players"], 1000)
+
+
+@case("predict_store_rows.single", scaled=False)
+def bench_predict_single(ctx):
+    # One player's prediction the way the dashboard and API serve it: a feature-store row
+    store = feature_store.get_feature_store(ctx["snapshot"])
+    rows = np.flatnonzero(store.eligible_for(fpl_api.model_features()))[:1]
+    def run():
+        prediction_cache.clear()
+        return fpl_api.predict_store_rows(store, rows)
+    return run
+
+
+@case("load_enriched_seasons", scaled=False)
+def bench_load_seasons(ctx):
+    paths = sorted(glob.glob("fpl_gw_*_enriched.csv"))
+    return lambda: [pd.read_csv(path) for path in paths]
+
+
+@case("load_history", scaled=False)
+def bench_load_history(ctx):
+    history_store.ensure_history_store()
+    return lambda: history_store.load_history()
+
+
+@case("load_history.projected", scaled=False)
+def bench_load_history_projected(ctx):
+    history_store.ensure_history_store()
+    columns = ["minutes", "ict_index", "form", "fixture_difficulty", "total_points"]
+    return lambda: history_store.load_history(columns=columns, seasons=["2024/25"])
+
+
+def measure(fn, repeat):
+    fn()  # warm-up: imports, model load, feature store
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if len(times) >= 3 and time.perf_counter() - start > MIN_RUN_TIME:
+            break
+    return {
+        "runs": len(times),
+        "min_ms": round(min(times) * 1000, 4),
+        "median_ms": round(statistics.median(times) * 1000, 4),
+        "mean_ms": round(statistics.fmean(times) * 1000, 4),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scales, repeat, cassette=None, only=None):
+    data, fixtures, source = load_payload(cassette)
+    # Keep benchmark pools out of the real store (main.py serves whatever LATEST points at)
+    feature_store.STORE_DIR = tempfile.mkdtemp(prefix="fpl_bench_features_")
+    results = []
+    try:
+        for scale in scales:
+            ctx = build_context(copy.deepcopy(data), fixtures, scale)
+            for name, scaled, make in CASES:
+                if only and not any(o in name for o in only):
+                    continue
+                if not scaled and scale != scales[0]:
+                    continue
+                stats = measure(make(ctx), repeat)
+                row = {"case": name, "scale": scale if scaled else None, "players": len(ctx["players"]) if scaled else None, **stats}
+                results.append(row)
+                label = f"{scale}x" if scaled else "-"
+                print(f"{name:<30} {label:>5} {stats['median_ms']:>12.3f} ms  (min {stats['min_ms']:.3f}, {stats['runs']} runs)")
+    finally:
+        shutil.rmtree(feature_store.STORE_DIR, ignore_errors=True)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": git_commit(),
+            "data": source,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def result_key(row):
+    return f"{row['case']}@{row['scale']}"
+
+
+def compare(current, baseline, threshold):
+    """Cases whose median got more than `threshold` (fraction) slower than the baseline."""
+    before = {result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = before.get(result_key(row))
+        if old is None:
+            continue
+        ratio = row["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        if ratio > 1 + threshold and row["median_ms"] - old["median_ms"] > NOISE_FLOOR_MS:
+            regressions.append((result_key(row), old["median_ms"], row["median_ms"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="comma-separated pool multipliers")
+    parser.add_argument("--repeat", type=int, default=10, help="max timed runs per case")
+    parser.add_argument("--cassette", help="replay bootstrap-static and fixtures from this recorded cassette")
+    parser.add_argument("--only", action="append", help="run only cases containing this text (repeatable)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs. baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write the results to {DEFAULT_BASELINE}")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",")]
+    results = run_suite(scales, args.repeat, args.cassette, args.only)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for key, old, new, ratio in regressions:
+            print(f"❌ {key}: {old:.3f} ms → {new:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No case more than {args.threshold:.0%} slower than {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 
 import random
 
+from timing import timed
+
 # Placeholder AI-based captain recommendation logic
 # def recommend_captain_ai(players):
 #     # Assume each player has smart_score, fixture_difficulty, form, and value
@@ -18,6 +20,7 @@ import random
 #     return recommendations[:3]
 
 
+@timed()
 def recommend_captain_ai(players):
     # Simple logic for demo: return top 3 smart scores
     sorted_players = sorted(players, key=lambda x: x.get("smart_score", 0), reverse=True)
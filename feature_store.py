@@ -0,0 +1,264 @@
+# feature_store.py
+# Materialized next-gameweek model features for every player.
+#
+# Computed once per data refresh, then written as a float64 .npy matrix plus a
+# player-id index and a schema version. Readers open the matrix with
+# mmap_mode="r", so the dashboard, its predictor tab and the main.py API all
+# share one copy without rebuilding anything.
+#
+# SNAPSHOT_FEATURES come from the snapshot's season totals and fixture index
+# (what the per-player prediction inputs used to hold) for the models trained on
+# those. Once fetch_gw_history.py has filled the gw_store with this season's
+# matches, gw_features.MODEL_FEATURES are added from build_next_gameweek – the
+# same code that builds the history training set, so served and trained
+# features cannot diverge. A model needing features the store doesn't have is
+# refused (MissingFeaturesError) rather than fed zeros.
+#
+#   python feature_store.py            # materialize for the current FPL data
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import gw_store
+from gw_features import MODEL_FEATURES, build_next_gameweek, next_opponents
+
+SCHEMA_VERSION = 3
+STORE_DIR = os.environ.get("FPL_FEATURE_STORE", ".fpl_features")
+LATEST_FILE = "LATEST"
+KEEP_VERSIONS = 3
+MIN_MINUTES = 270  # 3+ full matches before a player's season totals are trusted
+
+# Features of the snapshot-trained models, built from season totals
+SNAPSHOT_FEATURES = [
+    "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat",
+    "form", "fixture_difficulty", "opponent_strength", "team_form",
+    "price", "transfers_in_gw", "transfers_out_gw",
+    "yellow_cards", "red_cards", "bonus",
+]
+
+# Stored feature <- player table column, where they differ only by name
+_TABLE_COLUMNS = {
+    "transfers_in_gw": "transfers_in_event",
+    "transfers_out_gw": "transfers_out_event",
+}
+
+_open_stores = {}
+
+
+class MissingFeaturesError(ValueError):
+    pass
+
+
+class FeatureStore:
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(f"Feature store {path} has schema {meta.get('schema_version')}, expected {SCHEMA_VERSION}")
+        self.path = path
+        self.snapshot_version = meta["snapshot_version"]
+        self.source = meta["source"]
+        self.columns = meta["columns"]
+        self.matrix = np.load(os.path.join(path, "features.npy"), mmap_mode="r")
+        self.player_ids = np.load(os.path.join(path, "player_ids.npy"))
+        self.eligible = np.load(os.path.join(path, "eligible.npy"))
+        self.history_eligible = np.load(os.path.join(path, "history_eligible.npy")) if self.source == "history" else None
+        self.index = {int(pid): row for row, pid in enumerate(self.player_ids.tolist())}
+        self._column_index = {c: i for i, c in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def rows(self, player_ids):
+        """Matrix rows for `player_ids` (KeyError for players not in the store)."""
+        return np.fromiter((self.index[int(pid)] for pid in player_ids), dtype=np.intp, count=len(player_ids))
+
+    def column(self, name):
+        return self.matrix[:, self._column_index[name]]
+
+    def check(self, features):
+        missing = [f for f in features if f not in self._column_index]
+        if missing:
+            hint = (" – models trained on the gameweek history need this season's matches in fpl_gw_store/"
+                    " (run fetch_gw_history.py)") if set(missing) & set(MODEL_FEATURES) else ""
+            raise MissingFeaturesError(f"Feature store {self.path} has no {missing}{hint}")
+
+    def eligible_for(self, features):
+        """Players a model using `features` can be served for (history features need a played match)."""
+        self.check(features)
+        if self.history_eligible is not None and set(features) & set(MODEL_FEATURES):
+            return self.eligible & self.history_eligible
+        return self.eligible
+
+    def matrix_for(self, features, rows=None):
+        """(n_rows, len(features)) float matrix in the model's column order."""
+        self.check(features)
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.intp)
+        X = np.empty((len(rows), len(features)), dtype=np.float64)
+        for j, feature in enumerate(features):
+            X[:, j] = self.matrix[rows, self._column_index[feature]]
+        return X
+
+    def row(self, player_id):
+        """Feature dict for one player."""
+        values = self.matrix[self.index[int(player_id)]].tolist()
+        return dict(zip(self.columns, values))
+
+
+def build_feature_matrix(table, fixture_index, limit=3):
+    """(n_players, len(SNAPSHOT_FEATURES)) float64 features plus the eligibility mask."""
+    teams = table["team"].to_numpy()
+    n_teams = int(teams.max(initial=0)) + 1
+    team_difficulty = np.full(n_teams, 3.0)
+    team_opponent = np.full(n_teams, 3.0)
+    for team in np.unique(teams).tolist():
+        difficulties = [d for _, d in fixture_index.upcoming(team, limit)]
+        if difficulties:
+            team_difficulty[team] = np.mean(difficulties)
+            team_opponent[team] = difficulties[0]
+
+    form = table["form"].to_numpy(dtype=np.float64)
+    derived = {
+        "fixture_difficulty": team_difficulty[teams],
+        "opponent_strength": team_opponent[teams],
+        "team_form": form,  # Placeholder – the snapshot models were trained with player form here
+        "price": table["now_cost"].to_numpy(dtype=np.float64) / 10.0,
+    }
+    X = np.empty((len(table), len(SNAPSHOT_FEATURES)), dtype=np.float64)
+    for j, feature in enumerate(SNAPSHOT_FEATURES):
+        if feature in derived:
+            X[:, j] = derived[feature]
+        else:
+            X[:, j] = table[_TABLE_COLUMNS.get(feature, feature)].to_numpy(dtype=np.float64)
+
+    # Unparseable form made the per-player path skip the player; other gaps count as 0
+    eligible = (table["minutes"].to_numpy() >= MIN_MINUTES) & ~np.isnan(form)
+    np.nan_to_num(X, copy=False, nan=0.0)
+    return X, eligible
+
+
+def build_history_feature_matrix(table, fixtures, history):
+    """(n_players, len(MODEL_FEATURES)) features from this season's matches via gw_features.build_next_gameweek,
+    plus the mask of players with a next fixture and at least one played match."""
+    opponents = next_opponents(fixtures)
+    upcoming = pd.DataFrame(
+        [(pid, *opponents[team]) for pid, team in zip(table["id"].tolist(), table["team"].tolist()) if team in opponents],
+        columns=["player_id", "opponent_team", "was_home"],
+    )
+    rows = build_next_gameweek(history, upcoming).reindex(table["id"].to_numpy())
+    X = rows[MODEL_FEATURES].to_numpy(dtype=np.float64)
+    has_history = rows["matches_before"].fillna(0).to_numpy() > 0
+    np.nan_to_num(X, copy=False, nan=0.0)
+    return X, has_history
+
+
+def store_key(snapshot_version, history_version=None):
+    return hashlib.sha1(f"{SCHEMA_VERSION}:{snapshot_version}:{history_version}".encode()).hexdigest()[:16]
+
+
+def materialize(snapshot, store_dir=None, history_dir=None):
+    """Compute and persist the feature matrix for `snapshot`; returns the store's directory."""
+    store_dir = store_dir or STORE_DIR
+    history_dir = history_dir or gw_store.STORE_DIR
+    history_version = gw_store.store_version(history_dir)
+    path = os.path.join(store_dir, store_key(snapshot.version, history_version))
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        X, eligible = build_feature_matrix(snapshot.table, snapshot.fixture_index)
+        columns, source = list(SNAPSHOT_FEATURES), "snapshot"
+        if history_version is not None:
+            X_history, history_eligible = build_history_feature_matrix(
+                snapshot.table, snapshot.fixtures, gw_store.read_store(history_dir))
+            X = np.hstack([X, X_history])
+            columns, source = columns + MODEL_FEATURES, "history"
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, "features.npy"), X)
+        np.save(os.path.join(tmp, "player_ids.npy"), snapshot.table["id"].to_numpy(dtype=np.int32))
+        np.save(os.path.join(tmp, "eligible.npy"), eligible)
+        if source == "history":
+            np.save(os.path.join(tmp, "history_eligible.npy"), history_eligible)
+        # meta.json last – a directory without it is never opened
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({
+                "schema_version": SCHEMA_VERSION,
+                "snapshot_version": snapshot.version,
+                "history_version": history_version,
+                "source": source,
+                "columns": columns,
+                "n_players": len(X),
+                "created_at": time.time(),
+            }, f)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Another process materialized the same snapshot first
+            shutil.rmtree(tmp, ignore_errors=True)
+        print(f"🧮 Materialized features for {len(X)} players from the {source} → {path}")
+
+    _write_latest(store_dir, os.path.basename(path))
+    _prune(store_dir, keep=os.path.basename(path))
+    return path
+
+
+def _write_latest(store_dir, key):
+    tmp = os.path.join(store_dir, f"{LATEST_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        f.write(key)
+    os.replace(tmp, os.path.join(store_dir, LATEST_FILE))
+
+
+def _prune(store_dir, keep):
+    versions = [
+        os.path.join(store_dir, d) for d in os.listdir(store_dir)
+        if os.path.isfile(os.path.join(store_dir, d, "meta.json")) and d != keep
+    ]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    # Readers may still have older matrices mapped; unlinking them is safe on POSIX
+    for old in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _open(path):
+    store = _open_stores.get(path)
+    if store is None:
+        store = FeatureStore(path)
+        if len(_open_stores) >= KEEP_VERSIONS:
+            _open_stores.pop(next(iter(_open_stores)))
+        _open_stores[path] = store
+    return store
+
+
+def get_feature_store(snapshot, store_dir=None, history_dir=None):
+    """FeatureStore for `snapshot`, materializing it the first time this data refresh is seen."""
+    store_dir = store_dir or STORE_DIR
+    history_version = gw_store.store_version(history_dir or gw_store.STORE_DIR)
+    path = os.path.join(store_dir, store_key(snapshot.version, history_version))
+    try:
+        return _open(path)
+    except (OSError, ValueError):
+        return _open(materialize(snapshot, store_dir, history_dir))
+
+
+def latest_feature_store(store_dir=None):
+    """Most recently materialized FeatureStore, or None if nothing has been materialized yet."""
+    store_dir = store_dir or STORE_DIR
+    try:
+        with open(os.path.join(store_dir, LATEST_FILE)) as f:
+            key = f.read().strip()
+        return _open(os.path.join(store_dir, key))
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    from fpl_api import get_snapshot
+
+    store = get_feature_store(get_snapshot())
+    print(f"✅ {len(store)} players, {int(store.eligible.sum())} eligible for prediction, from the {store.source} ({store.path})")
@@ -1,13 +1,14 @@
-import requests
 import pandas as pd
 
+import fpl_http
+
 # URLs
 fixture_url = "https://fantasy.premierleague.com/api/fixtures/"
 bootstrap_url = "https://fantasy.premierleague.com/api/bootstrap-static/"
 
 # Fetch live data
-fixtures = requests.get(fixture_url).json()
-bootstrap = requests.get(bootstrap_url).json()
+fixtures = fpl_http.get(fixture_url).json()
+bootstrap = fpl_http.get(bootstrap_url).json()
 
 # Map team IDs to names
 team_id_map = {team["id"]: team["name"] for team in bootstrap["teams"]}
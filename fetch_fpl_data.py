@@ -1,10 +1,11 @@
 # fetch_fpl_data.py
-import requests
 import pandas as pd
 
+import fpl_http
+
 def fetch_player_data():
     url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-    res = requests.get(url)
+    res = fpl_http.get(url)
     res.raise_for_status()
 
     data = res.json()
@@ -1,43 +1,37 @@
 # fetch_gw_history.py
-import requests
+import argparse
+import hashlib
+import json
+import os
 import pandas as pd
-import time
-
-
-# Difficulty ratings (adjust or fetch from official FDR endpoint)
-team_difficulty = {
-    1: 3,  # Arsenal
-    2: 2,  # Aston Villa
-    3: 3,  # Bournemouth
-    4: 5,  # Brentford
-    5: 4,  # Brighton
-    6: 4,  # Burnley
-    7: 2,  # Chelsea
-    8: 3,  # Crystal Palace
-    9: 1,  # Everton
-    10: 4, # Fulham
-    11: 1, # Liverpool
-    12: 2, # Luton
-    13: 1, # Man City
-    14: 1, # Man Utd
-    15: 3, # Newcastle
-    16: 4, # Nott'm Forest
-    17: 5, # Sheffield Utd
-    18: 4, # Spurs
-    19: 2, # West Ham
-    20: 3  # Wolves
-}
 
+import fpl_http
 
-def fetch_bootstrap():
-    base_url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-    res = requests.get(base_url)
+from gw_crawler import API_BASE, CHECKPOINT_PATH, crawl_histories
+from gw_features import derive_features
+from gw_store import FORM_WINDOW, STORE_DIR, append_part, clear_store, load_state, save_state
+
+# Columns of fpl_gw_enriched.csv / the gw_store parts, in order
+ENRICHED_COLUMNS = [
+    "player_id", "web_name", "team", "gw", "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat", "opponent_team", "was_home",
+    "fixture_difficulty", "form", "total_points",
+]
+_INT_COLUMNS = ["minutes", "goals_scored", "assists", "clean_sheets", "opponent_team", "total_points"]
+
+
+def fetch_bootstrap_data():
+    base_url = f"{API_BASE}/bootstrap-static/"
+    res = fpl_http.get(base_url, timeout=30)
     res.raise_for_status()
-    return res.json()["elements"]
+    return res.json()
+
+def fetch_bootstrap():
+    return fetch_bootstrap_data()["elements"]
 
 def fetch_player_history(player_id):
-    url = f"https://fantasy.premierleague.com/api/element-summary/{player_id}/"
-    res = requests.get(url)
+    url = f"{API_BASE}/element-summary/{player_id}/"
+    res = fpl_http.get(url, timeout=10)
     if res.status_code == 200:
         return res.json()["history"]
     return []
@@ -78,71 +72,111 @@ def fetch_player_history(player_id):
 #     df.to_csv("fpl_gw_history.csv", index=False)
 #     print(f"Saved {len(df)} rows of match data.")
 
-def build_gw_dataset():
-    all_players = fetch_bootstrap()
-    records = []
+def build_rows(players, histories, state=None, up_to_round=None):
+    """Enriched rows for every player's `histories` matches after their state's last_round.
 
-    # Difficulty scores – adjust if needed
-    team_difficulty = {
-        1: 3, 2: 2, 3: 3, 4: 5, 5: 4,
-        6: 4, 7: 2, 8: 3, 9: 1, 10: 4,
-        11: 1, 12: 2, 13: 1, 14: 1, 15: 3,
-        16: 4, 17: 5, 18: 4, 19: 2, 20: 3
-    }
-
-    from collections import defaultdict
-    player_gw_history = defaultdict(list)
-
-    for player in all_players:
-        player_id = player["id"]
-        web_name = player["web_name"]
-        team = player["team"]
-
-        try:
-            history = fetch_player_history(player_id)
-            history_sorted = sorted(history, key=lambda x: x["round"])  # sort by GW
-
-            for i, match in enumerate(history_sorted):
-                gw = match["round"]
-                total_points = match["total_points"]
-
-                # FORM: avg last 3 gameweeks
-                prev_points = [g["total_points"] for g in history_sorted[max(0, i-3):i]]
-                form = sum(prev_points) / len(prev_points) if prev_points else 0
-
-                # FIXTURE DIFFICULTY
-                opponent_team = match["opponent_team"]
-                was_home = match["was_home"]
-                raw_difficulty = team_difficulty.get(opponent_team, 3)
-                difficulty = raw_difficulty - 0.5 if was_home else raw_difficulty + 0.5
-
-                records.append({
-                    "player_id": player_id,
-                    "web_name": web_name,
-                    "team": team,
-                    "gw": gw,
-                    "minutes": match["minutes"],
-                    "goals_scored": match["goals_scored"],
-                    "assists": match["assists"],
-                    "clean_sheets": match["clean_sheets"],
-                    "ict_index": float(match["ict_index"]),
-                    "influence": float(match["influence"]),
-                    "creativity": float(match["creativity"]),
-                    "threat": float(match["threat"]),
-                    "opponent_team": opponent_team,
-                    "was_home": was_home,
-                    "fixture_difficulty": difficulty,
-                    "form": form,
-                    "total_points": total_points
-                })
-        except Exception as e:
-            print(f"Error with player {web_name}: {e}")
-        time.sleep(0.2)  # to avoid API rate limits
-
-    df = pd.DataFrame(records)
-    df.to_csv("fpl_gw_enriched.csv", index=False)
-    print(f"Saved {len(df)} rows of enriched match data.")
+    The matches of all players are flattened into one table and form /
+    fixture_difficulty come from gw_features.derive_features in a single pass;
+    state's recent_points continue the form window from the previous ingest.
+    Returns (rows, state updates {player_id: {"last_round", "recent_points"}}).
+    """
+    state = state or {}
+    records = []
+    for player in players:
+        after_round = state.get(player["id"], {}).get("last_round", 0)
+        for match in histories.get(player["id"], ()):
+            gw = match["round"]
+            if gw <= after_round or (up_to_round is not None and gw > up_to_round):
+                continue
+            records.append({
+                "player_id": player["id"],
+                "web_name": player["web_name"],
+                "team": player["team"],
+                "gw": gw,
+                "minutes": match["minutes"],
+                "goals_scored": match["goals_scored"],
+                "assists": match["assists"],
+                "clean_sheets": match["clean_sheets"],
+                "ict_index": float(match["ict_index"]),
+                "influence": float(match["influence"]),
+                "creativity": float(match["creativity"]),
+                "threat": float(match["threat"]),
+                "opponent_team": match["opponent_team"],
+                "was_home": match["was_home"],
+                "total_points": match["total_points"],
+            })
+    if not records:
+        return pd.DataFrame(columns=ENRICHED_COLUMNS), {}
+
+    recent = {pid: s["recent_points"] for pid, s in state.items() if s.get("recent_points")}
+    df = derive_features(pd.DataFrame(records), recent_points=recent)
+    df = df[ENRICHED_COLUMNS].astype({c: "int64" for c in _INT_COLUMNS})
+
+    # Advance each player's window past the new rows
+    updates = {}
+    for pid, group in df.groupby("player_id", sort=False):
+        points = list(recent.get(pid, [])) + group["total_points"].tolist()
+        updates[int(pid)] = {"last_round": int(group["gw"].iloc[-1]), "recent_points": points[-FORM_WINDOW:]}
+    return df, updates
+
+
+def build_gw_dataset(incremental=False, output_csv="fpl_gw_enriched.csv", store_dir=STORE_DIR):
+    """Build the enriched per-gameweek dataset.
+
+    A full build refetches every history and rewrites `output_csv` and the store.
+    With `incremental=True` only players behind the latest finished gameweek are
+    fetched, and only their unseen rounds are appended to the store and CSV.
+    Every player fetched successfully counts as caught up to that gameweek.
+    """
+    bootstrap = fetch_bootstrap_data()
+    all_players = bootstrap["elements"]
+    latest_round = max((e["id"] for e in bootstrap.get("events", []) if e.get("finished")), default=None)
+
+    state = load_state(store_dir) if incremental else {}
+    if incremental and not state:
+        print("No ingest state found – running a full build instead.")
+        incremental = False
+
+    if incremental:
+        to_fetch = [p for p in all_players
+                    if latest_round is None or state.get(p["id"], {}).get("last_round", 0) < latest_round]
+    else:
+        to_fetch = all_players
+
+    # Fetch histories concurrently (rate-limited, resumable – see gw_crawler.py). Only a
+    # checkpoint of the same kind of build for the same finished gameweek is resumed
+    ids = [p["id"] for p in to_fetch]
+    run_key = f"{'incremental' if incremental else 'full'}:{latest_round}:{hashlib.sha1(json.dumps(ids).encode()).hexdigest()[:12]}"
+    histories = crawl_histories(ids, run_key=run_key)
+
+    # Players missing from histories were already reported by the crawler. Rounds after the
+    # latest finished one are still being played: leave them for the next incremental run
+    df, updates = build_rows(to_fetch, histories, state, up_to_round=latest_round)
+    state.update(updates)
+    if latest_round is not None:
+        # A fetched player is up to date even without a new match (unused, injured, just signed)
+        for pid in histories:
+            entry = state.setdefault(int(pid), {"recent_points": []})
+            entry["last_round"] = max(entry.get("last_round", 0), latest_round)
+    if incremental:
+        if not df.empty:
+            df.to_csv(output_csv, mode="a", header=not os.path.exists(output_csv), index=False)
+        print(f"Appended {len(df)} new rows for {df['player_id'].nunique() if len(df) else 0} players.")
+    else:
+        clear_store(store_dir)
+        df.to_csv(output_csv, index=False)
+        print(f"Saved {len(df)} rows of enriched match data.")
+    append_part(df, store_dir)
+    save_state(state, store_dir)
+
+    # Dataset written – the next run should start a fresh crawl
+    if len(histories) == len(to_fetch) and os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
 
 
 if __name__ == "__main__":
-    build_gw_dataset()
+    parser = argparse.ArgumentParser(description="Build the enriched FPL gameweek dataset")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch and append gameweeks played since the last run")
+    args = parser.parse_args()
+    build_gw_dataset(incremental=args.incremental)
@@ -5,39 +5,33 @@ from fpl_api import (
     get_captain_picks,
     get_top_raw_player_by_position,
     get_top_managers,
-    get_all_players,
-    fetch_data,
-    fetch_fixtures,
-    calculate_smart_score,
-    get_prediction
+    get_snapshot,
+    apply_smart_scores,
+    predict_many,
+    predict_store_rows,
+    model_features
 )
+from feature_store import get_feature_store
+from history_store import load_history
 from captain_ai import recommend_captain_ai
+from smart_score import attach_fixture_info
 from formation_logic import get_best_xi_by_formation
+from timing import span, summary as timing_summary
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 from math import pi
 import seaborn as sns
 import difflib
-import joblib
-import requests
-
-
-
-model = joblib.load("gw_score_model.pkl")
 
 
 st.set_page_config(page_title="FPL AI Assistant", layout="wide")
 st.sidebar.success("Login bypassed – Welcome Developer!")
 
-all_players = get_all_players()
-# Enrich all players with smart_score and fixture info
-data = fetch_data()
-fixtures = fetch_fixtures()
-team_lookup = {t['id']: t['name'] for t in data['teams']}
-
-for p in all_players:
-    p['smart_score'] = calculate_smart_score(p, fixtures, team_lookup)
+with span("dashboard.load_players"):
+    snapshot = get_snapshot()
+    # Enrich all players with smart_score (vectorized, cached per snapshot); fixture info is added when displayed
+    all_players = apply_smart_scores(snapshot)
 
 player_pool = [p for p in all_players if p.get("element_type") in [1, 2, 3, 4]]
 
@@ -47,7 +41,22 @@ def load_fpl_data():
     df = df[df["minutes"] > 0]
     return df
 
-fpl_df = load_fpl_data()
+with span("dashboard.load_gw_csv"):
+    fpl_df = load_fpl_data()
+
+def live_player_id(snapshot, name, team_name):
+    """Id of the history player called `name` in the live snapshot, or None if no single player matches.
+
+    History ids belong to their season, so after a rollover the same id can be a different player.
+    """
+    key = name.replace("-", " ").casefold()
+    matches = [
+        p for p in snapshot.players
+        if f"{p.get('first_name', '')} {p.get('second_name', '')}".replace("-", " ").casefold() == key
+    ]
+    if len(matches) > 1:
+        matches = [p for p in matches if p["team_name"] == team_name]
+    return matches[0]["id"] if len(matches) == 1 else None
 
 # def format_player(p):
     # return f"**{p['web_name']}** ({p['team_name']}) – £{p['now_cost']/10}m – Score: `{p['smart_score']}`"
@@ -89,12 +98,18 @@ def format_player_detailed(p):
     # Add warning if playing chance < 100
     warn_icon = "⚠️" if isinstance(chance, (int, float)) and chance < 100 else ""
 
+    # Floor / ceiling of the model's prediction, when the pick was ranked on them
+    spread = ""
+    if "predicted_floor" in p:
+        spread = f"\n📉 Floor: `{p['predicted_floor']:.1f}` | 📈 Ceiling: `{p['predicted_ceiling']:.1f}` | 🔮 Predicted: `{p['predicted_points']:.1f}`"
+
     # Create display string
     return (
         f"**{p['web_name']}** ({p['team_name']}) {warn_icon}\n"
         f"💰 £{cost:.1f}m | 🔥 Form: `{form}` | 🧮 Score: `{smart_score}`\n"
         f"🎯 Total Points: `{total_points}` | 🕒 Minutes: `{minutes}`\n"
         f"🧠 Playing Chance: `{chance}%` | 📆 Fixtures: {emoji_difficulty or 'N/A'}"
+        f"{spread}"
     )
 
 def get_player_image_url(player):
@@ -180,11 +195,13 @@ tabs = st.tabs([
     "⚽ AI Score Predictor"
 ])
 
-with tabs[0]:
+with tabs[0], span("tab.top_picks"):
     st.header("Top Picks per Position")
+    pick_ranking = st.radio("Rank by", ["per_90", "floor", "ceiling"], horizontal=True, key="top_picks_rank",
+                            format_func={"per_90": "Predicted per 90", "floor": "Safe (floor)", "ceiling": "Upside (ceiling)"}.get)
     for pos in ["Goalkeeper", "Defender", "Midfielder", "Forward"]:
         st.subheader(pos)
-        top_players = get_top_picks_by_position(pos, top_n=5)
+        top_players = get_top_picks_by_position(pos, top_n=5, snapshot=snapshot, rank_by=pick_ranking)
         # st.write(f"Top players for {pos}: {len(top_players)}")
         # for p in top_players:
         #     # st.markdown(format_player(p))
@@ -198,9 +215,11 @@ with tabs[0]:
                     st.markdown(format_player_detailed(player))
 
 
-with tabs[1]:
+with tabs[1], span("tab.captain_picks"):
     st.header("Captain Picks")
-    picks = get_captain_picks(top_n=5)
+    captain_ranking = st.radio("Rank by", ["smart_score", "floor", "ceiling"], horizontal=True, key="captain_rank",
+                               format_func={"smart_score": "Smart score", "floor": "Safe (floor)", "ceiling": "Upside (ceiling)"}.get)
+    picks = get_captain_picks(top_n=5, snapshot=snapshot, rank_by=captain_ranking)
     if picks:
         for player in picks:
             # st.markdown(f"{format_player(p)}\nFixtures: {p.get('fixture_info', 'N/A')}")
@@ -213,9 +232,9 @@ with tabs[1]:
     else:
         st.warning("No captain picks available.")
 
-with tabs[2]:
+with tabs[2], span("tab.ai_captain"):
     st.header("AI-Recommended Captains")
-    picks = recommend_captain_ai(all_players)
+    picks = attach_fixture_info(recommend_captain_ai(all_players), snapshot.fixture_index)
     if picks:
         for player in picks:
             # st.markdown(f"{format_player(p)}\nFixtures: {p.get('fixture_info', 'N/A')}")
@@ -238,7 +257,7 @@ with tabs[2]:
 #         if p["web_name"] == selected_player:
 #             st.markdown(f"**Selected Player Details:**\n{format_player(p)}\nFixtures: {p.get('fixture_info', 'N/A')}")
 
-with tabs[3]:
+with tabs[3], span("tab.compare_players"):
     st.header("📊 Compare Players")
 
     team_names = sorted(set(p["team_name"] for p in player_pool))
@@ -258,6 +277,7 @@ with tabs[3]:
     # Retrieve player data
     player1 = next(p for p in players1 if p["web_name"] == player1_name)
     player2 = next(p for p in players2 if p["web_name"] == player2_name)
+    player1, player2 = attach_fixture_info([player1, player2], snapshot.fixture_index)
 
     st.markdown("## 🆚 Player Comparison")
     col1, col2 = st.columns(2)
@@ -301,29 +321,29 @@ with tabs[3]:
     # st.table(df)
 
 
-with tabs[4]:
+with tabs[4], span("tab.your_squad"):
     st.header("Your Squad")
     st.info("Login-based team import and visual formation coming soon.")
 
-with tabs[5]:
+with tabs[5], span("tab.transfer_planner"):
     st.header("Transfer Planner")
     st.info("Will suggest optimal transfers based on user team.")
 
-with tabs[6]:
+with tabs[6], span("tab.raw_leaders"):
     st.header("Raw Top Scorers by Position")
     for pos_id, label in zip([1, 2, 3, 4], ["Goalkeepers", "Defenders", "Midfielders", "Forwards"]):
         st.subheader(label)
-        top_raw = [p for p in get_top_raw_player_by_position(label) if p["element_type"] == pos_id]
+        top_raw = [p for p in get_top_raw_player_by_position(label, snapshot=snapshot) if p["element_type"] == pos_id]
         for p in top_raw[:3]:
             st.markdown(format_player(p))
 
-with tabs[7]:
+with tabs[7], span("tab.top_managers"):
     st.header("Top Managers")
-    managers = get_top_managers()
+    managers = get_top_managers(snapshot)
     for m in managers:
         st.markdown(f"🏅 **{m['manager_name']}** – Total Points: `{m['points']}`")
 
-with tabs[8]:
+with tabs[8], span("tab.recommended_xi"):
     st.header("Recommended XI (with Subs)")
     budget = 1000
     xi, formation, subs = get_best_xi_by_formation(player_pool, budget)
@@ -341,14 +361,17 @@ with tabs[8]:
         for sub in subs:
             st.markdown(f"🧦 {format_player(sub)}")
 
-with tabs[9]:  # Player Points Predictor
+with tabs[9], span("tab.score_predictor"):  # Player Points Predictor
 
     st.set_page_config(page_title="FPL AI Score Predictor", layout="centered")
     st.title("⚽ Fantasy Football AI Assistant")
     st.subheader("🔮 Predict Next Gameweek Player Points")
 
-    # 📦 Load local enriched player data
-    df_2024_25 = pd.read_csv("fpl_gw_2024_25_enriched.csv")
+    # 📦 Load local enriched player data (one season, only the columns shown below)
+    df_2024_25 = load_history(seasons=["2024/25"], columns=[
+        "player_id", "web_name", "team", "gw", "minutes", "goals_scored", "assists", "clean_sheets",
+        "ict_index", "influence", "creativity", "threat", "fixture_difficulty", "form", "total_points",
+    ])
 
     # Add clean readable names
     df_2024_25["clean_name"] = df_2024_25["web_name"].apply(
@@ -358,11 +381,9 @@ with tabs[9]:  # Player Points Predictor
 
     # 🔁 Patch team names using live FPL API
     try:
-        bootstrap = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/").json()
-
         # Create mappings
-        player_to_team_id = {player["id"]: player["team"] for player in bootstrap["elements"]}
-        team_id_to_name = {team["id"]: team["name"] for team in bootstrap["teams"]}
+        player_to_team_id = {pid: player["team"] for pid, player in snapshot.players_by_id.items()}
+        team_id_to_name = dict(snapshot.team_names)
 
         # Map team IDs to names
         df_2024_25["team_id"] = df_2024_25["player_id"].map(player_to_team_id)
@@ -420,19 +441,31 @@ with tabs[9]:  # Player Points Predictor
 
         if st.button("Predict Points"):
             try:
-                player_input = {
-                    k: float(v) if isinstance(v, (float, int)) else v
-                    for k, v in player_row.to_dict().items()
-                    if k in [
-                        "minutes", "goals_scored", "assists", "clean_sheets",
-                        "ict_index", "influence", "creativity", "threat",
-                        "form", "fixture_difficulty", "opponent_strength",
-                        "team_form", "price", "transfers_in_gw", "transfers_out_gw",
-                        "yellow_cards", "red_cards", "bonus"
-                    ]
-                }
-                predicted_score = get_prediction(player_input)
-                st.success(f"Predicted Points for **{selected_player}**: {predicted_score:.2f}")
+                # Next-gameweek features materialized for this data refresh, when we have them
+                store = get_feature_store(snapshot)
+                player_id = live_player_id(snapshot, selected_player, selected_team)
+                if player_id in store.index:
+                    rows = store.rows([player_id])
+                    # Same rule as the other tabs: no prediction from features known to be missing
+                    eligible = store.eligible_for(model_features())[rows[0]]
+                    predicted_score = predict_store_rows(store, rows)[0] if eligible else None
+                else:
+                    player_input = {
+                        k: float(v) if isinstance(v, (float, int)) else v
+                        for k, v in player_row.to_dict().items()
+                        if k in [
+                            "minutes", "goals_scored", "assists", "clean_sheets",
+                            "ict_index", "influence", "creativity", "threat",
+                            "form", "fixture_difficulty", "opponent_strength",
+                            "team_form", "price", "transfers_in_gw", "transfers_out_gw",
+                            "yellow_cards", "red_cards", "bonus"
+                        ]
+                    }
+                    predicted_score = predict_many([player_input])[0]
+                if predicted_score is None:
+                    st.info(f"Not enough data this season to predict **{selected_player}**.")
+                else:
+                    st.success(f"Predicted Points for **{selected_player}**: {predicted_score:.2f}")
             except Exception as e:
                 st.error(f"Prediction failed: {e}")
     else:
@@ -509,3 +542,10 @@ with tabs[9]:  # Player Points Predictor
 #     else:
 #         st.warning("No data found for this player.")
 
+
+# ⏱️ Debug panel: per-stage latency over recent runs in this Streamlit process
+if st.sidebar.checkbox("Show timings", value=False):
+    timings = pd.DataFrame.from_dict(timing_summary(), orient="index")
+    if not timings.empty:
+        timings = timings.sort_values("p95_ms", ascending=False)[["count", "p50_ms", "p95_ms", "p99_ms", "max_ms"]]
+    st.sidebar.dataframe(timings)
@@ -0,0 +1,37 @@
+# fixture_index.py
+# Per-team schedule of unfinished fixtures, built once from fetch_fixtures() output.
+#
+# get_upcoming_fixtures used to scan all 380 fixtures for every player; with the
+# index a "next N for team T" query is a slice.
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+
+@dataclass(frozen=True)
+class FixtureIndex:
+    # team_id -> ((opponent_name, difficulty), ...) in schedule order
+    by_team: Mapping[int, Tuple[Tuple[str, int], ...]]
+
+    def upcoming(self, team_id, limit=3):
+        return list(self.by_team.get(team_id, ())[:limit])
+
+
+def schedule_order(fixture):
+    """Sort key putting fixtures in gameweek, then kickoff order; unscheduled ones (no event yet) last.
+
+    The API lists fixtures by id, which stops being chronological once matches are rescheduled.
+    """
+    return fixture.get('event') is None, fixture.get('event') or 0, fixture.get('kickoff_time') or ""
+
+
+def build_fixture_index(fixtures, team_lookup):
+    """Group unfinished fixtures by team in schedule order (see schedule_order)."""
+    by_team = {}
+    for f in sorted(fixtures, key=schedule_order):
+        if f['finished']:
+            continue
+        home, away = f['team_h'], f['team_a']
+        by_team.setdefault(home, []).append((team_lookup.get(away, "Unknown"), f['team_h_difficulty']))
+        by_team.setdefault(away, []).append((team_lookup.get(home, "Unknown"), f['team_a_difficulty']))
+    return FixtureIndex(MappingProxyType({t: tuple(v) for t, v in by_team.items()}))
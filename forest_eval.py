@@ -0,0 +1,340 @@
+# forest_eval.py
+# Array-backed evaluator for RandomForestRegressor / ExtraTreesRegressor.
+#
+# export_forest flattens every tree of a fitted forest into contiguous NumPy
+# node arrays (feature, threshold, left/right child, leaf value). CompiledForest
+# lays those out level by level as complete binary trees and walks all trees
+# for a whole batch at once – one vectorized step per tree level, no Python
+# work per node and no per-call joblib/validation overhead. Results match
+# sklearn's predict exactly (same float32 input cast, same `<=` split rule,
+# trees averaged in the same order).
+#
+# save_dir writes the export and the evaluation layout as one .npy file per
+# array; open_dir memory-maps them read-only, so every process serving the same
+# forest shares one copy of the node arrays through the page cache.
+#
+# predict_distribution reuses the same per-tree leaf values to return the
+# ensemble's mean, variance and quantiles for every row in one pass, so risk
+# measures (floor/ceiling) cost little more than the mean itself.
+#
+#   python forest_eval.py export gw_score_model.pkl gw_score_model.forest.npz
+import os
+import shutil
+import sys
+from dataclasses import dataclass
+
+import joblib
+import numpy as np
+import pandas as pd
+
+TREE_LEAF = -1
+# Complete-tree layout is used while trees * 2**max_depth stays under this many
+# slots; deeper (unbounded) forests are walked through the child pointers instead
+MAX_DENSE_SLOTS = 1 << 23
+# Rows x trees evaluated per step – keeps the working set in cache
+CHUNK_CELLS = 1 << 16
+# Above this many rows sklearn's own Cython walk is as fast, so hand it over
+MAX_COMPILED_BATCH = int(os.environ.get("FPL_FOREST_MAX_BATCH", 5000))
+# Floor, median and ceiling of the per-tree predictions
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+# Arrays open_dir reads into memory rather than mapping (tiny, and 0-d or empty ones can't be mapped)
+SMALL_ARRAYS = ("roots", "max_depth", "n_features", "feature_names")
+# Evaluation layout built by CompiledForest.__init__ (_leaf only for dense forests, _children only for linked)
+LAYOUT_ARRAYS = ("_feature", "_threshold", "_leaf", "_children")
+
+
+@dataclass(frozen=True)
+class PredictionDistribution:
+    mean: np.ndarray       # (n_samples,) – identical to predict()
+    variance: np.ndarray   # (n_samples,) spread of the per-tree predictions
+    quantiles: np.ndarray  # (n_samples, len(levels))
+    levels: tuple
+
+    def quantile(self, level):
+        return self.quantiles[:, self.levels.index(level)]
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+def summarize_trees(per_tree, levels=DEFAULT_QUANTILES):
+    """PredictionDistribution of an (n_samples, n_trees) matrix of per-tree predictions."""
+    levels = tuple(levels)
+    # Accumulate tree by tree like sklearn, so the mean matches bit for bit
+    total = np.zeros(len(per_tree), dtype=np.float64)
+    for t in range(per_tree.shape[1]):
+        total += per_tree[:, t]
+    mean = total / per_tree.shape[1]
+    variance = np.mean(np.square(per_tree - mean[:, None]), axis=1)
+    quantiles = np.quantile(per_tree, levels, axis=1).T if levels else np.empty((len(per_tree), 0))
+    return PredictionDistribution(mean, variance, np.ascontiguousarray(quantiles), levels)
+
+
+def export_forest(model):
+    """Flatten a fitted sklearn forest regressor into a dict of contiguous arrays."""
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or not hasattr(estimators[0], "tree_"):
+        raise ValueError(f"{type(model).__name__} is not a fitted tree ensemble")
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests are supported")
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in estimators:
+        tree = est.tree_
+        n = tree.node_count
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        is_leaf = left == TREE_LEAF
+        own = np.arange(n, dtype=np.int64) + offset
+
+        # Leaves point at themselves, so every row can take exactly max_depth steps
+        lefts.append(np.where(is_leaf, own, left + offset))
+        rights.append(np.where(is_leaf, own, right + offset))
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        values.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    names = getattr(model, "feature_names_in_", None)
+    return {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "value": np.concatenate(values).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "max_depth": np.asarray(max_depth, dtype=np.int32),
+        "n_features": np.asarray(model.n_features_in_, dtype=np.int32),
+        "feature_names": np.asarray(names if names is not None else [], dtype=str),
+    }
+
+
+def float32_thresholds(threshold):
+    """Largest float32 <= each threshold: for float32 x, x <= t exactly when x <= t32."""
+    t32 = threshold.astype(np.float32)
+    over = t32.astype(np.float64) > threshold
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+class CompiledForest:
+    def __init__(self, arrays):
+        # ascontiguousarray would turn the 0-d scalars into 1-element arrays
+        self._set_arrays({k: np.ascontiguousarray(v) if np.ndim(v) else np.asarray(v) for k, v in arrays.items()})
+
+        feature = self.arrays["feature"].astype(np.intp)
+        threshold = float32_thresholds(self.arrays["threshold"])
+        left, right = self.arrays["left"], self.arrays["right"]
+        n_trees, depth = self.n_trees, self.max_depth
+
+        self.dense = n_trees << depth <= MAX_DENSE_SLOTS
+        if self.dense:
+            # Tree t's split at level d, position p lives in slot t*(2**D-1) + 2**d-1 + p,
+            # so a child is found by arithmetic instead of a pointer lookup. Leaves
+            # above the bottom level repeat themselves (threshold +inf, both children = self).
+            slots = (1 << depth) - 1
+            self._feature = np.empty((n_trees, slots), dtype=np.intp)
+            self._threshold = np.empty((n_trees, slots), dtype=np.float32)
+            node = self.roots[:, None]
+            for d in range(depth):
+                level = slice((1 << d) - 1, (1 << (d + 1)) - 1)
+                self._feature[:, level] = feature[node]
+                self._threshold[:, level] = threshold[node]
+                node = np.stack([left[node], right[node]], axis=2).reshape(n_trees, -1).astype(np.intp)
+            self._feature = self._feature.ravel()
+            self._threshold = self._threshold.ravel()
+            self._leaf = node.ravel().astype(np.int32)
+            self._slots = slots
+        else:
+            self._feature = feature
+            self._threshold = threshold
+            children = np.empty(2 * len(left), dtype=np.intp)
+            children[0::2], children[1::2] = left, right
+            self._children = children
+
+    def _set_arrays(self, arrays):
+        self.arrays = arrays
+        self.value = arrays["value"]
+        self.roots = arrays["roots"].astype(np.intp)
+        self.max_depth = int(arrays["max_depth"])
+        self.n_features_in_ = int(arrays["n_features"])
+        if len(arrays["feature_names"]):
+            self.feature_names_in_ = arrays["feature_names"].astype(object)
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(export_forest(model))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({k: data[k] for k in data.files})
+
+    def save(self, path):
+        np.savez(path, **self.arrays)
+
+    def save_dir(self, path):
+        """Write every array, layout included, as <path>/<name>.npy for open_dir.
+
+        The directory appears complete or not at all; if it already exists it is left alone.
+        """
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), array)
+        for name in LAYOUT_ARRAYS:
+            if hasattr(self, name):
+                np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # written by another process meanwhile
+            if not os.path.isdir(path):
+                raise
+
+    @classmethod
+    def open_dir(cls, path):
+        """Memory-map a forest written by save_dir without rebuilding its layout."""
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=None if name in SMALL_ARRAYS else "r")
+
+        names = {f[:-4] for f in os.listdir(path) if f.endswith(".npy")}
+        forest = cls.__new__(cls)
+        forest._set_arrays({name: load(name) for name in names if not name.startswith("_")})
+        for name in LAYOUT_ARRAYS:
+            if name in names:
+                setattr(forest, name, load(name))
+        forest.dense = "_leaf" in names
+        forest._slots = (1 << forest.max_depth) - 1
+        return forest
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _walk_dense(self, flat, row_base, n_rows):
+        n_trees, slots = self.n_trees, self._slots
+        tree_base = np.arange(n_trees, dtype=np.intp) * slots
+        step = 1 - tree_base  # slot of child = 2 * slot + step + went_right
+        slot = np.broadcast_to(tree_base, (n_rows, n_trees)).copy()
+        idx = np.empty_like(slot)
+        right = np.empty(slot.shape, dtype=bool)
+        for _ in range(self.max_depth):
+            np.add(row_base, self._feature[slot], out=idx)
+            np.greater(flat[idx], self._threshold[slot], out=right)
+            slot <<= 1
+            slot += step
+            slot += right
+        # Bottom-level slot -> position among the tree's 2**D leaves
+        slot -= tree_base + slots
+        slot += np.arange(n_trees, dtype=np.intp) << self.max_depth
+        return self._leaf[slot]
+
+    def _walk_linked(self, flat, row_base, n_rows):
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            right = flat[row_base + self._feature[node]] > self._threshold[node]
+            node = self._children[(node << 1) + right]
+        return node
+
+    def apply(self, X):
+        """Global leaf index reached in every tree: shape (n_samples, n_trees)."""
+        # sklearn evaluates splits on float32 inputs
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN")
+
+        n_samples, n_trees = len(X), self.n_trees
+        leaves = np.empty((n_samples, n_trees), dtype=np.int32)
+        walk = self._walk_dense if self.dense else self._walk_linked
+        chunk = max(1, CHUNK_CELLS // n_trees)
+        for start in range(0, n_samples, chunk):
+            Xc = X[start:start + chunk]
+            row_base = (np.arange(len(Xc), dtype=np.intp) * X.shape[1])[:, None]
+            leaves[start:start + len(Xc)] = walk(Xc.ravel(), row_base, len(Xc))
+        return leaves
+
+    def leaf_values(self, X):
+        """Per-tree predictions: shape (n_samples, n_trees)."""
+        return self.value[self.apply(X)]
+
+    def predict(self, X):
+        return summarize_trees(self.leaf_values(X), ()).mean
+
+    def predict_distribution(self, X, quantiles=DEFAULT_QUANTILES):
+        return summarize_trees(self.leaf_values(X), quantiles)
+
+
+class ForestPredictor:
+    """Drop-in for a fitted forest: compiled walk for small batches, sklearn for huge ones."""
+
+    def __init__(self, model, compiled=None, max_batch=MAX_COMPILED_BATCH):
+        self.model = model
+        self.compiled = compiled or CompiledForest.from_model(model)
+        self.max_batch = max_batch
+
+    def __getattr__(self, name):
+        # feature_names_in_, estimators_, ... come from the wrapped model
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def predict(self, X):
+        if len(X) > self.max_batch:
+            return self.model.predict(X)
+        if isinstance(X, pd.DataFrame) and hasattr(self.model, "feature_names_in_"):
+            X = X[list(self.model.feature_names_in_)]
+        return self.compiled.predict(X)
+
+    def predict_distribution(self, X, quantiles=DEFAULT_QUANTILES):
+        # Always compiled: sklearn has no batched per-tree pass to hand over to
+        if isinstance(X, pd.DataFrame) and hasattr(self.model, "feature_names_in_"):
+            X = X[list(self.model.feature_names_in_)]
+        return self.compiled.predict_distribution(X, quantiles)
+
+
+def predict_distribution(model, X, quantiles=DEFAULT_QUANTILES):
+    """Mean, variance and quantiles of the model's prediction for every row of X.
+
+    Forests report the spread of their trees; any other model is treated as a
+    single point estimate (variance 0, every quantile equal to the mean).
+    """
+    if len(X) == 0:
+        return summarize_trees(np.empty((0, 1)), quantiles)
+    if hasattr(model, "predict_distribution"):
+        return model.predict_distribution(X, quantiles)
+    estimators = getattr(model, "estimators_", None)
+    if estimators is not None and all(hasattr(e, "tree_") for e in estimators):
+        # Uncompiled forest (FPL_FOREST_EVAL=0): one predict per tree
+        if isinstance(X, pd.DataFrame) and hasattr(model, "feature_names_in_"):
+            X = X[list(model.feature_names_in_)]
+        X = np.asarray(X, dtype=np.float32)
+        return summarize_trees(np.column_stack([e.predict(X) for e in estimators]), quantiles)
+    mean = np.asarray(model.predict(X), dtype=np.float64)
+    levels = tuple(quantiles)
+    return PredictionDistribution(mean, np.zeros_like(mean), np.repeat(mean[:, None], len(levels), axis=1), levels)
+
+
+def compile_model(model):
+    """Wrap tree-ensemble regressors in a ForestPredictor; anything else is returned unchanged."""
+    try:
+        return ForestPredictor(model)
+    except ValueError:
+        return model
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "export":
+        forest = CompiledForest.from_model(joblib.load(sys.argv[2]))
+        forest.save(sys.argv[3])
+        print(f"✅ Exported {forest.n_trees} trees ({len(forest.value)} nodes) to {sys.argv[3]}")
+    else:
+        print("usage: python forest_eval.py export <model.pkl> <out.npz>")
@@ -1,3 +1,5 @@
+from timing import timed
+
 
 # def get_best_xi_by_formation(players, budget=1000):
 #     import itertools
@@ -56,6 +58,7 @@
 
 
 
+@timed()
 def get_best_xi_by_formation(players, budget):
     # Simple logic to return best XI by score
     sorted_players = sorted(players, key=lambda x: x.get("smart_score", 0), reverse=True)
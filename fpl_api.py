@@ -1,10 +1,21 @@
-import requests
-from collections import defaultdict
+import threading
 import pandas as pd
 import numpy as np
 
-import joblib
-model = joblib.load("gw_score_model.pkl")
+from model_registry import get_model, get_model_with_version
+from prediction_cache import prediction_cache
+
+from api_cache import get_json, get_version
+from snapshot import build_snapshot
+from fixture_index import FixtureIndex
+from smart_score import FIXTURE_DIFFICULTY_MODIFIER, attach_fixture_info, format_fixture_info, score_pool
+from feature_store import MissingFeaturesError, get_feature_store
+from forest_eval import DEFAULT_QUANTILES, PredictionDistribution, predict_distribution
+from gw_features import MODEL_FEATURES
+from timing import timed
+
+BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
+FIXTURES_URL = "https://fantasy.premierleague.com/api/fixtures/"
 
 
 POSITION_MAP = {
@@ -14,34 +25,64 @@ POSITION_MAP = {
     4: "Forward"
 }
 
-FIXTURE_DIFFICULTY_MODIFIER = {
-    1: 1.0,
-    2: 0.5,
-    3: 0.0,
-    4: -0.5,
-    5: -1.0
+# Fallback feature order for models pickled without feature_names_in_
+PREDICTION_FEATURES = [
+    "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat", "form"
+]
+
+# Quantiles of the forest's per-tree predictions used as a player's floor / ceiling
+FLOOR_QUANTILE, CEILING_QUANTILE = DEFAULT_QUANTILES[0], DEFAULT_QUANTILES[-1]
+
+# rank_by option -> player field, for get_top_picks_by_position / get_captain_picks
+RANKINGS = {
+    "per_90": "predicted_points_per_90",
+    "mean": "predicted_points",
+    "floor": "predicted_floor",
+    "ceiling": "predicted_ceiling",
 }
 
+@timed()
 def fetch_data():
-    url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-    return requests.get(url).json()
+    # Shared, TTL-cached payload (see api_cache.py) – callers must not rely on getting a fresh copy
+    return get_json(BOOTSTRAP_URL)
 
+@timed()
 def fetch_fixtures():
-    url = "https://fantasy.premierleague.com/api/fixtures/"
-    return requests.get(url).json()
-
+    return get_json(FIXTURES_URL)
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+@timed()
+def get_snapshot():
+    """Indexed BootstrapSnapshot for the current data refresh, rebuilt only when the API payloads change."""
+    global _snapshot
+    with _snapshot_lock:
+        data = fetch_data()
+        fixtures = fetch_fixtures()
+        version = f"{get_version(BOOTSTRAP_URL)}:{get_version(FIXTURES_URL)}"
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = build_snapshot(data, fixtures, version)
+        return _snapshot
+
+@timed()
 def enrich_players(players, teams):
     team_lookup = {t['id']: t['name'] for t in teams}
     for p in players:
         p['team_name'] = team_lookup.get(p['team'], "Unknown")
     return players
 
-def get_all_players():
-    data = fetch_data()
-    players = enrich_players(data['elements'], data['teams'])
-    return players
+def get_all_players(snapshot=None):
+    snapshot = snapshot or get_snapshot()
+    return list(snapshot.players)
 
 def get_upcoming_fixtures(team_id, fixtures, team_lookup, limit=3):
+    # Prefer the prebuilt per-team schedule (snapshot.fixture_index); raw fixture lists still work
+    # but must already be in schedule order, as snapshot.fixtures is (see fixture_index.schedule_order)
+    if isinstance(fixtures, FixtureIndex):
+        return fixtures.upcoming(team_id, limit)
+
     team_fixtures = []
     for f in fixtures:
         if not f['finished'] and (f['team_h'] == team_id or f['team_a'] == team_id):
@@ -68,9 +109,15 @@ def calculate_smart_score(p, fixtures, team_lookup):
 
         base_score = (form * 2.5) + (ppm * 1.5) + (chance / 100) - (cost * 0.4) + difficulty_mod
         return round(base_score, 2)
-    except:
+    except (KeyError, TypeError, ValueError):
+        # Missing or unparseable fields – smart_score.compute_smart_scores marks the same players invalid
         return 0
 
+@timed()
+def apply_smart_scores(snapshot):
+    """Copies of every snapshot player with smart_score set from the vectorized, per-version cached scores."""
+    return [dict(p, smart_score=score) for p, score in zip(snapshot.players, score_pool(snapshot))]
+
 # def get_top_picks_by_position(position_label, top_n=5):
 #     position_code = [k for k, v in POSITION_MAP.items() if v.lower() == position_label.lower()]
 #     if not position_code:
@@ -150,68 +197,62 @@ def calculate_smart_score(p, fixtures, team_lookup):
 
 #     return sorted(filtered_players, key=lambda x: x["predicted_points_per_90"], reverse=True)[:top_n]
 
-def enrich_player_with_prediction(player, fixtures, team_lookup):
-    try:
-        minutes = player.get("minutes", 0)
-        if minutes < 270:  # Require 3+ full matches for validity
-            return None
-
-        upcoming_fixtures = get_upcoming_fixtures(player["team"], fixtures, team_lookup, limit=3)
-
-        fixture_difficulty = np.mean([f[1] for f in upcoming_fixtures]) if upcoming_fixtures else 3
-        opponent_strength = upcoming_fixtures[0][1] if upcoming_fixtures else 3
-
-        player_input = {
-            "minutes": minutes,
-            "goals_scored": player.get("goals_scored", 0),
-            "assists": player.get("assists", 0),
-            "clean_sheets": player.get("clean_sheets", 0),
-            "ict_index": player.get("ict_index", 0.0),
-            "influence": player.get("influence", 0.0),
-            "creativity": player.get("creativity", 0.0),
-            "threat": player.get("threat", 0.0),
-            "form": float(player.get("form", 0.0)),
-            "fixture_difficulty": fixture_difficulty,
-            "opponent_strength": opponent_strength,
-            "team_form": float(player.get("form", 0.0)),  # Placeholder
-            "price": player.get("now_cost", 0) / 10.0,
-            "transfers_in_gw": player.get("transfers_in_event", 0),
-            "transfers_out_gw": player.get("transfers_out_event", 0),
-            "yellow_cards": player.get("yellow_cards", 0),
-            "red_cards": player.get("red_cards", 0),
-            "bonus": player.get("bonus", 0)
-        }
-
-        predicted_score = get_prediction(player_input)
-        player["predicted_points"] = predicted_score
-        player["predicted_points_per_90"] = round((predicted_score * 90) / minutes, 2)
+@timed()
+def enrich_players_from_store(players, store, fixture_index, spread=False):
+    """Predict `players` in one model call from the materialized features (see feature_store.py); returns those predicted.
 
-        player["fixture_info"] = ', '.join([f"vs {f[0]} (D{f[1]})" for f in upcoming_fixtures]) or "N/A"
+    With spread=True the forest's per-tree distribution is evaluated in the same
+    pass and players also get predicted_floor / predicted_ceiling / predicted_std.
+    """
+    rows = store.rows([p["id"] for p in players])
+    try:
+        keep = store.eligible_for(model_features())[rows]
+    except MissingFeaturesError as e:
+        print(f"⚠️ Not serving predictions: {e}")
+        return []
+    # Annotated copies – the snapshot's players are shared by every tab and request
+    eligible = [dict(p) for p, ok in zip(players, keep.tolist()) if ok]
 
-        return player
+    try:
+        if spread:
+            distribution = predict_store_distribution(store, rows[keep])
+            predictions = distribution.mean
+        else:
+            predictions = predict_store_rows(store, rows[keep])
     except Exception as e:
-        print(f"⚠️ Prediction failed for {player.get('web_name')}: {e}")
-        return None
+        print(f"⚠️ Batch prediction failed for {len(eligible)} players: {e}")
+        return []
+
+    if spread:
+        floors = distribution.quantile(FLOOR_QUANTILE).tolist()
+        ceilings = distribution.quantile(CEILING_QUANTILE).tolist()
+        for player, floor, ceiling, std in zip(eligible, floors, ceilings, distribution.std.tolist()):
+            player["predicted_floor"] = floor
+            player["predicted_ceiling"] = ceiling
+            player["predicted_std"] = std
+
+    for player, predicted_score in zip(eligible, predictions):
+        player["predicted_points"] = predicted_score
+        player["predicted_points_per_90"] = round((predicted_score * 90) / player["minutes"], 2)
+        player["fixture_info"] = format_fixture_info(player, fixture_index)
+    return eligible
 
 
-def get_top_picks_by_position(position_label, top_n=5):
+@timed()
+def get_top_picks_by_position(position_label, top_n=5, snapshot=None, rank_by="per_90"):
+    """Best predicted players in a position, ranked by one of RANKINGS (floor/ceiling use the forest's spread)."""
+    field = RANKINGS[rank_by]
     position_code = [k for k, v in POSITION_MAP.items() if v.lower() == position_label.lower()]
     if not position_code:
         return []
 
     code = position_code[0]
-    data = fetch_data()
-    fixtures = fetch_fixtures()
-    team_lookup = {t['id']: t['name'] for t in data['teams']}
-    players = [p for p in data['elements'] if p['element_type'] == code]
-    players = enrich_players(players, data['teams'])
+    snapshot = snapshot or get_snapshot()
+    players = snapshot.players_by_position.get(code, ())
 
-    filtered_players = []
-    for p in players:
-        print(f"{p['web_name']}: Predicted Points = {p.get('predicted_points')}, Per 90 = {p.get('predicted_points_per_90')}, Minutes = {p.get('minutes')}")
-        enriched = enrich_player_with_prediction(p, fixtures, team_lookup)
-        if enriched:
-            filtered_players.append(enriched)
+    # Features were materialized once for this data refresh
+    store = get_feature_store(snapshot)
+    filtered_players = enrich_players_from_store(players, store, snapshot.fixture_index, spread=rank_by in ("floor", "ceiling"))
 
 
     # filtered_players = []
@@ -269,41 +310,49 @@ def get_top_picks_by_position(position_label, top_n=5):
     # return sorted(filtered_players, key=lambda x: x["weighted_score"], reverse=True)[:top_n]
     # return sorted(filtered_players, key=lambda x: x.get("predicted_points_per_90", 0), reverse=True)[:top_n]
     # return sorted(filtered_players, key=lambda x: x.get("predicted_points", 0), reverse=True)[:top_n]
-    return sorted(filtered_players, key=lambda x: x["predicted_points_per_90"], reverse=True)[:top_n]
+    return sorted(filtered_players, key=lambda x: x[field], reverse=True)[:top_n]
 
 
 
-def get_captain_picks(top_n=3):
-    data = fetch_data()
-    fixtures = fetch_fixtures()
-    team_lookup = {t['id']: t['name'] for t in data['teams']}
-    players = [p for p in data['elements'] if p['element_type'] in POSITION_MAP]
-    players = enrich_players(players, data['teams'])
+@timed()
+def get_captain_picks(top_n=3, snapshot=None, rank_by="smart_score"):
+    """Captain candidates by smart score, or by predicted points / floor / ceiling (see RANKINGS)."""
+    snapshot = snapshot or get_snapshot()
+    players = [p for p in apply_smart_scores(snapshot) if p['element_type'] in POSITION_MAP]
 
-    for p in players:
-        p['smart_score'] = calculate_smart_score(p, fixtures, team_lookup)
+    if rank_by == "smart_score":
+        field = "smart_score"
+    else:
+        # Safe captains have a high floor, differential ones a high ceiling
+        field = RANKINGS[rank_by]
+        store = get_feature_store(snapshot)
+        players = enrich_players_from_store(players, store, snapshot.fixture_index, spread=rank_by in ("floor", "ceiling"))
 
-    return sorted(players, key=lambda x: x['smart_score'], reverse=True)[:top_n]
+    top_players = sorted(players, key=lambda x: x[field], reverse=True)[:top_n]
+    return attach_fixture_info(top_players, snapshot.fixture_index)
 
-def get_top_raw_player_by_position(position_label, players=None):
+@timed()
+def get_top_raw_player_by_position(position_label, players=None, snapshot=None):
     code = [k for k, v in POSITION_MAP.items() if v.lower() == position_label.lower()]
     if not code:
         return []
     code = code[0]
-    if not players:
-        players = get_all_players()
-    top_players = [p for p in players if p['element_type'] == code]
-    return sorted(top_players, key=lambda x: x.get('total_points', 0), reverse=True)[:3]
-
-def get_top_managers():
-    data = fetch_data()
-    elements = data["elements"]
-    teams = data["teams"]
-    team_points = defaultdict(int)
-    for player in elements:
-        team_points[player["team"]] += player.get("total_points", 0)
-    top_teams = sorted(team_points.items(), key=lambda x: x[1], reverse=True)[:3]
-    return [{"manager_name": next(t["name"] for t in teams if t["id"] == tid), "points": pts} for tid, pts in top_teams]
+    if players:
+        top_players = [p for p in players if p['element_type'] == code]
+        return sorted(top_players, key=lambda x: x.get('total_points', 0), reverse=True)[:3]
+
+    snapshot = snapshot or get_snapshot()
+    table = snapshot.table
+    rows = table.index[table["element_type"] == code]
+    top_rows = table.loc[rows, "total_points"].sort_values(ascending=False, kind="stable").index[:3]
+    return [snapshot.players[i] for i in top_rows]
+
+@timed()
+def get_top_managers(snapshot=None):
+    snapshot = snapshot or get_snapshot()
+    team_points = snapshot.table.groupby("team", sort=False)["total_points"].sum()
+    top_teams = team_points.sort_values(ascending=False, kind="stable").head(3)
+    return [{"manager_name": snapshot.team_names[tid], "points": int(pts)} for tid, pts in top_teams.items()]
 
 
 # AI
@@ -402,35 +451,66 @@ def get_top_managers():
 
 #     return model.predict(df)[0]
 
-def get_prediction(player_features: dict) -> float:
-    expected_features = [
-        "minutes", "goals_scored", "assists", "clean_sheets",
-        "ict_index", "influence", "creativity", "threat", "form"
-    ]
+def model_features():
+    """Feature order the loaded model expects."""
+    return list(getattr(get_model(), "feature_names_in_", PREDICTION_FEATURES))
+
+def build_feature_matrix(rows, features):
+    """(n_rows, n_features) float matrix; numeric strings are parsed, anything else becomes 0."""
+    # Season totals can't stand in for the history models' trailing averages
+    missing = [f for f in features if f in MODEL_FEATURES and not any(f in r for r in rows)]
+    if missing:
+        raise MissingFeaturesError(f"Prediction inputs have no {missing} – serve history-trained models from the feature store")
+    frame = pd.DataFrame({f: [r.get(f, 0) for r in rows] for f in features})
+    return frame.apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=float)
+
+def _predict_matrix(build_matrix, snapshot_version=None, quantiles=None):
+    """Memoized predictions, all from one (model, version) pair.
+
+    With `quantiles` each row is the model's packed distribution: mean, variance, then the quantiles.
+    """
+    model, version = get_model_with_version()
+    if snapshot_version is not None:
+        # Store rows were materialized from this snapshot – older entries describe other players' features
+        prediction_cache.set_snapshot_version(snapshot_version)
+    features = list(getattr(model, "feature_names_in_", PREDICTION_FEATURES))
+    X = build_matrix(features)
+    # Memoized per (model version, feature vector) – see prediction_cache.py
+    if quantiles is None:
+        return prediction_cache.predict(X, version, lambda X_missing: model.predict(pd.DataFrame(X_missing, columns=features)))
+
+    def distribution(X_missing):
+        dist = predict_distribution(model, pd.DataFrame(X_missing, columns=features), quantiles)
+        return np.column_stack([dist.mean, dist.variance, dist.quantiles])
+
+    return prediction_cache.predict(X, version, distribution, namespace=repr(quantiles).encode())
+
+@timed()
+def predict_many(rows):
+    """Predict points for many feature dicts with a single model call. Returns an array aligned with `rows`."""
+    if len(rows) == 0:
+        return np.empty(0)
+    return _predict_matrix(lambda features: build_feature_matrix(rows, features))
+
+@timed()
+def predict_store_rows(store, rows):
+    """Predict points for rows of a FeatureStore with a single model call."""
+    if len(rows) == 0:
+        return np.empty(0)
+    return _predict_matrix(lambda features: store.matrix_for(features, rows), store.snapshot_version)
+
+@timed()
+def predict_store_distribution(store, rows, quantiles=DEFAULT_QUANTILES):
+    """Mean, variance and quantiles of the prediction for rows of a FeatureStore, all trees in one pass."""
+    levels = tuple(quantiles)
+    if len(rows) == 0:
+        return predict_distribution(None, [], levels)
+    packed = _predict_matrix(lambda features: store.matrix_for(features, rows), store.snapshot_version, levels)
+    return PredictionDistribution(packed[:, 0], packed[:, 1], np.ascontiguousarray(packed[:, 2:]), levels)
 
+def get_prediction(player_features: dict) -> float:
     try:
-        input_data = {}
-        for f in expected_features:
-            val = player_features.get(f, 0)
-            if isinstance(val, str):
-                try:
-                    val = float(val)
-                except ValueError:
-                    print(f"⚠️ Cannot convert feature '{f}' with value '{val}' to float")
-                    val = 0
-            input_data[f] = val
-
-        df = pd.DataFrame([input_data])
-        prediction = model.predict(df)[0]
-        return prediction
-
+        return predict_many([player_features])[0]
     except Exception as e:
         print(f"Prediction error for input {player_features.get('web_name', 'Unknown')}: {e}")
         return None
-
-
-
-
-
-
-
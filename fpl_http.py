@@ -0,0 +1,253 @@
+# fpl_http.py
+# Single entry point for every HTTP call to the FPL API.
+#
+# FPL_HTTP_MODE selects how requests are served:
+#   live    – go to the network (default)
+#   record  – go to the network and save each response to the cassette
+#   replay  – never touch the network; serve responses from the cassette
+#
+# A cassette is a directory (FPL_CASSETTE, default cassettes/fpl) holding a
+# versioned manifest plus one body + metadata file per URL, so benchmarks and
+# profiling runs can be repeated offline against identical data.
+#
+# Live requests share one pooled keep-alive Session per process with gzip,
+# default timeouts, retry/backoff on 429/5xx and a cap on concurrent requests
+# per host, so hundreds of back-to-back calls reuse a handful of connections
+# and a hung socket can't stall a Streamlit render.
+#
+#   FPL_HTTP_MODE=record python fetch_gw_history.py
+#   FPL_HTTP_MODE=replay streamlit run ff_ai_assistant_full.py
+#   python fpl_http.py serve 8765   # same cassette over HTTP (FPL_API_BASE=http://127.0.0.1:8765/api)
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+CASSETTE_VERSION = 1
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+_mode = os.environ.get("FPL_HTTP_MODE", "live")
+_cassette_dir = os.environ.get("FPL_CASSETTE", os.path.join("cassettes", "fpl"))
+_record_lock = threading.Lock()
+
+# (connect, read) seconds – applied whenever a caller doesn't pass its own timeout
+DEFAULT_TIMEOUT = (3.05, float(os.environ.get("FPL_HTTP_TIMEOUT", 20)))
+MAX_PER_HOST = int(os.environ.get("FPL_HTTP_MAX_PER_HOST", 8))
+RETRY_TOTAL = int(os.environ.get("FPL_HTTP_RETRIES", 3))
+
+_sessions = {}
+_host_slots = {}
+_pool_lock = threading.Lock()
+
+
+class CassetteMiss(requests.RequestException):
+    """Replay mode was asked for a URL that was never recorded."""
+
+
+def set_mode(mode, cassette_dir=None):
+    global _mode, _cassette_dir
+    if mode not in ("live", "record", "replay"):
+        raise ValueError(f"Unknown FPL_HTTP_MODE '{mode}'")
+    _mode = mode
+    if cassette_dir:
+        _cassette_dir = cassette_dir
+
+
+def get_mode():
+    return _mode
+
+
+def _key(url):
+    # Keyed on path + query only, so a cassette recorded against one host replays against any FPL_API_BASE
+    parts = urlsplit(url)
+    return hashlib.sha1(f"{parts.path}?{parts.query}".encode("utf-8")).hexdigest()
+
+
+class ReplayResponse:
+    """Stand-in for requests.Response built from a cassette entry."""
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error (replayed) for url: {self.url}", response=self)
+
+
+def _check_manifest(cassette_dir):
+    try:
+        with open(os.path.join(cassette_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            version = json.load(f).get("version")
+    except (OSError, ValueError):
+        raise CassetteMiss(f"No cassette found at {cassette_dir}")
+    if version != CASSETTE_VERSION:
+        raise CassetteMiss(f"Cassette {cassette_dir} is version {version}, expected {CASSETTE_VERSION}")
+
+
+def _replay(url, headers):
+    _check_manifest(_cassette_dir)
+    base = os.path.join(_cassette_dir, _key(url))
+    try:
+        with open(base + ".meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(base + ".body", "rb") as f:
+            content = f.read()
+    except OSError:
+        raise CassetteMiss(f"{url} is not in cassette {_cassette_dir}")
+    # Cassettes recorded before body_sha256 existed aren't checked
+    digest = meta.get("body_sha256")
+    if digest is not None and digest != hashlib.sha256(content).hexdigest():
+        raise CassetteMiss(f"{url} was recorded incompletely in cassette {_cassette_dir} – record it again")
+
+    # Honour revalidation the way the live API would
+    etag = meta["headers"].get("ETag")
+    if etag and headers and headers.get("If-None-Match") == etag:
+        return ReplayResponse(url, 304, meta["headers"], b"")
+    return ReplayResponse(url, meta["status"], meta["headers"], content)
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def record_response(url, content, status=200, headers=None, cassette_dir=None):
+    """Store one response in a cassette (also used to write synthetic cassettes).
+
+    429 / 5xx responses are not recorded – a transient failure must not become
+    permanent on replay.
+    """
+    if status >= 500 or status == 429:
+        return
+    cassette_dir = cassette_dir or _cassette_dir
+    headers = headers or {}
+    meta = {
+        "url": url,
+        "status": status,
+        "headers": {h: headers[h] for h in RECORDED_HEADERS if h in headers},
+        "body_sha256": hashlib.sha256(content).hexdigest(),
+    }
+    base = os.path.join(cassette_dir, _key(url))
+    with _record_lock:
+        os.makedirs(cassette_dir, exist_ok=True)
+        manifest = os.path.join(cassette_dir, "manifest.json")
+        if not os.path.exists(manifest):
+            _write_atomic(manifest, json.dumps({
+                "version": CASSETTE_VERSION,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }).encode("utf-8"))
+        # Body first, meta last: _replay checks the body against the meta's hash
+        _write_atomic(base + ".body", content)
+        _write_atomic(base + ".meta.json", json.dumps(meta).encode("utf-8"))
+
+
+def _record(url, res):
+    record_response(url, res.content, res.status_code, res.headers)
+
+
+def _build_session(retry):
+    session = requests.Session()
+    retries = Retry(
+        total=RETRY_TOTAL if retry else 0,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_PER_HOST, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "ff-ai-assistant"})
+    return session
+
+
+def get_session(retry=True):
+    """Shared pooled Session. Callers doing their own retries (gw_crawler) pass retry=False."""
+    with _pool_lock:
+        if retry not in _sessions:
+            _sessions[retry] = _build_session(retry)
+        return _sessions[retry]
+
+
+def _host_slot(url):
+    host = urlsplit(url).netloc
+    with _pool_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return _host_slots[host]
+
+
+def get(url, headers=None, timeout=None, retry=True):
+    """GET `url` according to the current mode. Returns a requests.Response or ReplayResponse."""
+    if _mode == "replay":
+        return _replay(url, headers)
+
+    if _mode == "record" and headers:
+        # Always record full bodies, never an empty 304
+        headers = {k: v for k, v in headers.items() if k not in ("If-None-Match", "If-Modified-Since")}
+    with _host_slot(url):
+        res = get_session(retry).get(url, headers=headers, timeout=timeout or DEFAULT_TIMEOUT)
+    if _mode == "record":
+        _record(url, res)
+    return res
+
+
+def serve_cassette(port=8765, cassette_dir=None):
+    """Serve the cassette over HTTP so tools that take FPL_API_BASE can run offline."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    set_mode("replay", cassette_dir)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                res = _replay(self.path, self.headers)
+            except CassetteMiss:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(res.status_code)
+            for k, v in res.headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(res.content)))
+            self.end_headers()
+            self.wfile.write(res.content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"▶️ Replaying {_cassette_dir} on http://127.0.0.1:{server.server_port}/api")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "serve":
+        serve_cassette(int(sys.argv[2]) if len(sys.argv) > 2 else 8765)
+    else:
+        print("usage: python fpl_http.py serve [port]")
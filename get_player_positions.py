@@ -1,9 +1,10 @@
-import requests
 import pandas as pd
 
+import fpl_http
+
 # Step 1: Download data from the FPL API
 bootstrap_url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-response = requests.get(bootstrap_url)
+response = fpl_http.get(bootstrap_url)
 data = response.json()
 
 # Step 2: Extract player info and map element_type to position
@@ -0,0 +1,159 @@
+# gw_crawler.py
+# Bounded-concurrency crawler for element-summary/{id}.
+#
+# Requests are spread over a thread pool and paced by a token bucket, so a
+# full rebuild runs at the configured request rate instead of being serialized
+# on latency + sleep. Transient failures (429/5xx, connection errors) are
+# retried with jittered exponential backoff, and every finished player is
+# appended to a checkpoint file so an interrupted crawl resumes where it
+# stopped. The checkpoint's first line records the run it belongs to (caller's
+# run_key) and when it started; a checkpoint from another run or older than
+# FPL_CRAWL_CHECKPOINT_MAX_AGE seconds is discarded instead of resumed. Point
+# FPL_API_BASE at a local stub server to exercise it offline.
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import fpl_http
+
+API_BASE = os.environ.get("FPL_API_BASE", "https://fantasy.premierleague.com/api").rstrip("/")
+CRAWL_RATE = float(os.environ.get("FPL_CRAWL_RATE", 10))      # requests per second
+CRAWL_WORKERS = int(os.environ.get("FPL_CRAWL_WORKERS", 8))
+CHECKPOINT_PATH = "gw_crawl_checkpoint.jsonl"
+CHECKPOINT_MAX_AGE = float(os.environ.get("FPL_CRAWL_CHECKPOINT_MAX_AGE", 6 * 3600))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def fetch_history(player_id, bucket, base_url=API_BASE, retries=4, backoff=0.5, timeout=10):
+    """Fetch one player's `history` list, retrying transient failures. Non-retryable statuses give []."""
+    url = f"{base_url}/element-summary/{player_id}/"
+    for attempt in range(retries + 1):
+        bucket.acquire()
+        try:
+            # Retries are handled here so they stay behind the token bucket
+            res = fpl_http.get(url, timeout=timeout, retry=False)
+            if res.status_code in RETRY_STATUSES:
+                raise RetryableError(f"HTTP {res.status_code}", res.headers.get("Retry-After"))
+            if res.status_code != 200:
+                return []
+            return res.json()["history"]
+        except (requests.ConnectionError, requests.Timeout, RetryableError) as e:
+            if attempt == retries:
+                raise
+            # Full jitter, but never retry sooner than the server asked us to
+            delay = random.uniform(0, backoff * 2 ** attempt)
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+
+
+def load_checkpoint(path, run_key=None, max_age=CHECKPOINT_MAX_AGE):
+    """{player_id: history} from `path`, or None when it belongs to another run or is older than `max_age`."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = {}
+        if not isinstance(header, dict) or "run_key" not in header:
+            return None  # no header: written by an older version
+        if header["run_key"] != run_key or time.time() - header.get("started_at", 0) > max_age:
+            return None
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # half-written last line from an interrupted run
+            done[row["player_id"]] = row["history"]
+    return done
+
+
+def _ends_mid_line(path):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def crawl_histories(player_ids, base_url=API_BASE, rate=CRAWL_RATE, max_workers=CRAWL_WORKERS,
+                    checkpoint_path=CHECKPOINT_PATH, retries=4, run_key=None, max_age=CHECKPOINT_MAX_AGE):
+    """Return {player_id: history} for every id, resuming from `checkpoint_path` if it belongs to `run_key`."""
+    histories = {}
+    if checkpoint_path:
+        histories = load_checkpoint(checkpoint_path, run_key, max_age)
+        if histories is None:
+            print(f"🗑️ Discarding {checkpoint_path}: it belongs to another run or is older than {max_age / 3600:g}h")
+            os.remove(checkpoint_path)
+            histories = {}
+    pending = [pid for pid in player_ids if pid not in histories]
+    if histories:
+        print(f"↩️ Resuming crawl: {len(histories)} players already fetched, {len(pending)} to go")
+
+    bucket = TokenBucket(rate)
+    checkpoint = None
+    if checkpoint_path:
+        new_file = not os.path.exists(checkpoint_path)
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+        if new_file:
+            checkpoint.write(json.dumps({"run_key": run_key, "started_at": time.time()}) + "\n")
+            checkpoint.flush()
+        elif _ends_mid_line(checkpoint_path):
+            checkpoint.write("\n")
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_history, pid, bucket, base_url, retries): pid for pid in pending}
+            for future in as_completed(futures):
+                pid = futures[future]
+                try:
+                    history = future.result()
+                except Exception as e:
+                    print(f"Error fetching history for player {pid}: {e}")
+                    continue
+                histories[pid] = history
+                if checkpoint:
+                    checkpoint.write(json.dumps({"player_id": pid, "history": history}) + "\n")
+                    checkpoint.flush()
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    return histories
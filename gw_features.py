@@ -0,0 +1,164 @@
+# gw_features.py
+# Per-match model features, derived by the same code for training and live prediction.
+#
+# Input is a table of player matches (history store rows, fetch_gw_history.py
+# output, the current season's gw_store). The table is sorted once by season /
+# player / gameweek; every windowed feature is then a difference of cumulative
+# sums over the whole table, with no per-player Python loop. A row's model
+# features only use what was known before its kickoff:
+#   <stat>_avg          mean of the player's previous FORM_WINDOW matches, for
+#                       each of TRAILING_STATS (total_points_avg is form)
+#   was_home            the fixture's venue
+# Team strength is left out: team ids are reassigned every season and the
+# history has no per-season ratings, so fixture_difficulty is only the home /
+# away adjustment around DEFAULT_DIFFICULTY (as in the season CSVs).
+# build_next_gameweek appends each player's upcoming fixture as a pending row
+# and runs the same pass, so served features are computed exactly like the
+# training rows'.
+import numpy as np
+import pandas as pd
+
+from fixture_index import schedule_order
+from gw_store import FORM_WINDOW
+
+DEFAULT_DIFFICULTY = 3
+HOME_ADVANTAGE = 0.5
+
+# Per-match stats whose previous-window means are model features
+TRAILING_STATS = [
+    "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat", "total_points",
+]
+
+# Features of models trained on the history (train_gw_model.py, train_search.py, retrain_gw_model.py)
+MODEL_FEATURES = [f"{stat}_avg" for stat in TRAILING_STATS] + ["was_home"]
+
+
+def home_away_difficulty(was_home):
+    """fixture_difficulty of the enriched CSVs: DEFAULT_DIFFICULTY -/+ HOME_ADVANTAGE at home / away."""
+    return np.where(np.asarray(was_home, dtype=bool), DEFAULT_DIFFICULTY - HOME_ADVANTAGE, DEFAULT_DIFFICULTY + HOME_ADVANTAGE)
+
+
+def _group_positions(keys):
+    """Position of every row within its run of equal keys (keys already sorted)."""
+    n = len(keys[0])
+    new_group = np.ones(n, dtype=bool)
+    if n:
+        new_group[1:] = np.logical_or.reduce([k[1:] != k[:-1] for k in keys])
+    starts = np.flatnonzero(new_group)
+    sizes = np.diff(np.append(starts, n))
+    return np.arange(n) - np.repeat(starts, sizes)
+
+
+def previous_mean(values, position, window=FORM_WINDOW):
+    """Mean of the previous `window` values in the same group (0 where there are none)."""
+    values = np.asarray(values)
+    csum = np.zeros(len(values) + 1, dtype=np.int64 if values.dtype.kind in "biu" else np.float64)
+    np.cumsum(values, out=csum[1:])
+    count = np.minimum(position, window)
+    idx = np.arange(len(values))
+    total = csum[idx] - csum[idx - count]
+    return np.where(count > 0, total / np.maximum(count, 1), 0.0)
+
+
+def derive_features(matches, recent_points=None):
+    """Add form, fixture_difficulty, MODEL_FEATURES and matches_before to a table of player matches.
+
+    `matches` needs player_id, gw, opponent_team, was_home, total_points (NaN
+    for pending, not yet played rows) and TRAILING_STATS; season is optional.
+    Rows keep their input order within a gameweek (double gameweeks).
+    `recent_points` ({player_id: [points, ...]}) continues the form window from
+    an earlier ingest. Returns a copy sorted by season / player / gameweek.
+    """
+    df = matches.reset_index(drop=True)
+    seeds = None
+    if recent_points:
+        # Earlier matches as seed rows sorted ahead of the new ones, dropped afterwards
+        pids = [pid for pid, pts in recent_points.items() for _ in list(pts)[-FORM_WINDOW:]]
+        pts = [p for _, points in recent_points.items() for p in list(points)[-FORM_WINDOW:]]
+        seeds = pd.DataFrame({"player_id": pids, "total_points": pts, "gw": np.iinfo(np.int16).min,
+                              "opponent_team": 0, "was_home": False})
+        if "season" in df.columns:
+            first_season = df.groupby("player_id", sort=False)["season"].first()
+            seeds["season"] = seeds["player_id"].map(first_season)
+            seeds = seeds.dropna(subset=["season"])
+        df = pd.concat([seeds.assign(_seed=True), df.assign(_seed=False)], ignore_index=True)
+
+    season = pd.factorize(df["season"].astype(str), sort=True)[0] if "season" in df.columns else np.zeros(len(df), dtype=np.int64)
+    player = df["player_id"].to_numpy(dtype=np.int64)
+    gw = df["gw"].to_numpy(dtype=np.int64)
+    order = np.lexsort((gw, player, season))  # stable: input order kept within a gameweek
+    df = df.iloc[order].reset_index(drop=True)
+    position = _group_positions([season[order], player[order]])
+    # Matches before each row in this input (seed rows only extend the points window)
+    own_position = position
+    if seeds is not None:
+        n_seeds = df["_seed"].groupby([season[order], player[order]]).transform("sum").to_numpy()
+        own_position = np.maximum(position - n_seeds, 0)
+
+    # Pending rows come last in their group, so they never feed anyone's window
+    averages = {}
+    for stat in TRAILING_STATS:
+        values = pd.to_numeric(df[stat], errors="coerce") if stat in df.columns else pd.Series(0.0, index=df.index)
+        window = position if stat == "total_points" else own_position
+        averages[f"{stat}_avg"] = previous_mean(values.fillna(0).to_numpy(), window)
+
+    home = df["was_home"].to_numpy(dtype=bool)
+    df["form"] = averages["total_points_avg"]
+    df["fixture_difficulty"] = home_away_difficulty(home)
+    for feature, values in averages.items():
+        df[feature] = values
+    df["was_home"] = home
+    df["matches_before"] = own_position
+
+    if seeds is not None:
+        df = df[~df["_seed"].to_numpy()].drop(columns="_seed").reset_index(drop=True)
+        # Seed rows had no values for the other input columns
+        derived = {"form", "fixture_difficulty", "matches_before", *MODEL_FEATURES}
+        df = df.astype({c: t for c, t in matches.dtypes.items() if c not in derived})
+    return df
+
+
+def build_training_set(history):
+    """Model-ready rows (MODEL_FEATURES + total_points) from played matches.
+
+    A season's first match per player has no previous window and is dropped,
+    like players without history are at prediction time.
+    """
+    played = history[history["minutes"] > 0]
+    df = derive_features(played)
+    return df[df["matches_before"] > 0].reset_index(drop=True)
+
+
+def build_next_gameweek(history, upcoming):
+    """One feature row per player in `upcoming` (player_id, opponent_team, was_home) for their next match.
+
+    `history` is the current season's played matches; a player's pending row is
+    placed after their latest one, so form and the expected match stats come
+    from the same window the training rows use. matches_before is 0 for
+    players without any history.
+    """
+    played = history[history["minutes"] > 0]
+    last_gw = played.groupby("player_id")["gw"].max()
+    pending = upcoming.assign(
+        gw=upcoming["player_id"].map(last_gw).fillna(0).astype(np.int64) + 1,
+        total_points=np.nan,
+        minutes=np.nan,
+    )
+    if "season" in played.columns and len(played):
+        pending["season"] = played["season"].iloc[-1]
+        played = played[played["season"] == pending["season"].iloc[0]]
+    played = played[played["player_id"].isin(upcoming["player_id"])]
+    rows = derive_features(pd.concat([played, pending], ignore_index=True))
+    return rows[rows["total_points"].isna()].set_index("player_id")
+
+
+def next_opponents(fixtures):
+    """{team_id: (opponent_id, was_home)} for each team's next unfinished fixture in schedule order."""
+    upcoming = {}
+    for f in sorted(fixtures, key=schedule_order):
+        if f["finished"]:
+            continue
+        upcoming.setdefault(f["team_h"], (f["team_a"], True))
+        upcoming.setdefault(f["team_a"], (f["team_h"], False))
+    return upcoming
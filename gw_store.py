@@ -0,0 +1,72 @@
+# gw_store.py
+# Append-friendly columnar store for per-gameweek player rows.
+#
+# Each ingest writes one immutable Parquet part file, so a weekly refresh only
+# writes that week's rows. state.json remembers, per player, the last ingested
+# round and the points needed to continue the rolling `form` window.
+import glob
+import json
+import os
+
+import pandas as pd
+
+STORE_DIR = "fpl_gw_store"
+STATE_FILE = "state.json"
+FORM_WINDOW = 3
+
+
+def _part_paths(store_dir):
+    return sorted(glob.glob(os.path.join(store_dir, "part-*.parquet")))
+
+
+def append_part(df, store_dir=STORE_DIR):
+    """Write `df` as the next part file and return its path (nothing is written for an empty frame)."""
+    if df.empty:
+        return None
+    os.makedirs(store_dir, exist_ok=True)
+    parts = _part_paths(store_dir)
+    next_idx = int(os.path.basename(parts[-1])[5:10]) + 1 if parts else 0
+    path = os.path.join(store_dir, f"part-{next_idx:05d}.parquet")
+    df.to_parquet(path, index=False)
+    return path
+
+
+def read_store(store_dir=STORE_DIR, columns=None):
+    """Concatenate every part (oldest first), optionally reading only `columns`."""
+    parts = _part_paths(store_dir)
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([pd.read_parquet(p, columns=columns) for p in parts], ignore_index=True)
+
+
+def store_version(store_dir=STORE_DIR):
+    """Identifies the store's current contents (part names and sizes); None when it is empty."""
+    parts = _part_paths(store_dir)
+    if not parts:
+        return None
+    return ",".join(f"{os.path.basename(p)}:{os.path.getsize(p)}" for p in parts)
+
+
+def clear_store(store_dir=STORE_DIR):
+    for p in _part_paths(store_dir):
+        os.remove(p)
+    state_path = os.path.join(store_dir, STATE_FILE)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+
+def load_state(store_dir=STORE_DIR):
+    """{player_id: {"last_round": int, "recent_points": [..]}} from the last ingest."""
+    try:
+        with open(os.path.join(store_dir, STATE_FILE), "r", encoding="utf-8") as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, store_dir=STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({str(k): v for k, v in state.items()}, f)
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,292 @@
+# history_store.py
+# Season-partitioned columnar store of every enriched gameweek row.
+#
+# The per-season fpl_gw_<yyyy>_<yy>_enriched.csv files are consolidated once
+# into one Parquet file per season with explicit dtypes (small ints, bool,
+# categorical names / teams / season) and identical rows dropped. Loaders read
+# only the requested seasons and columns, so training and the predictor tab
+# no longer re-parse ~100k rows of text on every run. meta.json records the
+# source files (the live fetch_gw_history.py output included); the store is
+# rebuilt automatically when any of them changes.
+#
+# Each build is written to its own build-<ns> directory and published by
+# atomically rewriting the CURRENT pointer, so readers always find a complete
+# store; the previous build is kept for readers that resolved it just before.
+#
+#   python history_store.py build                                  # season CSVs
+#   python history_store.py build --live fpl_gw_enriched.csv --live-season 2025/26
+#   python history_store.py info
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import time
+
+import pandas as pd
+
+SCHEMA_VERSION = 2
+HISTORY_DIR = os.environ.get("FPL_HISTORY_STORE", "fpl_history_store")
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+KEEP_BUILDS = 2  # the current build and the one before it
+SEASON_CSV_PATTERN = "fpl_gw_*_enriched.csv"
+_SEASON_CSV = re.compile(r"fpl_gw_(\d{4})_(\d{2})_enriched\.csv$")
+
+# Column -> dtype, in stored order
+HISTORY_DTYPES = {
+    "season": "category",
+    "player_id": "int32",
+    "web_name": "category",
+    "team": "category",
+    "gw": "int8",
+    "minutes": "int16",
+    "goals_scored": "int8",
+    "assists": "int8",
+    "clean_sheets": "int8",
+    "ict_index": "float64",
+    "influence": "float64",
+    "creativity": "float64",
+    "threat": "float64",
+    "opponent_team": "int16",
+    "was_home": "bool",
+    "fixture_difficulty": "float64",
+    "form": "float64",
+    "total_points": "int16",
+}
+HISTORY_COLUMNS = list(HISTORY_DTYPES)
+CATEGORICAL_COLUMNS = [c for c, dtype in HISTORY_DTYPES.items() if dtype == "category"]
+# One row per player per fixture (double gameweeks have two rows with the same gw)
+MATCH_KEY = ["season", "player_id", "gw", "opponent_team", "was_home"]
+# What was recorded for the match – not the name/team labels, nor form, which the
+# season CSVs derive per web_name and so differs for a player renamed mid-season
+MATCH_STATS = [c for c in HISTORY_COLUMNS if c not in ("web_name", "team", "form")]
+
+
+def season_file(season):
+    return f"season-{season.replace('/', '_')}.parquet"
+
+
+def season_csvs(source_dir="."):
+    """{season: path} for every fpl_gw_<yyyy>_<yy>_enriched.csv in `source_dir`."""
+    found = {}
+    for path in sorted(glob.glob(os.path.join(source_dir, SEASON_CSV_PATTERN))):
+        match = _SEASON_CSV.search(os.path.basename(path))
+        if match:
+            found[f"{match.group(1)}/{match.group(2)}"] = path
+    return found
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def current_dir(store_dir=None):
+    """Directory of the store's current build, or None before the first build."""
+    store_dir = store_dir or HISTORY_DIR
+    try:
+        with open(os.path.join(store_dir, CURRENT_FILE), encoding="utf-8") as f:
+            build = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(store_dir, build) if build else None
+
+
+def _publish(store_dir, build):
+    tmp = os.path.join(store_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(build)
+    os.replace(tmp, os.path.join(store_dir, CURRENT_FILE))
+
+
+def _prune(store_dir, keep):
+    builds = sorted((d for d in os.listdir(store_dir) if d.startswith("build-") and not d.endswith(".tmp")),
+                    reverse=True)
+    for build in [b for b in builds if b != keep][KEEP_BUILDS - 1:]:
+        shutil.rmtree(os.path.join(store_dir, build), ignore_errors=True)
+    # Stores built before CURRENT existed kept their files at the top level
+    for name in os.listdir(store_dir):
+        if name == META_FILE or (name.startswith("season-") and name.endswith(".parquet")):
+            os.remove(os.path.join(store_dir, name))
+
+
+def _typed(df):
+    df = df.copy()
+    df["team"] = df["team"].astype(str)
+    for column, dtype in HISTORY_DTYPES.items():
+        df[column] = df[column].astype(dtype)
+    return df[HISTORY_COLUMNS]
+
+
+def _read_source(path, season):
+    df = pd.read_csv(path)
+    if "season" not in df.columns:
+        df["season"] = season
+    missing = [c for c in HISTORY_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns {missing}")
+    return df
+
+
+def build_history_store(store_dir=None, source_dir=".", live=None, live_season=None):
+    """Consolidate the season CSVs (plus an optional live fetch_gw_history.py output) into the store."""
+    store_dir = store_dir or HISTORY_DIR
+    sources = season_csvs(source_dir)
+    if live and not live_season:
+        raise ValueError("--live needs --live-season")
+
+    frames = [_read_source(path, season) for season, path in sources.items()]
+    if live:
+        frames.append(_read_source(live, live_season))
+    if not frames:
+        raise FileNotFoundError(f"No {SEASON_CSV_PATTERN} files in {os.path.abspath(source_dir)}")
+    df = pd.concat(frames, ignore_index=True)
+
+    n_raw = len(df)
+    df = df.drop_duplicates(subset=HISTORY_COLUMNS)
+    n_identical = n_raw - len(df)
+    # The same match recorded twice with the same stats (a renamed player within a season CSV, or a live re-fetch)
+    df = df.drop_duplicates(subset=MATCH_STATS)
+    n_relabelled = n_raw - n_identical - len(df)
+    # Same match, different stats: there is no right copy to pick, so keep both and say so
+    conflicts = df[df.duplicated(subset=MATCH_KEY, keep=False)]
+    n_conflicting = int(conflicts.duplicated(subset=MATCH_KEY).sum())
+    if n_conflicting:
+        examples = conflicts.drop_duplicates(subset=MATCH_KEY)[MATCH_KEY].head(5).to_dict("records")
+        print(f"⚠️ {n_conflicting} matches are recorded more than once with different stats – all copies kept, "
+              f"e.g. {examples}")
+    df = _typed(df)
+
+    build = f"build-{time.time_ns()}"
+    tmp = os.path.join(store_dir, f"{build}.{os.getpid()}.tmp")
+    os.makedirs(tmp)
+    seasons = {}
+    for season, part in df.groupby("season", observed=True, sort=True):
+        part = part.reset_index(drop=True)
+        for column in CATEGORICAL_COLUMNS:
+            part[column] = part[column].cat.remove_unused_categories()
+        part.to_parquet(os.path.join(tmp, season_file(season)), index=False)
+        seasons[season] = len(part)
+    with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "schema_version": SCHEMA_VERSION,
+            "columns": HISTORY_COLUMNS,
+            "seasons": seasons,
+            "sources": [_source_stamp(p) for p in sources.values()],
+            "live": dict(_source_stamp(live), season=live_season) if live else None,
+            "duplicates_dropped": {"identical": n_identical, "relabelled": n_relabelled},
+            "conflicting_matches": n_conflicting,
+        }, f, indent=2)
+
+    os.rename(tmp, os.path.join(store_dir, build))
+    _publish(store_dir, build)
+    _prune(store_dir, build)
+    print(f"🗄️ History store: {len(df)} rows in {len(seasons)} seasons → {store_dir} "
+          f"({n_identical} identical and {n_relabelled} relabelled rows dropped, {n_conflicting} conflicting matches kept)")
+    return store_dir
+
+
+def _read_meta(build_dir):
+    if build_dir is None:
+        return None
+    try:
+        with open(os.path.join(build_dir, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("schema_version") == SCHEMA_VERSION else None
+
+
+def load_meta(store_dir=None):
+    return _read_meta(current_dir(store_dir))
+
+
+def is_stale(store_dir=None, source_dir="."):
+    """True when the store is missing or any season CSV, or the live file, was added, removed or changed since it was built.
+
+    A store shipped without its CSVs is used as is.
+    """
+    meta = load_meta(store_dir)
+    if meta is None:
+        return True
+    try:
+        current = [_source_stamp(p) for p in season_csvs(source_dir).values()]
+        if not current:
+            return False
+        live = meta.get("live")
+        if live and _source_stamp(live["path"]) != {k: live[k] for k in ("path", "size", "mtime_ns")}:
+            return True  # appended to by fetch_gw_history.py, or gone
+    except OSError:
+        return True
+    return current != meta["sources"]
+
+
+def ensure_history_store(store_dir=None, source_dir="."):
+    """Build (or rebuild) the store if its sources changed; keeps a previously included live file."""
+    store_dir = store_dir or HISTORY_DIR
+    if is_stale(store_dir, source_dir):
+        live = (load_meta(store_dir) or {}).get("live") or {}
+        build_history_store(store_dir, source_dir, live.get("path"), live.get("season"))
+    return store_dir
+
+
+def load_history(columns=None, seasons=None, store_dir=None):
+    """Gameweek rows from the store, reading only `columns` of `seasons` (default: all of both).
+
+    Categorical columns keep one set of categories across seasons.
+    """
+    # Resolved once, so a rebuild published meanwhile can't mix two builds
+    build_dir = current_dir(ensure_history_store(store_dir))
+    meta = _read_meta(build_dir)
+    available = list(meta["seasons"])
+    if seasons is None:
+        seasons = available
+    unknown = [s for s in seasons if s not in available]
+    if unknown:
+        raise KeyError(f"Seasons {unknown} not in the history store (have {available})")
+    if columns is not None:
+        missing = [c for c in columns if c not in HISTORY_DTYPES]
+        if missing:
+            raise KeyError(f"Columns {missing} not in the history store")
+        columns = list(columns)
+
+    frames = [pd.read_parquet(os.path.join(build_dir, season_file(s)), columns=columns) for s in seasons]
+    if not frames:
+        return pd.DataFrame({c: pd.Series(dtype=HISTORY_DTYPES[c]) for c in (columns or HISTORY_COLUMNS)})
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    for column in CATEGORICAL_COLUMNS:
+        # concat of categoricals with different categories falls back to object
+        if column in df.columns and df[column].dtype != "category":
+            df[column] = df[column].astype("category")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidated multi-season gameweek history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help=f"consolidate {SEASON_CSV_PATTERN} into the store")
+    build.add_argument("--source-dir", default=".")
+    build.add_argument("--live", help="also include this fetch_gw_history.py output (no season column)")
+    build.add_argument("--live-season", help="season of the --live rows, e.g. 2025/26")
+    build.add_argument("--store", default=None, help=f"store directory (default {HISTORY_DIR})")
+    info = sub.add_parser("info", help="rows per season")
+    info.add_argument("--store", default=None)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_history_store(args.store, args.source_dir, args.live, args.live_season)
+    else:
+        meta = load_meta(args.store)
+        if meta is None:
+            print("❌ No history store – run `python history_store.py build`")
+            return
+        for season, rows in meta["seasons"].items():
+            print(f"{season}: {rows} rows")
+        print(f"Duplicates dropped: {meta['duplicates_dropped']}")
+        print(f"Matches recorded with conflicting stats (kept): {meta.get('conflicting_matches', 0)}")
+
+
+if __name__ == "__main__":
+    main()
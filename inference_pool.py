@@ -0,0 +1,220 @@
+# inference_pool.py
+# Worker processes for CPU-bound model inference.
+#
+# Workers are started from a forkserver (spawn where that is unavailable), not
+# forked from the API process: by the time a pool is (re)started that process
+# runs the registry lock, the uvicorn threadpool and the event loop, and a fork
+# would copy their held locks into the child. Forests are exported once per
+# model version as .npy files (model_registry.pin_forest) that every worker
+# memory-maps read-only, so N workers share one copy of the node arrays through
+# the page cache; each only holds its per-batch working arrays. Workers always
+# walk the compiled arrays – there is no sklearn handover for huge batches, and
+# MAX_BATCH keeps batches below forest_eval's MAX_COMPILED_BATCH anyway. Other
+# models are loaded from the registry's pinned copy, one private copy per
+# worker (small for the linear models this serves). Concurrent
+# requests are queued (bounded – a full queue raises PoolBusy so the caller can
+# shed load) and a batcher coroutine merges whatever arrives within
+# FPL_INFERENCE_BATCH_WAIT_MS into one predict call of up to
+# FPL_INFERENCE_MAX_BATCH rows. When the registry reports a new model version
+# a new pool is started on a thread; the old one keeps serving until it is ready.
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from forest_eval import CompiledForest
+from model_registry import CHECK_INTERVAL, get_model_version, get_model_with_version, load_pinned_model, pin_forest
+
+INFERENCE_WORKERS = int(os.environ.get("FPL_INFERENCE_WORKERS", 0))  # 0 = predict in-process
+QUEUE_SIZE = int(os.environ.get("FPL_INFERENCE_QUEUE", 1024))  # pending requests before PoolBusy
+MAX_BATCH = int(os.environ.get("FPL_INFERENCE_MAX_BATCH", 2048))  # rows per predict call
+BATCH_WAIT = float(os.environ.get("FPL_INFERENCE_BATCH_WAIT_MS", 2)) / 1000
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Set by _init_worker in each worker process
+_worker_model = None
+_worker_features = None
+
+
+class PoolBusy(Exception):
+    """The request queue is full."""
+
+
+def _init_worker(version, features, forest_dir):
+    global _worker_model, _worker_features
+    model = CompiledForest.open_dir(forest_dir) if forest_dir else load_pinned_model(version)
+    _worker_model, _worker_features = model, features
+
+
+def _ready():
+    return os.getpid()
+
+
+def _predict_in_worker(X, features):
+    # Requests queued before a model swap carry the old column order
+    df = pd.DataFrame(X, columns=features)[_worker_features]
+    return np.asarray(_worker_model.predict(df), dtype=np.float64)
+
+
+def model_features(model, default):
+    return list(getattr(model, "feature_names_in_", default))
+
+
+class InferencePool:
+    def __init__(self, workers=INFERENCE_WORKERS, model_path=None, default_features=(),
+                 queue_size=QUEUE_SIZE, max_batch=MAX_BATCH, batch_wait=BATCH_WAIT):
+        self.workers = max(1, workers)
+        self.model_path = model_path
+        self.default_features = list(default_features)
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.version = None
+        self.features = None
+        self._executor = None
+        self._queue = None
+        self._slots = None
+        self._batcher = None
+        self._carry = None
+        self._refresh_lock = None
+        self._next_check = 0.0
+
+    def _start_workers(self):
+        """Start a pool serving the current model and wait until it answers (blocking)."""
+        model, version = get_model_with_version(self.model_path)
+        features = model_features(model, self.default_features)
+        forest_dir = pin_forest(model, version)
+        executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(START_METHOD),
+                                       initializer=_init_worker, initargs=(version, features, forest_dir))
+        try:
+            # Processes start on demand – one pending task per worker brings them all up
+            for future in [executor.submit(_ready) for _ in range(self.workers)]:
+                future.result()
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        return executor, version, features
+
+    def _start_if_stale(self, replace):
+        if not replace and get_model_version(self.model_path) == self.version:
+            return None
+        return self._start_workers()
+
+    async def _refresh(self, broken=None):
+        """Swap in a new pool if the model changed, or if `broken` is still the current one."""
+        async with self._refresh_lock:
+            if broken is not None and broken is not self._executor:
+                return  # already replaced while we waited
+            loop = asyncio.get_running_loop()
+            # Hashing, loading and starting processes all run on a thread; the old pool serves meanwhile
+            started = await loop.run_in_executor(None, self._start_if_stale, broken is not None)
+            if started is None:
+                return
+            old = self._executor
+            self._executor, self.version, self.features = started
+            if old is not None:
+                old.shutdown(wait=False)  # batches already running there still finish
+            print(f"🧵 {self.workers} inference workers serving model {self.version[:12]}")
+
+    async def _refresh_in_background(self):
+        try:
+            await self._refresh()
+        except Exception as e:
+            print(f"⚠️ Could not start inference workers for the new model, keeping {self.version[:12]}: {e}")
+
+    async def start(self):
+        self._refresh_lock = asyncio.Lock()
+        await self._refresh()
+        self._queue = asyncio.Queue(self.queue_size)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._next_check = asyncio.get_running_loop().time() + CHECK_INTERVAL
+        self._batcher = asyncio.create_task(self._run_batcher())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def predict(self, X, features, wait=False):
+        """Predictions for the rows of X, whose columns are `features` (normally self.features).
+
+        With a full queue this raises PoolBusy, or with wait=True blocks until there is room.
+        """
+        future = asyncio.get_running_loop().create_future()
+        item = (np.asarray(X, dtype=np.float64), tuple(features), future)
+        if wait:
+            await self._queue.put(item)
+        elif self._queue.full():
+            raise PoolBusy(f"{self.queue_size} inference requests already queued")
+        else:
+            self._queue.put_nowait(item)
+        return await future
+
+    async def _collect(self):
+        first, self._carry = self._carry or await self._queue.get(), None
+        batch = [first]
+        rows = len(first[0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while rows < self.max_batch:
+            if self._queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            if item[1] != first[1]:
+                self._carry = item  # different column order – starts the next batch
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            await self._slots.acquire()
+            if loop.time() >= self._next_check and not self._refresh_lock.locked():
+                self._next_check = loop.time() + CHECK_INTERVAL
+                asyncio.create_task(self._refresh_in_background())
+            asyncio.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        try:
+            X = np.concatenate([rows for rows, _, _ in batch]) if len(batch) > 1 else batch[0][0]
+            features = list(batch[0][1])
+            loop = asyncio.get_running_loop()
+            executor = self._executor
+            try:
+                predictions = await loop.run_in_executor(executor, _predict_in_worker, X, features)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed) – replace the pool once and retry
+                await self._refresh(broken=executor)
+                predictions = await loop.run_in_executor(self._executor, _predict_in_worker, X, features)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            start = 0
+            for rows, _, future in batch:
+                if not future.done():
+                    future.set_result(predictions[start:start + len(rows)])
+                start += len(rows)
+        finally:
+            self._slots.release()
@@ -1,11 +1,27 @@
 # main.py
-from fastapi import FastAPI
-from pydantic import BaseModel
-import joblib
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+import numpy as np
 import pandas as pd
 
-app = FastAPI()
-model = joblib.load('gw_score_model.pkl')
+from feature_store import MissingFeaturesError, latest_feature_store
+from forest_eval import DEFAULT_QUANTILES, predict_distribution
+from inference_pool import INFERENCE_WORKERS, InferencePool, PoolBusy
+from model_registry import get_model
+import timing
+from timing import prometheus_text, record, span, summary as timing_summary
+
+# Rows per model.predict call for the batch and streaming endpoints
+PREDICT_CHUNK = 5000
+STREAM_CHUNK = 1000
 
 class PlayerStats(BaseModel):
     minutes: int
@@ -19,8 +35,214 @@ class PlayerStats(BaseModel):
     form: float
     fixture_difficulty: float
 
+# FPL_INFERENCE_WORKERS > 0 moves inference into worker processes (see inference_pool.py)
+pool = InferencePool(INFERENCE_WORKERS, default_features=PlayerStats.model_fields) if INFERENCE_WORKERS > 0 else None
+
+@asynccontextmanager
+async def lifespan(app):
+    if pool is not None:
+        await pool.start()
+    yield
+    if pool is not None:
+        await pool.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(MissingFeaturesError)
+async def missing_features(request: Request, exc: MissingFeaturesError):
+    # The served model needs inputs this source can't provide – refuse rather than predict from zeros
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    if not timing.ENABLED:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Route template, not the raw path, so /predict/player/{player_id} is one span
+    route = request.scope.get("route")
+    record(f"http.{request.method} {getattr(route, 'path', request.url.path)}", time.perf_counter() - start)
+    return response
+
+def model_features(model):
+    # Only send the model the columns it was trained on, in its order
+    return list(getattr(model, "feature_names_in_", PlayerStats.model_fields))
+
+def check_player_features(features):
+    missing = [f for f in features if f not in PlayerStats.model_fields]
+    if missing:
+        raise MissingFeaturesError(f"The served model needs {missing}, which /predict inputs don't have")
+
+def player_matrix(players: List[PlayerStats], features) -> np.ndarray:
+    check_player_features(features)
+    return np.array([[getattr(p, f) for f in features] for p in players], dtype=float)
+
+def predict_matrix(build_matrix) -> List[float]:
+    """One vectorized model.predict per chunk of rows (blocking – call off the event loop)."""
+    model = get_model()
+    features = model_features(model)
+    with span("api.build_matrix"):
+        X = build_matrix(features)
+    predictions = []
+    for start in range(0, len(X), PREDICT_CHUNK):
+        chunk = pd.DataFrame(X[start:start + PREDICT_CHUNK], columns=features)
+        with span("api.model_predict"):
+            predictions.extend(round(float(v), 2) for v in model.predict(chunk))
+    return predictions
+
+def predict_rows(players: List[PlayerStats]) -> List[float]:
+    return predict_matrix(lambda features: player_matrix(players, features))
+
+async def predict_async(build_matrix, wait=False) -> List[float]:
+    """Predictions for build_matrix(features) – in the worker pool when configured, else in a thread."""
+    if pool is None:
+        return await run_in_threadpool(predict_matrix, build_matrix)
+    features = pool.features
+    with span("api.build_matrix"):
+        X = build_matrix(features)
+    try:
+        # Big requests are split so several workers can share them (queueing + batching + worker time)
+        with span("api.pool_predict"):
+            parts = await asyncio.gather(*(
+                pool.predict(X[start:start + PREDICT_CHUNK], features, wait=wait)
+                for start in range(0, len(X), PREDICT_CHUNK)
+            ))
+    except PoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return [round(float(v), 2) for part in parts for v in part]
+
+async def predict_players(players: List[PlayerStats], wait=False) -> List[float]:
+    """Predicted points per player."""
+    return await predict_async(lambda features: player_matrix(players, features), wait)
+
+def current_store():
+    store = latest_feature_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="No materialized features yet – run `python feature_store.py`")
+    return store
+
+def served_features():
+    """Feature order of the model currently being served (the worker pool's, when there is one)."""
+    return pool.features if pool is not None and pool.features else model_features(get_model())
+
+def eligible_rows(store):
+    """Store rows the served model can predict (history-trained models need a played match this season)."""
+    return np.flatnonzero(store.eligible_for(served_features()))
+
 @app.post("/predict")
-def predict_score(player: PlayerStats):
-    df = pd.DataFrame([player.dict()])
-    prediction = model.predict(df)[0]
-    return {"predicted_points": round(prediction, 2)}
+async def predict_score(player: PlayerStats):
+    prediction = (await predict_players([player]))[0]
+    return {"predicted_points": prediction}
+
+@app.post("/predict/batch")
+async def predict_batch(players: List[PlayerStats]):
+    if not players:
+        return {"predicted_points": []}
+    predictions = await predict_players(players)
+    return {"predicted_points": predictions}
+
+@app.get("/predict/player/{player_id}")
+async def predict_player(player_id: int):
+    """Next-gameweek prediction from the materialized feature store – nothing is recomputed.
+
+    Players /predict/next-gameweek leaves out (too few minutes, no match this season)
+    get predicted_points null rather than a prediction from features known to be invalid.
+    """
+    store = current_store()
+    if player_id not in store.index:
+        raise HTTPException(status_code=404, detail=f"Unknown player {player_id}")
+    rows = store.rows([player_id])
+    eligible = bool(np.isin(rows[0], eligible_rows(store)))
+    prediction = (await predict_async(lambda features: store.matrix_for(features, rows)))[0] if eligible else None
+    return {"player_id": player_id, "predicted_points": prediction, "eligible": eligible}
+
+@app.get("/predict/next-gameweek")
+async def predict_next_gameweek():
+    """Predictions for every player with enough minutes, straight from the feature store."""
+    store = current_store()
+    rows = eligible_rows(store)
+    predictions = await predict_async(lambda features: store.matrix_for(features, rows))
+    return {
+        "snapshot_version": store.snapshot_version,
+        "predicted_points": dict(zip(store.player_ids[rows].tolist(), predictions)),
+    }
+
+def store_distribution(store, rows, quantiles):
+    model = get_model()
+    features = model_features(model)
+    with span("api.build_matrix"):
+        X = pd.DataFrame(store.matrix_for(features, rows), columns=features)
+    with span("api.model_predict_distribution"):
+        return predict_distribution(model, X, quantiles)
+
+@app.get("/predict/next-gameweek/distribution")
+async def predict_next_gameweek_distribution(quantiles: str = ",".join(map(str, DEFAULT_QUANTILES))):
+    """Mean, std and quantiles of every eligible player's prediction (spread of the forest's trees)."""
+    try:
+        levels = tuple(float(q) for q in quantiles.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="quantiles must be comma-separated numbers")
+    if not all(0 <= q <= 1 for q in levels):
+        raise HTTPException(status_code=422, detail="quantiles must be between 0 and 1")
+    store = current_store()
+    rows = eligible_rows(store)
+    # Runs in this process – the worker pool only serves point predictions
+    distribution = await run_in_threadpool(store_distribution, store, rows, levels)
+    mean, std, q = distribution.mean.tolist(), distribution.std.tolist(), distribution.quantiles.tolist()
+    return {
+        "snapshot_version": store.snapshot_version,
+        "quantiles": list(levels),
+        "players": {
+            pid: {"mean": round(mean[i], 2), "std": round(std[i], 2), "quantiles": [round(v, 2) for v in q[i]]}
+            for i, pid in enumerate(store.player_ids[rows].tolist())
+        },
+    }
+
+@app.get("/metrics")
+async def metrics(format: str = "prometheus"):
+    """Latency spans (p50/p95/p99) for this API process – Prometheus text, or JSON with ?format=json."""
+    if format == "json":
+        return timing_summary()
+    return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
+
+def _parse_line(line):
+    try:
+        return PlayerStats(**json.loads(line))
+    except (ValueError, TypeError, ValidationError) as e:
+        return str(e)
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """NDJSON in, NDJSON out: one PlayerStats object per input line, one result per output line."""
+    # Read the body before responding – once a StreamingResponse starts it competes for receive()
+    items, buffer = [], b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        items.extend(_parse_line(line) for line in lines if line.strip())
+    if buffer.strip():
+        items.append(_parse_line(buffer))
+
+    # A model these inputs can't feed is a 503 now – once streaming starts errors can only go in the body
+    check_player_features(served_features())
+
+    async def results():
+        for start in range(0, len(items), STREAM_CHUNK):
+            chunk = items[start:start + STREAM_CHUNK]
+            rows = [p for p in chunk if isinstance(p, PlayerStats)]
+            try:
+                # Headers are already sent, so wait for queue room instead of failing with 503
+                predictions = iter(await predict_players(rows, wait=True) if rows else [])
+                failed = None
+            except Exception as e:
+                # e.g. the model was swapped for one needing other inputs – fail this chunk's lines, keep going
+                failed = f"Prediction failed: {e}"
+
+            def result(item):
+                if not isinstance(item, PlayerStats):
+                    return {"error": item}
+                return {"error": failed} if failed else {"predicted_points": next(predictions)}
+
+            yield "".join(json.dumps(result(item)) + "\n" for item in chunk)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -0,0 +1,210 @@
+# model_registry.py
+# One lazily-loaded, hot-reloadable copy of each model artifact per process.
+#
+# Nothing is loaded until the first prediction. The artifact is copied to an
+# immutable, content-addressed file under MODEL_CACHE_DIR and loaded from there,
+# so rewriting the source .pkl can never pull pages out from under a live model.
+# Loading still gives every process its own copy of the model (sklearn trees
+# copy their node arrays out of the pickle); pin_forest additionally writes a
+# compiled forest as <version>.forest/*.npy, which processes that only need
+# predictions (inference_pool.py) memory-map and share. The source file is
+# re-checked at most every FPL_MODEL_CHECK_INTERVAL seconds; when its content
+# hash changes the new model is loaded and swapped in without a restart. Pinned
+# copies no entry serves any more are pruned, keeping the FPL_MODEL_CACHE_KEEP
+# most recently used ones (other processes may still serve them).
+# Tree forests are served through forest_eval's compiled evaluator unless
+# FPL_FOREST_EVAL=0. A path of the form artifact:<name or key> serves the newest
+# matching model from artifact_store.py and follows it as new ones are trained.
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+import joblib
+
+from artifact_store import resolve_model_path
+from forest_eval import ForestPredictor, compile_model
+
+DEFAULT_MODEL_PATH = os.environ.get("FPL_MODEL_PATH", "gw_score_model.pkl")
+CHECK_INTERVAL = float(os.environ.get("FPL_MODEL_CHECK_INTERVAL", 2.0))
+MODEL_CACHE_DIR = os.environ.get("FPL_MODEL_CACHE_DIR", ".model_cache")
+MODEL_CACHE_KEEP = int(os.environ.get("FPL_MODEL_CACHE_KEEP", 3))
+COMPILE_FORESTS = os.environ.get("FPL_FOREST_EVAL", "1") != "0"
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class _Entry:
+    __slots__ = ("model", "version", "stat", "checked_at")
+
+    def __init__(self, model, version, stat):
+        self.model = model
+        self.version = version
+        self.stat = stat
+        self.checked_at = time.monotonic()
+
+
+class ModelRegistry:
+    def __init__(self, check_interval=CHECK_INTERVAL, cache_dir=MODEL_CACHE_DIR, keep=MODEL_CACHE_KEEP):
+        self.check_interval = check_interval
+        self.cache_dir = cache_dir
+        self.keep = keep
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _pinned(self, version):
+        return os.path.join(self.cache_dir, f"{version}.pkl")
+
+    def _forest_dir(self, version):
+        return os.path.join(self.cache_dir, f"{version}.forest")
+
+    def _pin(self, path, version):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pinned = self._pinned(version)
+        if not os.path.exists(pinned):
+            tmp = f"{pinned}.{os.getpid()}.tmp"
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, pinned)
+        return pinned
+
+    def _load(self, path, version):
+        self._pin(path, version)
+        return self.load_pinned(version)
+
+    def load_pinned(self, version):
+        """Load a version this registry has already pinned, without going back to the source artifact."""
+        pinned = self._pinned(version)
+        try:
+            model = joblib.load(pinned, mmap_mode="r")
+        except ValueError:
+            # Compressed artifacts can't be memory-mapped
+            model = joblib.load(pinned)
+        return compile_model(model) if COMPILE_FORESTS else model
+
+    def pin_forest(self, model, version):
+        """Directory of memory-mappable arrays for a compiled forest (CompiledForest.open_dir), else None."""
+        if not isinstance(model, ForestPredictor):
+            return None
+        forest_dir = self._forest_dir(version)
+        if not os.path.isdir(forest_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            model.compiled.save_dir(forest_dir)
+        return forest_dir
+
+    def _checked(self, entry):
+        entry.checked_at = time.monotonic()
+        try:
+            os.utime(self._pinned(entry.version))  # still in use – keep it out of other processes' pruning
+        except OSError:
+            pass
+
+    def _refresh(self, path, entry):
+        try:
+            source = resolve_model_path(path)
+            st = os.stat(source)
+        except (OSError, KeyError):
+            if entry is None:
+                raise
+            self._checked(entry)
+            return entry
+        stat = (source, st.st_mtime_ns, st.st_size)
+        if entry and entry.stat == stat:
+            self._checked(entry)
+            return entry
+
+        version = file_hash(source)
+        if entry and entry.version == version:
+            entry.stat = stat
+            self._checked(entry)
+            return entry
+
+        try:
+            model = self._load(source, version)
+        except Exception as e:
+            if entry is None:
+                raise
+            # Probably caught mid-write – keep serving the current model and retry later
+            print(f"⚠️ Could not load new model from {path}, keeping version {entry.version[:12]}: {e}")
+            self._checked(entry)
+            return entry
+
+        if entry:
+            print(f"🔁 Model {path} reloaded: {entry.version[:12]} → {version[:12]}")
+        return _Entry(model, version, stat)
+
+    def _prune(self):
+        """Delete pinned copies no entry serves, except the `keep` most recently used."""
+        serving = {self._pinned(e.version) for e in self._entries.values()}
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        stale = []
+        for name in names:
+            pinned = os.path.join(self.cache_dir, name)
+            if name.endswith(".pkl") and pinned not in serving:
+                try:
+                    stale.append((os.stat(pinned).st_mtime_ns, pinned))
+                except OSError:
+                    pass
+        for _, pinned in sorted(stale, reverse=True)[self.keep:]:
+            try:
+                os.remove(pinned)  # live memory maps of it stay valid
+            except OSError:
+                pass
+            shutil.rmtree(f"{pinned[:-len('.pkl')]}.forest", ignore_errors=True)
+
+    def _entry(self, path):
+        entry = self._entries.get(path)
+        if entry and time.monotonic() - entry.checked_at < self.check_interval:
+            return entry
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or time.monotonic() - entry.checked_at >= self.check_interval:
+                previous, entry = entry, self._refresh(path, entry)
+                self._entries[path] = entry
+                if previous is None or entry.version != previous.version:
+                    self._prune()
+            return entry
+
+    def get(self, path=None):
+        return self._entry(path or DEFAULT_MODEL_PATH).model
+
+    def version(self, path=None):
+        """Content hash of the artifact currently being served."""
+        return self._entry(path or DEFAULT_MODEL_PATH).version
+
+    def get_with_version(self, path=None):
+        """(model, version) from the same load, for callers that cache per model version."""
+        entry = self._entry(path or DEFAULT_MODEL_PATH)
+        return entry.model, entry.version
+
+
+registry = ModelRegistry()
+
+
+def get_model(path=None):
+    return registry.get(path)
+
+
+def get_model_version(path=None):
+    return registry.version(path)
+
+
+def get_model_with_version(path=None):
+    return registry.get_with_version(path)
+
+
+def load_pinned_model(version):
+    return registry.load_pinned(version)
+
+
+def pin_forest(model, version):
+    return registry.pin_forest(model, version)
@@ -0,0 +1,52 @@
+# player_table.py
+# Typed columnar projection of bootstrap-static `elements`.
+#
+# The raw payload keeps ~100 keys per player with numeric fields such as form
+# and ict_index stored as strings. This keeps only the fields the app uses,
+# parses them once per snapshot and stores them with explicit dtypes, so
+# scoring, filtering and sorting can run on arrays.
+import numpy as np
+import pandas as pd
+
+INT_COLUMNS = {
+    "id": "int32",
+    "code": "int32",
+    "team": "int16",
+    "element_type": "int8",
+    "now_cost": "int16",
+    "total_points": "int32",
+    "minutes": "int32",
+    "goals_scored": "int16",
+    "assists": "int16",
+    "clean_sheets": "int16",
+    "yellow_cards": "int16",
+    "red_cards": "int16",
+    "bonus": "int16",
+    "transfers_in_event": "int32",
+    "transfers_out_event": "int32",
+}
+
+# Parsed from strings in the API; float64 so values match float(p["form"]) exactly
+FLOAT_COLUMNS = [
+    "form", "ict_index", "influence", "creativity", "threat", "selected_by_percent",
+    # None means "no news" in the API and is kept as NaN
+    "chance_of_playing_next_round",
+]
+
+CATEGORY_COLUMNS = ["web_name", "team_name"]
+
+PLAYER_COLUMNS = list(INT_COLUMNS) + FLOAT_COLUMNS + CATEGORY_COLUMNS
+
+
+def build_player_table(players):
+    """DataFrame with one row per player, in the same order as `players` (row i is players[i])."""
+    columns = {}
+    for col, dtype in INT_COLUMNS.items():
+        values = np.array([p.get(col) or 0 for p in players], dtype=np.int64)
+        columns[col] = values.astype(dtype)
+    for col in FLOAT_COLUMNS:
+        raw = pd.Series([p.get(col) for p in players], dtype=object)
+        columns[col] = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64)
+    for col in CATEGORY_COLUMNS:
+        columns[col] = pd.Categorical([p.get(col, "") for p in players])
+    return pd.DataFrame(columns, columns=PLAYER_COLUMNS)
@@ -0,0 +1,109 @@
+# prediction_cache.py
+# LRU + TTL memo for model predictions.
+#
+# Entries are keyed by the model artifact's content hash plus a hash of the
+# exact float feature vector, so the same player with the same features is
+# only predicted once across Streamlit reruns and tabs. The whole cache is
+# dropped when the model artifact or the FPL data snapshot changes.
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_SIZE = int(os.environ.get("FPL_PREDICTION_CACHE_SIZE", 50_000))
+CACHE_TTL = float(os.environ.get("FPL_PREDICTION_CACHE_TTL", 3600))  # seconds
+
+
+def row_key(row):
+    return hashlib.blake2b(np.ascontiguousarray(row, dtype=np.float64).tobytes(), digest_size=16).digest()
+
+
+class PredictionCache:
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+        self._snapshot_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_versions(self, model_version=None, snapshot_version=None):
+        changed = False
+        if model_version is not None and model_version != self._model_version:
+            changed = self._model_version is not None
+            self._model_version = model_version
+        if snapshot_version is not None and snapshot_version != self._snapshot_version:
+            changed = changed or self._snapshot_version is not None
+            self._snapshot_version = snapshot_version
+        if changed:
+            self._entries.clear()
+
+    def set_snapshot_version(self, snapshot_version):
+        """Drop everything once the FPL data behind the cached features has been refreshed."""
+        with self._lock:
+            self._check_versions(snapshot_version=snapshot_version)
+
+    def predict(self, X, model_version, predict_fn, namespace=b""):
+        """Predictions for every row of X, calling `predict_fn` only on the rows not cached.
+
+        `predict_fn` may return one value per row or a fixed-width vector per row
+        (kept under their own `namespace`, e.g. a prediction distribution).
+        """
+        keys = [namespace + row_key(row) for row in X]
+        out = [None] * len(keys)
+        missing = []
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_versions(model_version=model_version)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    out[i] = entry[0]
+                else:
+                    missing.append(i)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            fresh = np.asarray(predict_fn(X[missing]), dtype=np.float64)
+            values = fresh.tolist() if fresh.ndim == 1 else list(fresh)
+            for i, value in zip(missing, values):
+                out[i] = value
+            with self._lock:
+                # The model may have been swapped while we were predicting
+                if model_version == self._model_version:
+                    expires = time.monotonic() + self.ttl
+                    for i, value in zip(missing, values):
+                        self._entries[keys[i]] = (value, expires)
+                        self._entries.move_to_end(keys[i])
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+        return np.array(out, dtype=np.float64) if out else np.empty(0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+prediction_cache = PredictionCache()
@@ -0,0 +1,310 @@
+# retrain_gw_model.py
+# Weekly retrain of the served gameweek model – incremental when it is safe.
+#
+# After a gameweek finishes the model is brought up to date from the newest
+# matches instead of being refit on every season: a random forest grows
+# ADD_TREES more trees fit on the last RECENT_GWS gameweeks (warm_start), a
+# LightGBM model boosts ADD_ROUNDS more rounds on them starting from its current
+# booster (init_model). A full retrain on all history runs instead when
+#   - the artifact has no retrain state, or it, the model kind or the feature
+#     list changed since the last run
+#   - a new season started
+#   - more than RECENT_GWS gameweeks are new, or rows up to the last trained
+#     gameweek changed (backfilled / corrected history)
+#   - MAX_INCREMENTAL updates ran since the last full retrain (forests keep
+#     growing and the all-season trees get outweighed by recent ones)
+#   - the model's MAE on the new gameweeks is more than DRIFT_TOLERANCE above
+#     the first MAE measured after the last full retrain
+# The state lives next to the artifact in <model>.retrain.json. Every retrained
+# model is stored in the artifact store (with its parent artifact as lineage)
+# and published from there, so <model>.meta.json always describes it. With
+# FPL_MODEL_PATH=artifact:<name> retrains are stored under that name instead –
+# the registry serves the newest one – and the state is <store>/<name>.retrain.json.
+#
+#   python retrain_gw_model.py                          # after each gameweek
+#   python retrain_gw_model.py --full
+#   python retrain_gw_model.py --compare 6 --kind lgbm  # incremental vs. full over the last 6 gameweeks
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+from artifact_store import ARTIFACT_PREFIX, artifact_dir, find_artifact, publish, resolve_model_path, save_fitted
+from gw_features import build_training_set
+from history_store import load_history
+from model_registry import DEFAULT_MODEL_PATH, file_hash
+from train_search import FEATURES, HISTORY_COLUMNS, TARGET, make_model
+
+# Same configs as train_gw_model.py / train_model_lightgbm.py
+FULL_PARAMS = {
+    "rf": {"n_estimators": 300, "max_depth": 12},
+    "lgbm": {"n_estimators": 200, "learning_rate": 0.05},
+}
+ADD_TREES = 30
+ADD_ROUNDS = 25
+RECENT_GWS = 6
+MAX_INCREMENTAL = 6
+DRIFT_TOLERANCE = 0.15
+DEFAULT_REPORT = "retrain_report.csv"
+
+
+def load_matches():
+    """Training rows of every season with gw_rank: 0, 1, ... over the (season, gw) slots in time order."""
+    df = build_training_set(load_history(columns=HISTORY_COLUMNS))
+    df = df.dropna(subset=FEATURES + [TARGET]).reset_index(drop=True)
+    df["season"] = df["season"].astype(str)
+    season = pd.factorize(df["season"], sort=True)[0]
+    df["gw_rank"] = np.unique(season * 100 + df["gw"].to_numpy(), return_inverse=True)[1]
+    return df
+
+
+def _slot(df, rank):
+    row = df.loc[df["gw_rank"] == rank].iloc[0]
+    return str(row["season"]), int(row["gw"])
+
+
+def _rank_of(df, season, gw):
+    ranks = df.loc[(df["season"] == season) & (df["gw"] == gw), "gw_rank"]
+    return int(ranks.iloc[0]) if len(ranks) else None
+
+
+def state_path(model_path):
+    if model_path.startswith(ARTIFACT_PREFIX):
+        return f"{artifact_dir(model_path[len(ARTIFACT_PREFIX):])}.retrain.json"
+    return f"{os.path.splitext(model_path)[0]}.retrain.json"
+
+
+def serving_target(model_path, kind):
+    """(file the served model is read from, or None if there is none yet; artifact name retrains are stored under)."""
+    if not model_path.startswith(ARTIFACT_PREFIX):
+        return model_path, f"gw_{kind}_retrain"
+    ref = model_path[len(ARTIFACT_PREFIX):]
+    try:
+        meta = find_artifact(ref)
+    except KeyError:
+        return None, ref  # first retrain under this name
+    if meta["name"] != ref:
+        raise ValueError(f"{model_path} pins artifact {meta['key'][:12]} – serve artifact:<name> to follow retrained models")
+    return resolve_model_path(model_path), ref
+
+
+def load_state(model_path):
+    try:
+        with open(state_path(model_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(state, model_path):
+    path = state_path(model_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def tree_count(model):
+    if hasattr(model, "booster_"):
+        return model.booster_.num_trees()
+    return len(getattr(model, "estimators_", ()))
+
+
+def fit_full(kind, df):
+    model = make_model(kind, FULL_PARAMS[kind]).set_params(n_jobs=-1)
+    model.fit(df[FEATURES], df[TARGET])
+    return model
+
+
+def fit_incremental(model, kind, recent):
+    """`model` extended with trees / boosting rounds fit on `recent` only."""
+    if kind == "rf":
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + ADD_TREES)
+        model.fit(recent[FEATURES], recent[TARGET])
+        model.set_params(warm_start=False)  # a later plain fit() is a full refit again
+        return model
+    params = {**model.get_params(), "n_estimators": ADD_ROUNDS}
+    updated = type(model)(**params)
+    updated.fit(recent[FEATURES], recent[TARGET], init_model=model.booster_)
+    return updated
+
+
+def plan_retrain(state, model, df, kind, max_updates=MAX_INCREMENTAL, drift_tolerance=DRIFT_TOLERANCE):
+    """("skip" | "incremental" | "full", reason, MAE of `model` on the new gameweeks or None)."""
+    if model is None or not state:
+        return "full", "no retrain state", None
+    if state["kind"] != kind:
+        return "full", f"model kind changed ({state['kind']} → {kind})", None
+    if state["features"] != FEATURES:
+        return "full", "feature list changed", None
+    season, gw = state["trained_through"]
+    through = _rank_of(df, season, gw)
+    if through is None:
+        return "full", f"{season} GW{gw} is no longer in the history", None
+    if through == df["gw_rank"].max():
+        return "skip", f"already trained through {season} GW{gw}", None
+    seen = int((df["gw_rank"] <= through).sum())
+    if seen != state["rows_through"]:
+        return "full", f"history up to {season} GW{gw} changed ({state['rows_through']} → {seen} rows)", None
+
+    new = df[df["gw_rank"] > through]
+    if (new["season"] != season).any():
+        return "full", f"new season {new['season'].iloc[-1]}", None
+    n_new = new["gw_rank"].nunique()
+    if n_new > RECENT_GWS:
+        return "full", f"{n_new} new gameweeks (more than the {RECENT_GWS}-gameweek incremental window)", None
+    if state["updates_since_full"] >= max_updates:
+        return "full", f"{state['updates_since_full']} incremental updates since the last full retrain", None
+    mae = mean_absolute_error(new[TARGET], model.predict(new[FEATURES]))
+    baseline = state.get("baseline_mae")
+    if baseline is not None and mae > baseline * (1 + drift_tolerance):
+        return "full", f"MAE {mae:.3f} on the new gameweeks is over {drift_tolerance:.0%} above the {baseline:.3f} baseline", mae
+    return "incremental", f"{n_new} new gameweek(s)", mae
+
+
+def retrain_step(model, state, df, kind, force_full=None, max_updates=MAX_INCREMENTAL, drift_tolerance=DRIFT_TOLERANCE):
+    """Bring `model` up to the last gameweek of `df`: (model, state, mode, reason, seconds)."""
+    if force_full:
+        mode, reason, mae = "full", force_full, None
+    else:
+        mode, reason, mae = plan_retrain(state, model, df, kind, max_updates, drift_tolerance)
+    if mode == "skip":
+        return model, state, mode, reason, 0.0
+
+    latest = int(df["gw_rank"].max())
+    start = time.perf_counter()
+    if mode == "full":
+        model = fit_full(kind, df)
+        updates, baseline = 0, None
+    else:
+        model = fit_incremental(model, kind, df[df["gw_rank"] > latest - RECENT_GWS])
+        updates = state["updates_since_full"] + 1
+        # The first gameweek after a full retrain sets the drift baseline
+        baseline = state["baseline_mae"] if state.get("baseline_mae") is not None else mae
+    seconds = time.perf_counter() - start
+
+    state = {
+        "kind": kind,
+        "features": FEATURES,
+        "trained_through": list(_slot(df, latest)),
+        "rows_through": len(df),
+        "updates_since_full": updates,
+        "baseline_mae": baseline,
+        "trees": tree_count(model),
+        "last_mode": mode,
+        "last_reason": reason,
+    }
+    return model, state, mode, reason, seconds
+
+
+def retrain(model_path=DEFAULT_MODEL_PATH, kind="rf", full=False, max_updates=MAX_INCREMENTAL,
+            drift_tolerance=DRIFT_TOLERANCE):
+    df = load_matches()
+    state = load_state(model_path)
+    served, name = serving_target(model_path, kind)
+    model = joblib.load(served) if state and served and os.path.exists(served) else None
+    force = "--full" if full else None
+    if model is not None and file_hash(served) != state.get("model_sha256"):
+        force = f"{model_path} was replaced since the last retrain"
+
+    parent = state.get("artifact_key") if state and not force else None
+    model, state, mode, reason, seconds = retrain_step(model, state, df, kind, force, max_updates, drift_tolerance)
+    if mode == "skip":
+        print(f"⏭️ Nothing to do: {reason}")
+        return state
+
+    seen = df if mode == "full" else df[df["gw_rank"] > df["gw_rank"].max() - RECENT_GWS]
+    meta = save_fitted(name, model, seen[FEATURES], seen[TARGET], seconds,
+                       lineage={"mode": mode, "parent": parent, "trained_through": state["trained_through"]},
+                       source="history_store")
+    if model_path.startswith(ARTIFACT_PREFIX):
+        state["model_sha256"] = meta["model_sha256"]  # stored as the newest <name>, which the registry follows
+    else:
+        publish(meta, model_path)  # the registry hot-reloads on the content change
+        state["model_sha256"] = file_hash(model_path)
+    state["artifact_key"] = meta["key"]
+    save_state(state, model_path)
+    season, gw = state["trained_through"]
+    print(f"✅ {mode.capitalize()} retrain ({reason}) through {season} GW{gw} in {seconds:.1f}s "
+          f"– {state['trees']} trees → {model_path}")
+    return state
+
+
+def compare(df, kind, n_gws, max_updates=MAX_INCREMENTAL, drift_tolerance=DRIFT_TOLERANCE):
+    """Replay the last `n_gws` gameweeks of the latest season, updating one model with the
+    retrain policy and fully refitting another before each; one report row per gameweek."""
+    season = df["season"].max()
+    ranks = np.unique(df.loc[df["season"] == season, "gw_rank"])
+    if len(ranks) < n_gws + 1:
+        raise ValueError(f"{season} has only {len(ranks)} gameweeks – need {n_gws + 1} to compare {n_gws}")
+
+    rows = []
+    inc_model = inc_state = full_model = None
+    for rank in ranks[-n_gws:]:
+        seen = df[df["gw_rank"] < rank]
+        if inc_model is None:
+            # Both start from the same full fit
+            inc_model, inc_state, mode, reason, inc_s = retrain_step(None, None, seen, kind)
+            full_model, full_s = inc_model, inc_s
+        else:
+            start = time.perf_counter()
+            full_model = fit_full(kind, seen)
+            full_s = time.perf_counter() - start
+            inc_model, inc_state, mode, reason, inc_s = retrain_step(inc_model, inc_state, seen, kind,
+                                                                     max_updates=max_updates,
+                                                                     drift_tolerance=drift_tolerance)
+        test = df[df["gw_rank"] == rank]
+        gw = _slot(df, rank)[1]
+        rows.append({
+            "season": season,
+            "gw": gw,
+            "rows": len(test),
+            "full_mae": mean_absolute_error(test[TARGET], full_model.predict(test[FEATURES])),
+            "full_fit_s": full_s,
+            "incremental_mae": mean_absolute_error(test[TARGET], inc_model.predict(test[FEATURES])),
+            "incremental_fit_s": inc_s,
+            "incremental_mode": mode,
+            "incremental_reason": reason,
+            "incremental_trees": tree_count(inc_model),
+        })
+        print(f"  GW{gw}: full MAE {rows[-1]['full_mae']:.3f} ({full_s:.1f}s) | "
+              f"incremental MAE {rows[-1]['incremental_mae']:.3f} ({inc_s:.1f}s, {mode})")
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental (warm-start) retraining of the gameweek model")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--kind", choices=sorted(FULL_PARAMS), default="rf")
+    parser.add_argument("--full", action="store_true", help="force a full retrain on all history")
+    parser.add_argument("--max-updates", type=int, default=MAX_INCREMENTAL,
+                        help="incremental updates before a full retrain is required")
+    parser.add_argument("--drift-tolerance", type=float, default=DRIFT_TOLERANCE,
+                        help="relative MAE increase on new gameweeks that forces a full retrain")
+    parser.add_argument("--compare", type=int, metavar="N",
+                        help="report incremental vs. full retraining over the last N gameweeks instead")
+    parser.add_argument("--report", default=DEFAULT_REPORT)
+    args = parser.parse_args()
+
+    if not args.compare:
+        retrain(args.model, args.kind, args.full, args.max_updates, args.drift_tolerance)
+        return
+
+    report = compare(load_matches(), args.kind, args.compare, args.max_updates, args.drift_tolerance)
+    report.to_csv(args.report, index=False)
+    steps = report.iloc[1:]  # the first gameweek starts both from the same full fit
+    print(f"📊 Mean MAE – full {report['full_mae'].mean():.4f}, incremental {report['incremental_mae'].mean():.4f}")
+    if len(steps):
+        speedup = steps["full_fit_s"].sum() / max(steps["incremental_fit_s"].sum(), 1e-9)
+        print(f"⏱️ Retrain time over {len(steps)} updates – full {steps['full_fit_s'].sum():.1f}s, "
+              f"incremental {steps['incremental_fit_s'].sum():.1f}s ({speedup:.1f}× faster)")
+    print(f"✅ Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# smart_score.py
+# Vectorized smart score for the whole player pool.
+#
+# Same formula as fpl_api.calculate_smart_score, evaluated on the snapshot's
+# typed player table in one pass. Scores are cached per snapshot version and
+# fixture_info strings are only built for the players actually displayed.
+import numpy as np
+
+FIXTURE_DIFFICULTY_MODIFIER = {
+    1: 1.0,
+    2: 0.5,
+    3: 0.0,
+    4: -0.5,
+    5: -1.0
+}
+
+_score_cache = {}
+_CACHE_VERSIONS = 4
+
+
+def team_difficulty_mod(fixture_index, team_ids, limit=3):
+    """Per-team sum of difficulty modifiers over the next `limit` fixtures, indexed by team id."""
+    max_team = int(max(team_ids, default=0))
+    mods = np.zeros(max_team + 1, dtype=np.float64)
+    for team in set(int(t) for t in team_ids):
+        # Same left-to-right Python sum as calculate_smart_score so results match bit for bit
+        mods[team] = sum(FIXTURE_DIFFICULTY_MODIFIER.get(d[1], 0.0) for d in fixture_index.upcoming(team, limit))
+    return mods
+
+
+def compute_smart_scores(table, fixture_index):
+    """Unrounded scores for every row of `table`, plus a mask of rows the scalar version scores as 0."""
+    form = table["form"].to_numpy(dtype=np.float64)
+    cost = table["now_cost"].to_numpy(dtype=np.float64) / 10
+    total_points = table["total_points"].to_numpy(dtype=np.float64)
+    chance = table["chance_of_playing_next_round"].to_numpy(dtype=np.float64)
+    teams = table["team"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ppm = np.where(cost > 0, total_points / cost, 0.0)
+    difficulty_mod = team_difficulty_mod(fixture_index, teams)[teams]
+
+    base_score = (form * 2.5) + (ppm * 1.5) + (chance / 100) - (cost * 0.4) + difficulty_mod
+    # calculate_smart_score scores 0 when it hits KeyError / TypeError / ValueError; on
+    # bootstrap data that is unparseable or null form (ValueError / TypeError from float())
+    # and a null play chance (None / 100), which the table holds as NaN
+    invalid = np.isnan(form) | np.isnan(chance)
+    return base_score, invalid
+
+
+def score_pool(snapshot):
+    """Rounded smart scores aligned with snapshot.players, cached per snapshot version."""
+    cached = _score_cache.get(snapshot.version)
+    if cached is not None:
+        return cached
+
+    base_score, invalid = compute_smart_scores(snapshot.table, snapshot.fixture_index)
+    # Python's round() (not np.round) so every value equals calculate_smart_score's
+    scores = [0 if bad else round(s, 2) for s, bad in zip(base_score.tolist(), invalid.tolist())]
+
+    if len(_score_cache) >= _CACHE_VERSIONS:
+        _score_cache.pop(next(iter(_score_cache)))
+    _score_cache[snapshot.version] = scores
+    return scores
+
+
+def format_fixture_info(player, fixture_index, limit=3):
+    upcoming = fixture_index.upcoming(player["team"], limit)
+    return ', '.join([f"vs {d[0]} (D{d[1]})" for d in upcoming]) or "N/A"
+
+
+def attach_fixture_info(players, fixture_index):
+    """Copies of just the players about to be rendered, with fixture_info filled in."""
+    return [p if "fixture_info" in p else dict(p, fixture_info=format_fixture_info(p, fixture_index)) for p in players]
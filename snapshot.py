@@ -0,0 +1,64 @@
+# snapshot.py
+# Immutable, pre-indexed view of one bootstrap-static + fixtures refresh.
+#
+# Built once per data refresh (see fpl_api.get_snapshot) so every tab and
+# position works off the same lookups instead of refiltering the raw payload.
+# Players are read-only views shared by every tab and request; anything that
+# annotates them (smart scores, predictions, fixture_info) works on copies.
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+import pandas as pd
+
+from fixture_index import FixtureIndex, build_fixture_index, schedule_order
+from player_table import build_player_table
+
+
+@dataclass(frozen=True)
+class BootstrapSnapshot:
+    version: str
+    players: Tuple[Mapping, ...]
+    teams: Tuple[dict, ...]
+    # In schedule order (gameweek, then kickoff), not the API's id order
+    fixtures: Tuple[dict, ...]
+    fixture_index: FixtureIndex
+    team_names: Mapping[int, str]
+    players_by_id: Mapping[int, Mapping]
+    players_by_position: Mapping[int, Tuple[Mapping, ...]]
+    players_by_team: Mapping[int, Tuple[Mapping, ...]]
+    # Typed columns for the same players; row i is players[i]
+    table: pd.DataFrame
+
+
+def _group_by(players, key):
+    groups = {}
+    for p in players:
+        groups.setdefault(p[key], []).append(p)
+    return MappingProxyType({k: tuple(v) for k, v in groups.items()})
+
+
+def build_snapshot(data, fixtures=(), version=""):
+    """Build a BootstrapSnapshot from a bootstrap-static payload and the fixtures list."""
+    team_names = {t["id"]: t["name"] for t in data["teams"]}
+
+    # Copied out of the cached payload and frozen, so no consumer's annotations can leak into another's
+    players = tuple(
+        MappingProxyType(dict(p, team_name=team_names.get(p["team"], "Unknown")))
+        for p in data["elements"]
+    )
+    # Sorted once here so raw-list consumers never have to re-sort per lookup
+    fixtures = tuple(sorted(fixtures, key=schedule_order))
+
+    return BootstrapSnapshot(
+        version=version,
+        players=players,
+        teams=tuple(data["teams"]),
+        fixtures=fixtures,
+        fixture_index=build_fixture_index(fixtures, team_names),
+        team_names=MappingProxyType(team_names),
+        players_by_id=MappingProxyType({p["id"]: p for p in players}),
+        players_by_position=_group_by(players, "element_type"),
+        players_by_team=_group_by(players, "team"),
+        table=build_player_table(players),
+    )
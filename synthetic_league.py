@@ -0,0 +1,416 @@
+# synthetic_league.py
+# Synthetic FPL league data for scale testing.
+#
+# Simulates a league of any size season by season – squads with starters and
+# rotation players, a random fixture schedule, player goals/assists that add
+# up to team scores, clean sheets, cards, bonus (top-3 BPS per fixture), ICT
+# and FPL points – and writes:
+#   * fpl_gw_<season>_enriched.csv for every past season, with the same
+#     columns as fpl_gw_2024_25_enriched.csv and form / fixture_difficulty
+#     derived exactly as gw_features.derive_features does
+#   * a replayable cassette (see fpl_http.py) for the current season with
+#     bootstrap-static, fixtures and element-summary responses
+#
+#   python synthetic_league.py --players 50000 --seasons 20 --out synthetic
+#   FPL_HTTP_MODE=replay FPL_CASSETTE=synthetic/cassette streamlit run ff_ai_assistant_full.py
+#   python -m benchmarks.suite --cassette synthetic/cassette
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import fpl_http
+from gw_features import home_away_difficulty, previous_mean
+from gw_crawler import API_BASE
+
+BOOTSTRAP_URL = f"{API_BASE}/bootstrap-static/"
+FIXTURES_URL = f"{API_BASE}/fixtures/"
+
+GAMEWEEKS = 38
+PLAYERS_PER_TEAM = 40
+ENRICHED_COLUMNS = [
+    "player_id", "web_name", "team", "gw", "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat", "opponent_team", "was_home",
+    "fixture_difficulty", "form", "total_points", "season",
+]
+
+# Indexed by element_type (1 GK, 2 DEF, 3 MID, 4 FWD); index 0 unused
+POSITION_SHARE = [0.10, 0.33, 0.40, 0.17]
+GOAL_RATE = np.array([0, 0.004, 0.05, 0.15, 0.45])  # per 90 for an average player vs. an average side
+ASSIST_RATE = np.array([0, 0.01, 0.07, 0.16, 0.14])
+GOAL_POINTS = np.array([0, 10, 6, 5, 4])
+CLEAN_SHEET_POINTS = np.array([0, 4, 4, 1, 0])
+GOAL_BPS = np.array([0, 12, 12, 18, 24])
+CLEAN_SHEET_BPS = np.array([0, 12, 12, 0, 0])
+# Influence / creativity / threat per 90, in tenths
+INFLUENCE_BASE = np.array([0, 140, 110, 90, 80])
+CREATIVITY_BASE = np.array([0, 5, 60, 140, 70])
+THREAT_BASE = np.array([0, 0, 40, 110, 220])
+# Opponent difficulty (FDR 1-5) -> scoring multiplier
+ATTACK_BY_DIFFICULTY = np.array([0, 1.5, 1.3, 1.0, 0.8, 0.6])
+PRICE_RANGE = {1: (40, 60), 2: (40, 70), 3: (45, 130), 4: (45, 145)}
+
+FIRST_NAMES = [
+    "Aaron", "Ben", "Callum", "Dan", "Eddie", "Felix", "Gabriel", "Harry", "Ivan", "Jack",
+    "Kai", "Leo", "Marcus", "Nathan", "Ollie", "Pedro", "Reece", "Sam", "Tom", "Youri",
+]
+LAST_NAMES = [
+    "Adams", "Barnes", "Costa", "Davies", "Evans", "Fernandes", "Gray", "Hughes", "Iwobi", "James",
+    "Kane", "Lewis", "Mitchell", "Nunez", "Owen", "Palmer", "Rice", "Silva", "Taylor", "Watkins",
+]
+
+
+def season_name(start_year):
+    return f"{start_year}/{(start_year + 1) % 100:02d}"
+
+
+def tenths_str(values):
+    """Tenths as the API's decimal strings ("12.3")."""
+    return [f"{v // 10}.{v % 10}" for v in values.tolist()]
+
+
+class League:
+    def __init__(self, n_players, n_teams, rng):
+        self.n_players = n_players
+        self.n_teams = n_teams
+        self.ids = np.arange(1, n_players + 1)
+        self.team = (rng.permutation(n_players) % n_teams + 1).astype(np.int64)
+        self.position = rng.choice([1, 2, 3, 4], size=n_players, p=POSITION_SHARE)
+        self.skill = rng.lognormal(0.0, 0.45, size=n_players)
+        self.team_strength = rng.normal(0.0, 1.0, size=n_teams + 1)
+        first = rng.integers(0, len(FIRST_NAMES), n_players)
+        last = rng.integers(0, len(LAST_NAMES), n_players)
+        self.first_name = [FIRST_NAMES[i] for i in first.tolist()]
+        self.second_name = [LAST_NAMES[i] for i in last.tolist()]
+        # web_name as written by the enriched CSVs ("First_Last_id")
+        self.csv_name = np.array([f"{f}_{s}_{i}" for f, s, i in zip(self.first_name, self.second_name, self.ids.tolist())])
+        self.refresh_squads()
+
+    def refresh_squads(self):
+        # Rank players within their team by skill: ~11 regulars, a rotation group, then fringe
+        order = np.lexsort((-self.skill, self.team))
+        team_sorted = self.team[order]
+        first_of_team = np.searchsorted(team_sorted, team_sorted)
+        rank = np.empty(self.n_players, dtype=np.int64)
+        rank[order] = np.arange(self.n_players) - first_of_team
+        self.play_prob = np.select([rank < 11, rank < 18, rank < 25], [0.92, 0.45, 0.15], 0.02)
+        self.start_prob = np.select([rank < 11, rank < 18], [0.9, 0.35], 0.1)
+
+        # Difficulty other teams face against this one, 2-5 by strength quartile
+        quartiles = np.quantile(self.team_strength[1:], [0.25, 0.5, 0.75])
+        self.team_fdr = 2 + np.searchsorted(quartiles, self.team_strength)
+
+    def age(self, rng):
+        """Between seasons: skill drifts and team strengths shift."""
+        self.skill = self.skill * rng.lognormal(0.0, 0.15, size=self.n_players)
+        self.team_strength = 0.7 * self.team_strength + rng.normal(0.0, 0.7, size=self.n_teams + 1)
+        self.refresh_squads()
+
+    def prices(self):
+        price = np.empty(self.n_players, dtype=np.int64)
+        pct = pd.Series(self.skill).groupby(self.position).rank(pct=True).to_numpy()
+        for pos, (lo, hi) in PRICE_RANGE.items():
+            mask = self.position == pos
+            price[mask] = np.round(lo + (hi - lo) * pct[mask] ** 2)
+        return price
+
+
+def build_schedule(n_teams, gameweeks, rng):
+    """Per-gameweek random pairings: opponent[t, g], home[t, g] and a fixture id per pairing."""
+    if n_teams % 2:
+        raise ValueError(f"Every team plays every gameweek, so the number of teams must be even (got {n_teams})")
+    opponent = np.zeros((n_teams + 1, gameweeks), dtype=np.int64)
+    home = np.zeros((n_teams + 1, gameweeks), dtype=bool)
+    fixture = np.zeros((n_teams + 1, gameweeks), dtype=np.int64)
+    pairs = []
+    for g in range(gameweeks):
+        teams = rng.permutation(np.arange(1, n_teams + 1))
+        h, a = teams[0::2], teams[1::2]
+        ids = len(pairs) + 1 + np.arange(len(h))
+        opponent[h, g], opponent[a, g] = a, h
+        home[h, g] = True
+        fixture[h, g] = fixture[a, g] = ids
+        pairs.extend(zip([g + 1] * len(h), h.tolist(), a.tolist()))
+    return {"opponent": opponent, "home": home, "fixture": fixture, "pairs": pairs}
+
+
+def simulate_season(league, schedule, rng):
+    """(n_players, gameweeks) arrays of per-match stats."""
+    P, G = league.n_players, schedule["opponent"].shape[1]
+    pos = league.position[:, None]
+    team = league.team
+    opponent = schedule["opponent"][team]
+    was_home = schedule["home"][team]
+    difficulty = league.team_fdr[opponent]
+
+    played = rng.random((P, G)) < league.play_prob[:, None]
+    started = played & (rng.random((P, G)) < league.start_prob[:, None])
+    minutes = np.where(started, np.where(rng.random((P, G)) < 0.75, 90, rng.integers(45, 90, (P, G))), 0)
+    minutes = np.where(played & ~started, rng.integers(1, 31, (P, G)), minutes)
+    share = minutes / 90
+
+    attack = ATTACK_BY_DIFFICULTY[difficulty] * np.where(was_home, 1.1, 0.9) * league.skill[:, None]
+    goals = rng.poisson(GOAL_RATE[pos] * attack * share)
+    assists = rng.poisson(ASSIST_RATE[pos] * attack * share)
+
+    # Team scores are the sum of their players' goals; conceded = opponent's score
+    team_goals = np.zeros((league.n_teams + 1, G), dtype=np.int64)
+    np.add.at(team_goals, team, goals)
+    conceded = np.where(minutes > 0, team_goals[opponent, np.arange(G)], 0)
+    clean_sheets = ((minutes >= 60) & (conceded == 0)).astype(np.int64)
+    yellow = (rng.random((P, G)) < 0.12 * share).astype(np.int64)
+    red = (rng.random((P, G)) < 0.004 * share).astype(np.int64)
+
+    bps = (np.where(minutes >= 60, 6, np.where(minutes > 0, 3, 0)) + GOAL_BPS[pos] * goals + 9 * assists
+           + CLEAN_SHEET_BPS[pos] * clean_sheets - 3 * yellow - 9 * red + rng.integers(0, 12, (P, G)) * (minutes > 0))
+    bonus = _top3_bonus(bps, schedule["fixture"][team], minutes > 0)
+
+    total_points = (
+        np.where(minutes >= 60, 2, np.where(minutes > 0, 1, 0))
+        + GOAL_POINTS[pos] * goals + 3 * assists + CLEAN_SHEET_POINTS[pos] * clean_sheets
+        - np.where((pos <= 2) & (minutes >= 60), conceded // 2, 0)
+        - yellow - 3 * red + bonus
+    )
+
+    noise = rng.gamma(2.0, 0.5, (3, P, G))
+    influence = np.round((INFLUENCE_BASE[pos] * noise[0] + 200 * goals + 100 * assists + 80 * clean_sheets * (pos <= 2)) * share).astype(np.int64)
+    creativity = np.round((CREATIVITY_BASE[pos] * noise[1] * league.skill[:, None] + 150 * assists) * share).astype(np.int64)
+    threat = np.round((THREAT_BASE[pos] * noise[2] * league.skill[:, None] + 250 * goals) * share).astype(np.int64)
+    ict = np.round((influence + creativity + threat) / 10).astype(np.int64)
+
+    return {
+        "minutes": minutes, "goals_scored": goals, "assists": assists, "clean_sheets": clean_sheets,
+        "goals_conceded": conceded, "yellow_cards": yellow, "red_cards": red, "bonus": bonus, "bps": bps,
+        "influence": influence, "creativity": creativity, "threat": threat, "ict_index": ict,
+        "total_points": total_points, "opponent_team": opponent, "was_home": was_home,
+        "team_goals": team_goals,
+    }
+
+
+def _top3_bonus(bps, fixture, played):
+    """3/2/1 bonus for the three highest BPS among players who played in each fixture."""
+    flat_bps, flat_fix, flat_played = bps.ravel(), fixture.ravel(), played.ravel()
+    idx = np.flatnonzero(flat_played)
+    order = idx[np.lexsort((-flat_bps[idx], flat_fix[idx]))]
+    fix_sorted = flat_fix[order]
+    rank = np.arange(len(order)) - np.searchsorted(fix_sorted, fix_sorted)
+    bonus = np.zeros(flat_bps.shape, dtype=np.int64)
+    bonus[order] = np.maximum(3 - rank, 0)
+    return bonus.reshape(bps.shape)
+
+
+def enriched_frame(league, stats, season):
+    """Season rows shaped like fpl_gw_2024_25_enriched.csv (players who got minutes)."""
+    P, G = stats["minutes"].shape
+    mask = stats["minutes"] > 0
+    rows, cols = np.nonzero(mask)
+    # Form windows over the player's previous appearances – the rows the CSV keeps (rows are sorted by player)
+    points = stats["total_points"][rows, cols]
+    form = previous_mean(points, np.arange(len(rows)) - np.searchsorted(rows, rows))
+    difficulty = home_away_difficulty(stats["was_home"])
+    frame = {
+        "player_id": league.ids[rows],
+        "web_name": league.csv_name[rows],
+        "team": "unknown",
+        "gw": cols + 1,
+    }
+    for col in ("minutes", "goals_scored", "assists", "clean_sheets"):
+        frame[col] = stats[col][rows, cols]
+    for col in ("ict_index", "influence", "creativity", "threat"):
+        frame[col] = stats[col][rows, cols] / 10
+    frame["opponent_team"] = stats["opponent_team"][rows, cols]
+    frame["was_home"] = stats["was_home"][rows, cols]
+    frame["fixture_difficulty"] = difficulty[rows, cols]
+    frame["form"] = form
+    frame["total_points"] = points
+    frame["season"] = season
+    return pd.DataFrame(frame, columns=ENRICHED_COLUMNS)
+
+
+def fixtures_payload(league, schedule, stats, finished, start_year):
+    fixtures = []
+    for fid, (event, h, a) in enumerate(schedule["pairs"], start=1):
+        done = event <= finished
+        g = event - 1
+        fixtures.append({
+            "id": fid, "code": 2_000_000 + fid, "event": event,
+            "finished": done, "finished_provisional": done, "started": done,
+            "kickoff_time": f"{start_year}-08-01T14:00:00Z" if event == 1 else _kickoff(start_year, event),
+            "team_h": h, "team_a": a,
+            "team_h_score": int(stats["team_goals"][h, g]) if done else None,
+            "team_a_score": int(stats["team_goals"][a, g]) if done else None,
+            "team_h_difficulty": int(league.team_fdr[a]), "team_a_difficulty": int(league.team_fdr[h]),
+            "minutes": 90 if done else 0, "provisional_start_time": False, "stats": [],
+        })
+    return fixtures
+
+
+def _kickoff(start_year, event):
+    return time.strftime("%Y-%m-%dT14:00:00Z", time.gmtime(time.mktime((start_year, 8, 1, 12, 0, 0, 0, 0, 0)) + (event - 1) * 7 * 86400))
+
+
+def bootstrap_payload(league, stats, finished, start_year, rng):
+    P = league.n_players
+    played = slice(0, finished)
+    totals = {k: stats[k][:, played].sum(axis=1) for k in (
+        "minutes", "goals_scored", "assists", "clean_sheets", "goals_conceded", "yellow_cards",
+        "red_cards", "bonus", "bps", "total_points", "influence", "creativity", "threat", "ict_index")}
+    recent = stats["total_points"][:, max(finished - 4, 0):finished]
+    form_tenths = np.round(recent.mean(axis=1) * 10).astype(np.int64) if finished else np.zeros(P, dtype=np.int64)
+    price = league.prices()
+    popularity = np.maximum(form_tenths, 0) + price / 10
+    selected_tenths = np.round(1000 * popularity / popularity.sum() * (P / 40) ** 0.5).clip(0, 999).astype(np.int64)
+    transfers_in = rng.poisson(np.maximum(form_tenths, 1) * 50)
+    transfers_out = rng.poisson(np.maximum(60 - form_tenths, 1) * 20)
+    chance = rng.choice([None, 0, 25, 50, 75, 100], size=P, p=[0.88, 0.04, 0.02, 0.02, 0.02, 0.02])
+
+    elements = []
+    for i in range(P):
+        elements.append({
+            "id": int(league.ids[i]), "code": 100_000 + int(league.ids[i]), "photo": f"{100_000 + int(league.ids[i])}.jpg",
+            "first_name": league.first_name[i], "second_name": league.second_name[i],
+            "web_name": league.second_name[i], "team": int(league.team[i]), "team_code": int(league.team[i]),
+            "element_type": int(league.position[i]), "now_cost": int(price[i]),
+            "status": "a" if chance[i] in (None, 100) else "d" if chance[i] else "i",
+            "chance_of_playing_next_round": chance[i], "chance_of_playing_this_round": chance[i],
+            "news": "" if chance[i] is None else "Knock – assessing",
+            "form": f"{form_tenths[i] / 10:.1f}",
+            "points_per_game": f"{totals['total_points'][i] / max(finished, 1):.1f}",
+            "selected_by_percent": f"{selected_tenths[i] // 10}.{selected_tenths[i] % 10}",
+            "transfers_in_event": int(transfers_in[i]), "transfers_out_event": int(transfers_out[i]),
+            "total_points": int(totals["total_points"][i]), "event_points": int(stats["total_points"][i, finished - 1]) if finished else 0,
+            "minutes": int(totals["minutes"][i]), "goals_scored": int(totals["goals_scored"][i]),
+            "assists": int(totals["assists"][i]), "clean_sheets": int(totals["clean_sheets"][i]),
+            "goals_conceded": int(totals["goals_conceded"][i]), "yellow_cards": int(totals["yellow_cards"][i]),
+            "red_cards": int(totals["red_cards"][i]), "bonus": int(totals["bonus"][i]), "bps": int(totals["bps"][i]),
+            "influence": tenths_str(totals["influence"][i:i + 1])[0],
+            "creativity": tenths_str(totals["creativity"][i:i + 1])[0],
+            "threat": tenths_str(totals["threat"][i:i + 1])[0],
+            "ict_index": tenths_str(totals["ict_index"][i:i + 1])[0],
+        })
+
+    teams = [
+        {"id": t, "code": t, "name": f"Synthetic {t}", "short_name": f"S{t:02d}"[-3:],
+         "strength": int(league.team_fdr[t]), "played": finished}
+        for t in range(1, league.n_teams + 1)
+    ]
+    events = [
+        {"id": e, "name": f"Gameweek {e}", "finished": e <= finished, "data_checked": e <= finished,
+         "is_previous": e == finished, "is_current": e == finished, "is_next": e == finished + 1,
+         "deadline_time": _kickoff(start_year, e)}
+        for e in range(1, GAMEWEEKS + 1)
+    ]
+    element_types = [
+        {"id": 1, "singular_name": "Goalkeeper", "singular_name_short": "GKP", "plural_name": "Goalkeepers"},
+        {"id": 2, "singular_name": "Defender", "singular_name_short": "DEF", "plural_name": "Defenders"},
+        {"id": 3, "singular_name": "Midfielder", "singular_name_short": "MID", "plural_name": "Midfielders"},
+        {"id": 4, "singular_name": "Forward", "singular_name_short": "FWD", "plural_name": "Forwards"},
+    ]
+    return {"events": events, "teams": teams, "elements": elements, "element_types": element_types,
+            "total_players": P * 250}
+
+
+def element_summary(i, league, schedule, stats, finished, start_year, past):
+    """element-summary/<id>/ response for player row i."""
+    team = int(league.team[i])
+    history = []
+    for g in range(finished):
+        opp = int(stats["opponent_team"][i, g])
+        home = bool(stats["was_home"][i, g])
+        goals_for, goals_against = int(stats["team_goals"][team, g]), int(stats["team_goals"][opp, g])
+        history.append({
+            "element": int(league.ids[i]), "fixture": int(schedule["fixture"][team, g]),
+            "opponent_team": opp, "total_points": int(stats["total_points"][i, g]), "was_home": home,
+            "kickoff_time": _kickoff(start_year, g + 1),
+            "team_h_score": goals_for if home else goals_against, "team_a_score": goals_against if home else goals_for,
+            "round": g + 1, "minutes": int(stats["minutes"][i, g]),
+            "goals_scored": int(stats["goals_scored"][i, g]), "assists": int(stats["assists"][i, g]),
+            "clean_sheets": int(stats["clean_sheets"][i, g]), "goals_conceded": int(stats["goals_conceded"][i, g]),
+            "own_goals": 0, "penalties_saved": 0, "penalties_missed": 0,
+            "yellow_cards": int(stats["yellow_cards"][i, g]), "red_cards": int(stats["red_cards"][i, g]),
+            "saves": 0, "bonus": int(stats["bonus"][i, g]), "bps": int(stats["bps"][i, g]),
+            "influence": tenths_str(stats["influence"][i, g:g + 1])[0],
+            "creativity": tenths_str(stats["creativity"][i, g:g + 1])[0],
+            "threat": tenths_str(stats["threat"][i, g:g + 1])[0],
+            "ict_index": tenths_str(stats["ict_index"][i, g:g + 1])[0],
+        })
+    fixtures = [
+        {"id": int(schedule["fixture"][team, g]), "event": g + 1, "is_home": bool(schedule["home"][team, g]),
+         "team_h": team if schedule["home"][team, g] else int(schedule["opponent"][team, g]),
+         "team_a": int(schedule["opponent"][team, g]) if schedule["home"][team, g] else team,
+         "difficulty": int(league.team_fdr[schedule["opponent"][team, g]]), "finished": False}
+        for g in range(finished, schedule["opponent"].shape[1])
+    ]
+    history_past = [
+        {"season_name": name, "element_code": 100_000 + int(league.ids[i]),
+         "total_points": int(season_totals["total_points"][i]), "minutes": int(season_totals["minutes"][i]),
+         "goals_scored": int(season_totals["goals_scored"][i]), "assists": int(season_totals["assists"][i]),
+         "clean_sheets": int(season_totals["clean_sheets"][i])}
+        for name, season_totals in past
+        if season_totals["minutes"][i] > 0
+    ]
+    return {"fixtures": fixtures, "history": history, "history_past": history_past}
+
+
+def write_json(url, payload, cassette_dir):
+    fpl_http.record_response(url, json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"},
+                             cassette_dir=cassette_dir)
+
+
+def generate(n_players=800, n_seasons=9, out_dir="synthetic", n_teams=None, finished=10,
+             start_year=2025, summaries=None, seed=0):
+    rng = np.random.default_rng(seed)
+    n_teams = n_teams or max(20, 2 * round(n_players / PLAYERS_PER_TEAM / 2))
+    league = League(n_players, n_teams, rng)
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"🏟️ {n_players} players, {n_teams} teams, {n_seasons} past seasons + {season_name(start_year)} (GW{finished})")
+
+    past = []
+    for year in range(start_year - n_seasons, start_year):
+        schedule = build_schedule(n_teams, GAMEWEEKS, rng)
+        stats = simulate_season(league, schedule, rng)
+        frame = enriched_frame(league, stats, season_name(year))
+        path = os.path.join(out_dir, f"fpl_gw_{year}_{(year + 1) % 100:02d}_enriched.csv")
+        frame.to_csv(path, index=False)
+        past.append((season_name(year), {k: stats[k].sum(axis=1) for k in ("total_points", "minutes", "goals_scored", "assists", "clean_sheets")}))
+        print(f"📄 {path}: {len(frame)} rows")
+        league.age(rng)
+
+    # Current season: full schedule, first `finished` gameweeks played
+    schedule = build_schedule(n_teams, GAMEWEEKS, rng)
+    stats = simulate_season(league, schedule, rng)
+    cassette_dir = os.path.join(out_dir, "cassette")
+    write_json(BOOTSTRAP_URL, bootstrap_payload(league, stats, finished, start_year, rng), cassette_dir)
+    write_json(FIXTURES_URL, fixtures_payload(league, schedule, stats, finished, start_year), cassette_dir)
+    count = n_players if summaries is None else min(summaries, n_players)
+    for i in range(count):
+        write_json(f"{API_BASE}/element-summary/{int(league.ids[i])}/",
+                   element_summary(i, league, schedule, stats, finished, start_year, past), cassette_dir)
+    print(f"📼 {cassette_dir}: bootstrap-static, fixtures and {count} element summaries")
+    return league, schedule, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic FPL league for scale testing")
+    parser.add_argument("--players", type=int, default=800)
+    parser.add_argument("--seasons", type=int, default=9, help="past seasons written as enriched CSVs")
+    parser.add_argument("--teams", type=int, help=f"default: one per ~{PLAYERS_PER_TEAM} players, at least 20")
+    parser.add_argument("--finished", type=int, default=10, help="gameweeks already played in the current season")
+    parser.add_argument("--start-year", type=int, default=2025, help="first year of the current season")
+    parser.add_argument("--summaries", type=int, help="only write element-summary for the first N players")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic")
+    args = parser.parse_args()
+
+    if args.teams is not None and args.teams % 2:
+        parser.error("--teams must be even")
+    start = time.perf_counter()
+    generate(args.players, args.seasons, args.out, args.teams, args.finished, args.start_year, args.summaries, args.seed)
+    print(f"✅ Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
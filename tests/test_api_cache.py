@@ -0,0 +1,73 @@
+import json
+
+import pytest
+import requests
+
+import api_cache
+import fpl_http
+from fpl_http import ReplayResponse
+
+URL = "https://fantasy.premierleague.com/api/fixtures/"
+
+
+class FakeAPI:
+    """Answers like the FPL API: 304 for a matching If-None-Match, or whatever `fail` says."""
+
+    def __init__(self, payload, etag='"v1"'):
+        self.payload, self.etag = payload, etag
+        self.fail = None
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        if self.fail:
+            raise self.fail
+        if headers and headers.get("If-None-Match") == self.etag:
+            return ReplayResponse(url, 304, {"ETag": self.etag}, b"")
+        return ReplayResponse(url, 200, {"ETag": self.etag}, json.dumps(self.payload).encode())
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(api_cache, "_entries", {})
+    fake = FakeAPI([{"id": 1}])
+    monkeypatch.setattr(fpl_http, "get", fake.get)
+    return fake
+
+
+def test_callers_share_one_response_within_the_ttl(api):
+    first = api_cache.get_json(URL, ttl=60)
+    assert api_cache.get_json(URL, ttl=60) is first
+    assert len(api.requests) == 1
+
+
+def test_expired_entries_are_revalidated_with_their_etag(api):
+    first = api_cache.get_json(URL, ttl=0)
+    assert api_cache.get_json(URL, ttl=0) is first  # 304 – the parsed payload is reused
+    assert api.requests[-1]["If-None-Match"] == '"v1"'
+    assert api_cache.get_version(URL) == '"v1"'
+
+    api.payload, api.etag = [{"id": 2}], '"v2"'
+    assert api_cache.get_json(URL, ttl=0) == [{"id": 2}]
+    assert api_cache.get_version(URL) == '"v2"'
+
+
+def test_the_last_good_response_is_served_offline(api, monkeypatch):
+    api_cache.get_json(URL)
+    monkeypatch.setattr(api_cache, "_entries", {})  # a new process: only the disk copy is left
+    api.fail = requests.ConnectionError("offline")
+    assert api_cache.get_json(URL) == [{"id": 1}]
+
+
+def test_offline_without_a_cached_copy_raises(api):
+    api.fail = requests.ConnectionError("offline")
+    with pytest.raises(requests.ConnectionError):
+        api_cache.get_json(URL)
+
+
+def test_cassette_misses_are_not_papered_over(api):
+    api_cache.get_json(URL, ttl=0)
+    api.fail = fpl_http.CassetteMiss("not recorded")
+    with pytest.raises(fpl_http.CassetteMiss):
+        api_cache.get_json(URL, ttl=0)
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+from sklearn.linear_model import Ridge
+
+from artifact_store import MODEL_FILE, fit_cached, find_artifact, publish, resolve_model_path, save_fitted
+
+X = pd.DataFrame({"minutes": [0.0, 45.0, 90.0], "form": [1.0, 2.0, 3.0]})
+y = pd.Series([0.0, 2.0, 5.0], name="total_points")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return str(tmp_path / "artifacts")
+
+
+def test_identical_inputs_load_the_stored_fit(store):
+    first, meta = fit_cached("gw_ridge", Ridge(alpha=1.0), X, y, store_dir=store)
+    unfitted = Ridge(alpha=1.0)
+    again, cached = fit_cached("gw_ridge", unfitted, X, y, store_dir=store)
+    assert cached == meta and again is not unfitted
+    assert (again.coef_ == first.coef_).all()
+
+
+def test_params_and_data_are_part_of_the_key(store):
+    _, meta = fit_cached("gw_ridge", Ridge(alpha=1.0), X, y, store_dir=store)
+    _, other_params = fit_cached("gw_ridge", Ridge(alpha=2.0), X, y, store_dir=store)
+    _, other_data = fit_cached("gw_ridge", Ridge(alpha=1.0), X, y + 1, store_dir=store)
+    assert len({meta["key"], other_params["key"], other_data["key"]}) == 3
+
+
+def test_lineage_is_part_of_a_saved_fit_key(store):
+    model = Ridge().fit(X, y)
+    first = save_fitted("gw_ridge_retrain", model, X, y, 0.1, {"parent": "a"}, store_dir=store)
+    same = save_fitted("gw_ridge_retrain", model, X, y, 0.1, {"parent": "a"}, store_dir=store)
+    other = save_fitted("gw_ridge_retrain", model, X, y, 0.1, {"parent": "b"}, store_dir=store)
+    assert first["key"] == same["key"] != other["key"]
+    assert other["lineage"] == {"parent": "b"}
+
+
+def test_names_resolve_to_their_newest_artifact_and_prefixes_must_be_unique(store):
+    metas = [fit_cached("gw_ridge", Ridge(alpha=alpha), X, y, store_dir=store)[1] for alpha in range(1, 18)]
+    assert find_artifact("gw_ridge", store)["key"] == metas[-1]["key"]
+    assert find_artifact(metas[3]["key"][:12], store)["key"] == metas[3]["key"]
+    # 17 keys over 16 hex digits: at least two share their first one
+    first_digits = [m["key"][0] for m in metas]
+    shared = next(d for d in first_digits if first_digits.count(d) > 1)
+    with pytest.raises(KeyError):
+        find_artifact(shared, store)
+
+
+def test_publishing_an_identical_model_leaves_the_file_alone(store, tmp_path):
+    _, meta = fit_cached("gw_ridge", Ridge(), X, y, store_dir=store)
+    path = str(tmp_path / "served.pkl")
+    publish(meta, path, store)
+    before = os.stat(path)
+    publish(meta, path, store)
+    after = os.stat(path)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+
+def test_artifact_references_follow_newly_stored_artifacts(store):
+    _, first = fit_cached("gw_ridge", Ridge(alpha=1.0), X, y, store_dir=store)
+    assert resolve_model_path("artifact:gw_ridge", store) == os.path.join(store, first["key"], MODEL_FILE)
+    _, newer = fit_cached("gw_ridge", Ridge(alpha=2.0), X, y, store_dir=store)
+    assert resolve_model_path("artifact:gw_ridge", store) == os.path.join(store, newer["key"], MODEL_FILE)
+    assert resolve_model_path("gw_score_model.pkl", store) == "gw_score_model.pkl"
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+import feature_store
+from feature_store import (KEEP_VERSIONS, SNAPSHOT_FEATURES, MissingFeaturesError, get_feature_store,
+                           latest_feature_store, materialize)
+from gw_features import MODEL_FEATURES
+from snapshot import build_snapshot
+
+TEAMS = [{"id": 1, "name": "ARS"}, {"id": 2, "name": "CHE"}]
+FIXTURES = [
+    {"id": 1, "event": 5, "kickoff_time": "2024-09-21T14:00:00Z", "finished": False,
+     "team_h": 1, "team_a": 2, "team_h_difficulty": 2, "team_a_difficulty": 4},
+    {"id": 2, "event": 6, "kickoff_time": "2024-09-28T14:00:00Z", "finished": False,
+     "team_h": 2, "team_a": 1, "team_h_difficulty": 3, "team_a_difficulty": 5},
+]
+
+
+def snapshot(version="v1", form="4.0"):
+    elements = [
+        {"id": 10, "team": 1, "element_type": 3, "now_cost": 75, "minutes": 900, "form": form,
+         "transfers_in_event": 1200, "total_points": 50},
+        {"id": 20, "team": 2, "element_type": 4, "now_cost": 60, "minutes": 120, "form": "1.0"},
+    ]
+    return build_snapshot({"elements": elements, "teams": TEAMS}, FIXTURES, version)
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(feature_store, "_open_stores", {})
+    return str(tmp_path / "features"), str(tmp_path / "no_history")
+
+
+def test_materialized_features_come_from_the_snapshot(dirs):
+    store = get_feature_store(snapshot(), *dirs)
+    assert store.source == "snapshot" and store.columns == SNAPSHOT_FEATURES
+    row = store.row(10)
+    assert (row["minutes"], row["price"], row["transfers_in_gw"]) == (900, 7.5, 1200)
+    assert (row["fixture_difficulty"], row["opponent_strength"]) == (3.5, 2)  # mean of D2 and D5, next is D2
+    np.testing.assert_array_equal(store.eligible_for(["minutes", "form"]), [True, False])  # 270+ minutes
+    np.testing.assert_array_equal(store.matrix_for(["form", "minutes"], store.rows([20])), [[1.0, 120.0]])
+
+
+def test_unparseable_form_is_not_eligible(dirs):
+    store = get_feature_store(snapshot(form=None), *dirs)
+    assert not store.eligible[store.index[10]]
+
+
+def test_history_features_are_refused_without_this_seasons_matches(dirs):
+    store = get_feature_store(snapshot(), *dirs)
+    with pytest.raises(MissingFeaturesError):
+        store.eligible_for(MODEL_FEATURES)
+
+
+def test_a_snapshot_is_materialized_once(dirs, monkeypatch):
+    store = get_feature_store(snapshot(), *dirs)
+    monkeypatch.setattr(feature_store, "build_feature_matrix", lambda *a: pytest.fail("rebuilt"))
+    assert get_feature_store(snapshot(), *dirs) is store
+    assert materialize(snapshot(), *dirs) == store.path
+
+
+def test_latest_points_at_the_newest_refresh_and_old_ones_are_pruned(dirs):
+    store_dir = dirs[0]
+    paths = []
+    for i in range(KEEP_VERSIONS + 2):
+        paths.append(materialize(snapshot(f"v{i}"), *dirs))
+        os.utime(paths[-1], (i, i))  # distinct mtimes, oldest first
+    assert latest_feature_store(store_dir).snapshot_version == f"v{KEEP_VERSIONS + 1}"
+    kept = sorted(d for d in os.listdir(store_dir) if os.path.isdir(os.path.join(store_dir, d)))
+    assert kept == sorted(os.path.basename(p) for p in paths[-KEEP_VERSIONS:])
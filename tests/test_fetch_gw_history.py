@@ -0,0 +1,66 @@
+import pandas as pd
+
+import fetch_gw_history
+from gw_store import load_state, read_store
+
+PLAYERS = [
+    {"id": 1, "web_name": "Saka", "team": 1},
+    {"id": 2, "web_name": "Palmer", "team": 7},
+]
+
+
+def match(gw, points, minutes=90):
+    return {
+        "round": gw, "minutes": minutes, "goals_scored": points // 5, "assists": 0, "clean_sheets": 0,
+        "ict_index": "5.0", "influence": "20.0", "creativity": "10.0", "threat": "15.0",
+        "opponent_team": 10 + gw, "was_home": gw % 2 == 1, "total_points": points,
+    }
+
+
+def use_api(monkeypatch, finished_rounds, histories):
+    events = [{"id": gw, "finished": gw <= finished_rounds} for gw in range(1, 4)]
+    monkeypatch.setattr(fetch_gw_history, "fetch_bootstrap_data", lambda: {"elements": PLAYERS, "events": events})
+    monkeypatch.setattr(fetch_gw_history, "crawl_histories", lambda ids, **kwargs: {pid: histories[pid] for pid in ids})
+
+
+def test_full_build_mid_gameweek_then_incremental_matches_full_build(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    # GW2 is being played: player 2's match hasn't happened, player 1's points are provisional
+    use_api(monkeypatch, 1, {1: [match(1, 6), match(2, 2, minutes=45)], 2: [match(1, 3)]})
+    fetch_gw_history.build_gw_dataset(output_csv="live.csv", store_dir="store")
+    assert set(pd.read_csv("live.csv")["gw"]) == {1}
+    assert {pid: s["last_round"] for pid, s in load_state("store").items()} == {1: 1, 2: 1}
+
+    # GW2 finished with final points for both players
+    final = {1: [match(1, 6), match(2, 9)], 2: [match(1, 3), match(2, 5)]}
+    use_api(monkeypatch, 2, final)
+    fetch_gw_history.build_gw_dataset(incremental=True, output_csv="live.csv", store_dir="store")
+
+    fetch_gw_history.build_gw_dataset(output_csv="full.csv", store_dir="full_store")
+
+    key = ["player_id", "gw"]
+    incremental = pd.read_csv("live.csv").sort_values(key).reset_index(drop=True)
+    full = pd.read_csv("full.csv").sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(incremental, full)
+    assert incremental.loc[incremental["player_id"] == 1, "total_points"].tolist() == [6, 9]
+    stored = read_store("store").sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, read_store("full_store").sort_values(key).reset_index(drop=True))
+    assert load_state("store") == load_state("full_store")
+
+
+def test_players_without_new_matches_are_not_refetched(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    use_api(monkeypatch, 1, {1: [match(1, 6)], 2: []})  # player 2 hasn't played yet
+    fetch_gw_history.build_gw_dataset(output_csv="live.csv", store_dir="store")
+    assert load_state("store")[2] == {"last_round": 1, "recent_points": []}
+
+    fetched = []
+    histories = {1: [match(1, 6), match(2, 9)], 2: []}
+    use_api(monkeypatch, 2, histories)
+    crawl = fetch_gw_history.crawl_histories
+    monkeypatch.setattr(fetch_gw_history, "crawl_histories", lambda ids, **kwargs: fetched.append(ids) or crawl(ids))
+    fetch_gw_history.build_gw_dataset(incremental=True, output_csv="live.csv", store_dir="store")
+    fetch_gw_history.build_gw_dataset(incremental=True, output_csv="live.csv", store_dir="store")
+    assert fetched == [[1, 2], []]
+    assert {pid: s["last_round"] for pid, s in load_state("store").items()} == {1: 2, 2: 2}
@@ -0,0 +1,39 @@
+from fixture_index import build_fixture_index
+from fpl_api import get_upcoming_fixtures
+from gw_features import next_opponents
+from snapshot import build_snapshot
+
+TEAMS = {1: "ARS", 2: "CHE", 3: "LIV", 4: "MCI"}
+
+
+def fixture(fid, event, kickoff, home, away, finished=False):
+    return {"id": fid, "event": event, "kickoff_time": kickoff, "finished": finished,
+            "team_h": home, "team_a": away, "team_h_difficulty": away + 1, "team_a_difficulty": home + 1}
+
+
+# By id the postponed GW2 match (rescheduled into GW9) and the unscheduled one come first
+FIXTURES = [
+    fixture(1, 1, "2024-08-17T14:00:00Z", 1, 2, finished=True),
+    fixture(2, None, None, 1, 4),
+    fixture(3, 9, "2024-10-30T19:45:00Z", 1, 3),
+    fixture(4, 4, "2024-09-14T14:00:00Z", 2, 1),
+    fixture(5, 4, "2024-09-14T11:30:00Z", 3, 4),
+    fixture(6, 5, "2024-09-21T14:00:00Z", 4, 1),
+]
+
+
+def test_fixture_index_is_in_schedule_order():
+    index = build_fixture_index(FIXTURES, TEAMS)
+    assert index.upcoming(1, limit=4) == [("CHE", 3), ("MCI", 5), ("LIV", 4), ("MCI", 5)]
+    assert index.upcoming(4) == [("LIV", 4), ("ARS", 2), ("ARS", 2)]
+
+
+def test_next_opponents_is_the_earliest_unfinished_fixture():
+    assert next_opponents(FIXTURES) == {1: (2, False), 2: (1, True), 3: (4, True), 4: (3, False)}
+
+
+def test_snapshot_fixtures_serve_the_raw_lookup_in_schedule_order():
+    snapshot = build_snapshot({"elements": [], "teams": [{"id": t, "name": n} for t, n in TEAMS.items()]}, FIXTURES)
+    assert [f["id"] for f in snapshot.fixtures] == [1, 5, 4, 6, 3, 2]
+    for team in TEAMS:
+        assert get_upcoming_fixtures(team, snapshot.fixtures, TEAMS, limit=4) == snapshot.fixture_index.upcoming(team, 4)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+import forest_eval
+from forest_eval import CompiledForest, ForestPredictor, predict_distribution
+
+FEATURES = ["minutes", "ict_index", "form", "fixture_difficulty"]
+
+
+def data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.integers(0, 91, n), rng.uniform(0, 20, n), rng.uniform(0, 10, n), rng.integers(1, 6, n)])
+    X = pd.DataFrame(X.astype(np.float64), columns=FEATURES)
+    return X, X["ict_index"] * 0.3 + X["form"] - X["fixture_difficulty"] + rng.normal(0, 1, n)
+
+
+@pytest.fixture(params=[
+    RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0),
+    RandomForestRegressor(n_estimators=10, random_state=0),  # unbounded depth
+    ExtraTreesRegressor(n_estimators=20, max_depth=8, random_state=0),
+], ids=["rf", "rf-unbounded", "extra-trees"])
+def forest(request):
+    X, y = data(600)
+    return request.param.fit(X, y)
+
+
+@pytest.mark.parametrize("dense_slots", [forest_eval.MAX_DENSE_SLOTS, 0], ids=["dense", "linked"])
+def test_compiled_forest_predicts_exactly_like_sklearn(forest, dense_slots, monkeypatch):
+    monkeypatch.setattr(forest_eval, "MAX_DENSE_SLOTS", dense_slots)
+    compiled = CompiledForest.from_model(forest)
+    X, _ = data(1000, seed=1)
+    expected = forest.predict(X)
+    assert np.array_equal(compiled.predict(X.to_numpy()), expected)
+    assert np.array_equal(compiled.predict_distribution(X.to_numpy()).mean, expected)
+    assert np.array_equal(compiled.predict(X.to_numpy()[:1]), expected[:1])
+
+
+def test_saved_forest_predicts_the_same(forest, tmp_path):
+    path = str(tmp_path / "forest.npz")
+    CompiledForest.from_model(forest).save(path)
+    X, _ = data(200, seed=2)
+    assert np.array_equal(CompiledForest.load(path).predict(X.to_numpy()), forest.predict(X))
+
+
+def test_distribution_matches_the_trees(forest):
+    X, _ = data(300, seed=3)
+    per_tree = np.column_stack([tree.predict(X.to_numpy(dtype=np.float32)) for tree in forest.estimators_])
+    compiled = ForestPredictor(forest).predict_distribution(X, (0.1, 0.9))
+    uncompiled = predict_distribution(forest, X, (0.1, 0.9))
+    for dist in (compiled, uncompiled):
+        np.testing.assert_allclose(dist.variance, per_tree.var(axis=1))
+        np.testing.assert_allclose(dist.quantiles, np.quantile(per_tree, (0.1, 0.9), axis=1).T)
+
+
+def test_predictor_reorders_columns_and_hands_big_batches_to_sklearn(forest):
+    X, _ = data(50, seed=4)
+    predictor = ForestPredictor(forest, max_batch=10)
+    assert np.array_equal(predictor.predict(X[FEATURES[::-1]].iloc[:10]), forest.predict(X.iloc[:10]))
+    assert np.array_equal(predictor.predict(X), forest.predict(X))
+
+
+def test_forest_opened_from_a_directory_is_memory_mapped(forest, tmp_path):
+    path = str(tmp_path / "forest")
+    CompiledForest.from_model(forest).save_dir(path)
+    opened = CompiledForest.open_dir(path)
+    assert isinstance(opened.value, np.memmap) and isinstance(opened._threshold, np.memmap)
+    X, _ = data(200, seed=5)
+    assert np.array_equal(opened.predict(X.to_numpy()), forest.predict(X))
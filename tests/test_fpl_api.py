@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+import fpl_api
+from feature_store import FeatureStore, materialize
+from forest_eval import ForestPredictor
+from prediction_cache import PredictionCache
+from snapshot import build_snapshot
+
+TEAMS = [{"id": 1, "name": "ARS"}, {"id": 2, "name": "CHE"}]
+
+
+def store(tmp_path, version, form="4.0"):
+    players = [{"id": pid, "web_name": f"P{pid}", "team": pid % 2 + 1, "element_type": 3, "now_cost": 60,
+                "minutes": 300 * pid, "total_points": 10 * pid, "form": form} for pid in (1, 2, 3)]
+    snapshot = build_snapshot({"elements": players, "teams": TEAMS}, (), version)
+    return FeatureStore(materialize(snapshot, str(tmp_path / "features"), str(tmp_path / "no_history")))
+
+
+class Counting(ForestPredictor):
+    rows = 0
+
+    def predict_distribution(self, X, quantiles):
+        Counting.rows += len(X)
+        return super().predict_distribution(X, quantiles)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    X = pd.DataFrame({"minutes": [0.0, 300.0, 600.0, 900.0], "form": [0.0, 2.0, 4.0, 6.0]})
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, [0.0, 2.0, 4.0, 6.0])
+    monkeypatch.setattr(fpl_api, "get_model_with_version", lambda: (Counting(forest), "m1"))
+    monkeypatch.setattr(fpl_api, "prediction_cache", PredictionCache())
+    Counting.rows = 0
+    return forest
+
+
+def test_distributions_are_memoised_per_snapshot(tmp_path, model):
+    rows = np.arange(3)
+    first = fpl_api.predict_store_distribution(store(tmp_path, "s1"), rows, (0.1, 0.9))
+    again = fpl_api.predict_store_distribution(store(tmp_path, "s1"), rows, (0.1, 0.9))
+    assert Counting.rows == 3
+    np.testing.assert_array_equal(again.quantiles, first.quantiles)
+    np.testing.assert_array_equal(first.mean, model.predict(pd.DataFrame({"minutes": [300.0, 600.0, 900.0],
+                                                                          "form": [4.0] * 3})))
+    # Same feature vectors, but materialized from a newer refresh
+    fpl_api.predict_store_distribution(store(tmp_path, "s2"), rows, (0.1, 0.9))
+    assert Counting.rows == 6
@@ -0,0 +1,45 @@
+import os
+import threading
+
+import pytest
+
+import fpl_http
+
+URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    cassette = str(tmp_path / "cassette")
+    monkeypatch.setattr(fpl_http, "_mode", "replay")
+    monkeypatch.setattr(fpl_http, "_cassette_dir", cassette)
+    return cassette
+
+
+def test_transient_failures_are_not_recorded(replay):
+    fpl_http.record_response(URL, b'{"ok": true}', cassette_dir=replay)
+    for status in (429, 500, 503):
+        fpl_http.record_response(URL, b"busy", status=status, cassette_dir=replay)
+    assert fpl_http.get(URL).json() == {"ok": True}
+
+
+def test_concurrent_recordings_leave_a_matching_pair(replay):
+    bodies = [b'{"n": %d}' % i + b" " * (1 << 16) for i in range(8)]
+    threads = [threading.Thread(target=fpl_http.record_response, args=(URL, body),
+                                kwargs={"headers": {"ETag": str(i)}, "cassette_dir": replay})
+               for i, body in enumerate(bodies)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    res = fpl_http.get(URL)
+    assert res.content == bodies[int(res.headers["ETag"])]
+    assert not [f for f in os.listdir(replay) if f.endswith(".tmp")]
+
+
+def test_torn_entries_are_not_replayed(replay):
+    fpl_http.record_response(URL, b'{"n": 1}', cassette_dir=replay)
+    with open(os.path.join(replay, fpl_http._key(URL) + ".body"), "wb") as f:
+        f.write(b'{"n": 2}')  # body rewritten without its meta, e.g. a crash mid-record
+    with pytest.raises(fpl_http.CassetteMiss):
+        fpl_http.get(URL)
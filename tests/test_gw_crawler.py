@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import gw_crawler
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def history(pid, rounds=2):
+    return [{
+        "round": gw, "minutes": 90, "goals_scored": 0, "assists": pid % 2, "clean_sheets": 0,
+        "ict_index": "4.0", "influence": "10.0", "creativity": "5.0", "threat": "8.0",
+        "opponent_team": gw + 3, "was_home": gw % 2 == 1, "total_points": 2 + pid,
+    } for gw in range(1, rounds + 1)]
+
+
+class StubFPL:
+    """Local FPL API stub: each path answers from a queue of (status, body, headers), the last one repeating."""
+
+    def __init__(self):
+        self.routes = {}
+        self.hits = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits[self.path] = stub.hits.get(self.path, 0) + 1
+                queue = stub.routes.get(self.path, [(404, {}, {})])
+                status, body, headers = queue.pop(0) if len(queue) > 1 else queue[0]
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/api"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def serve(self, path, *responses):
+        self.routes[f"/api{path}"] = list(responses)
+
+    def serve_players(self, pids):
+        for pid in pids:
+            self.serve(f"/element-summary/{pid}/", (200, {"history": history(pid)}, {}))
+
+    def hit(self, path):
+        return self.hits.get(f"/api{path}", 0)
+
+
+@pytest.fixture
+def stub():
+    server = StubFPL()
+    yield server
+    server.server.shutdown()
+
+
+def crawl(stub, ids, checkpoint, **kwargs):
+    return gw_crawler.crawl_histories(ids, base_url=stub.base_url, rate=1000, max_workers=4,
+                                      checkpoint_path=str(checkpoint), **kwargs)
+
+
+def test_429_waits_for_retry_after(stub, tmp_path):
+    stub.serve_players([1])
+    stub.serve("/element-summary/2/", (429, {}, {"Retry-After": "1"}), (200, {"history": history(2)}, {}))
+
+    start = time.monotonic()
+    histories = crawl(stub, [1, 2], tmp_path / "ckpt.jsonl", run_key="gw1")
+
+    assert histories == {1: history(1), 2: history(2)}
+    assert stub.hit("/element-summary/2/") == 2
+    assert time.monotonic() - start >= 1.0
+
+
+def test_interrupted_crawl_resumes_from_checkpoint(stub, tmp_path):
+    checkpoint = tmp_path / "ckpt.jsonl"
+    stub.serve_players([1, 2])
+    stub.serve("/element-summary/3/", (503, {}, {}))
+    first = crawl(stub, [1, 2, 3], checkpoint, retries=0, run_key="gw1")
+    assert sorted(first) == [1, 2]
+
+    stub.serve_players([3])
+    second = crawl(stub, [1, 2, 3], checkpoint, retries=0, run_key="gw1")
+    assert second == {pid: history(pid) for pid in (1, 2, 3)}
+    # Only the failed player was fetched again
+    assert [stub.hit(f"/element-summary/{pid}/") for pid in (1, 2, 3)] == [1, 1, 2]
+
+
+@pytest.mark.parametrize("run_key, max_age", [("gw2", 3600), ("gw1", 0)])
+def test_checkpoint_of_another_run_or_too_old_is_discarded(stub, tmp_path, run_key, max_age):
+    checkpoint = tmp_path / "ckpt.jsonl"
+    stub.serve_players([1, 2])
+    stub.serve("/element-summary/2/", (503, {}, {}))
+    crawl(stub, [1, 2], checkpoint, retries=0, run_key="gw1")
+
+    stub.serve_players([1, 2])
+    histories = crawl(stub, [1, 2], checkpoint, retries=0, run_key=run_key, max_age=max_age)
+    assert sorted(histories) == [1, 2]
+    assert stub.hit("/element-summary/1/") == 2
+
+
+def test_fetch_gw_history_against_stub_server(stub, tmp_path):
+    players = [{"id": pid, "web_name": f"P{pid}", "team": pid} for pid in (1, 2, 3)]
+    stub.serve("/bootstrap-static/", (200, {"elements": players, "events": [{"id": 1, "finished": True},
+                                                                            {"id": 2, "finished": True}]}, {}))
+    stub.serve_players([1, 2])
+    stub.serve("/element-summary/3/", (429, {}, {"Retry-After": "1"}), (200, {"history": history(3)}, {}))
+
+    env = dict(os.environ, FPL_API_BASE=stub.base_url, FPL_HTTP_MODE="live", FPL_CRAWL_RATE="1000")
+    subprocess.run([sys.executable, os.path.join(REPO, "fetch_gw_history.py")], cwd=tmp_path, env=env,
+                   check=True, capture_output=True, timeout=60)
+
+    df = pd.read_csv(tmp_path / "fpl_gw_enriched.csv")
+    assert sorted(df["player_id"].unique()) == [1, 2, 3]
+    assert len(df) == 6
+    assert stub.hit("/element-summary/3/") == 2
+    # A finished build leaves no checkpoint behind
+    assert not (tmp_path / gw_crawler.CHECKPOINT_PATH).exists()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from gw_features import MODEL_FEATURES, build_next_gameweek, build_training_set
+
+
+def matches(n_gws, season="2024/25"):
+    rng = np.random.default_rng(0)
+    rows = []
+    for pid in (1, 2):
+        for gw in range(1, n_gws + 1):
+            rows.append({
+                "season": season, "player_id": pid, "gw": gw, "opponent_team": gw + 1, "was_home": gw % 2 == 0,
+                "minutes": int(rng.integers(1, 91)), "goals_scored": int(rng.integers(0, 3)),
+                "assists": int(rng.integers(0, 2)), "clean_sheets": int(rng.integers(0, 2)),
+                "ict_index": float(rng.uniform(0, 15)), "influence": float(rng.uniform(0, 50)),
+                "creativity": float(rng.uniform(0, 50)), "threat": float(rng.uniform(0, 50)),
+                "total_points": int(rng.integers(0, 15)),
+            })
+    return pd.DataFrame(rows)
+
+
+def test_served_row_matches_training_row_of_the_same_match():
+    history = matches(6)
+    played, next_match = history[history["gw"] < 6], history[history["gw"] == 6]
+
+    upcoming = next_match[["player_id", "opponent_team", "was_home"]]
+    served = build_next_gameweek(played, upcoming)
+    trained = build_training_set(history).set_index(["player_id", "gw"])
+
+    for pid in (1, 2):
+        np.testing.assert_allclose(served.loc[pid, MODEL_FEATURES].to_numpy(dtype=float),
+                                   trained.loc[(pid, 6), MODEL_FEATURES].to_numpy(dtype=float))
+
+
+def test_training_features_never_see_the_match_itself():
+    history = matches(5)
+    trained = build_training_set(history)
+    changed = history.copy()
+    changed.loc[changed["gw"] == 5, ["minutes", "goals_scored", "total_points"]] = [90, 3, 20]
+    retrained = build_training_set(changed)
+
+    last = trained["gw"] == 5
+    pd.testing.assert_frame_equal(trained.loc[last, MODEL_FEATURES], retrained.loc[last, MODEL_FEATURES])
+    # A season's first match has no previous window and is left out
+    assert trained["gw"].min() == 2
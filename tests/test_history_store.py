@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+
+from history_store import HISTORY_COLUMNS, build_history_store, current_dir, ensure_history_store, is_stale, load_meta
+
+
+def match(player_id, gw, name, total_points, form=1.0):
+    row = dict.fromkeys(HISTORY_COLUMNS, 0)
+    row.update(season="2023/24", player_id=player_id, web_name=name, team="ARS", gw=gw, minutes=90,
+               opponent_team=2, was_home=True, form=form, total_points=total_points)
+    return row
+
+
+def test_duplicate_matches_are_only_dropped_when_their_stats_agree(tmp_path):
+    rows = [
+        match(1, 1, "Saka", 6),
+        match(1, 1, "Saka", 6),                     # identical
+        match(2, 1, "Yarmoliuk", 2, form=1.8),
+        match(2, 1, "Yarmolyuk", 2, form=0.0),      # renamed mid-season – same match, same stats
+        match(3, 1, "Havertz", 2),
+        match(3, 1, "Havertz", 5),                  # same match, conflicting stats
+    ]
+    pd.DataFrame(rows).to_csv(tmp_path / "fpl_gw_2023_24_enriched.csv", index=False)
+    store = build_history_store(str(tmp_path / "store"), source_dir=str(tmp_path))
+
+    stored = pd.read_parquet(os.path.join(current_dir(store), "season-2023_24.parquet"))
+    assert sorted(stored["player_id"].tolist()) == [1, 2, 3, 3]
+    assert sorted(stored.loc[stored["player_id"] == 3, "total_points"].tolist()) == [2, 5]
+    meta = load_meta(store)
+    assert meta["duplicates_dropped"] == {"identical": 1, "relabelled": 1}
+    assert meta["conflicting_matches"] == 1
+
+
+def test_rows_appended_to_the_live_file_trigger_a_rebuild(tmp_path):
+    pd.DataFrame([match(1, 1, "Saka", 6)]).to_csv(tmp_path / "fpl_gw_2023_24_enriched.csv", index=False)
+    live = tmp_path / "fpl_gw_enriched.csv"
+    columns = [c for c in HISTORY_COLUMNS if c != "season"]
+    pd.DataFrame([match(1, 1, "Saka", 7)])[columns].to_csv(live, index=False)
+    store = build_history_store(str(tmp_path / "store"), str(tmp_path), str(live), "2024/25")
+    first = current_dir(store)
+    assert not is_stale(store, str(tmp_path))
+
+    pd.DataFrame([match(1, 2, "Saka", 3)])[columns].to_csv(live, mode="a", header=False, index=False)
+    assert is_stale(store, str(tmp_path))
+    ensure_history_store(store, str(tmp_path))
+    assert current_dir(store) != first and load_meta(store)["seasons"] == {"2023/24": 1, "2024/25": 2}
+    # The previous build stays readable for anyone who resolved it before the switch
+    assert os.path.exists(os.path.join(first, "meta.json"))
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+import inference_pool
+import model_registry
+from inference_pool import InferencePool, PoolBusy
+from model_registry import ModelRegistry
+
+FEATURES = ["minutes", "form"]
+X = np.column_stack([np.arange(0.0, 100.0, 10.0), np.arange(10.0) % 4])
+
+
+def forest(seed):
+    return RandomForestRegressor(n_estimators=5, max_depth=4, random_state=seed).fit(
+        pd.DataFrame(X, columns=FEATURES), X[:, 0] / 10 + X[:, 1] * seed)
+
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "registry", ModelRegistry(check_interval=0, cache_dir=str(tmp_path / "pins")))
+    path = str(tmp_path / "model.pkl")
+    joblib.dump(forest(1), path)
+    return path
+
+
+class ThreadPool(ThreadPoolExecutor):
+    """Stands in for the worker processes so tests can see and stall each predict call."""
+
+    def __init__(self, workers, mp_context=None, **kwargs):
+        super().__init__(workers, **kwargs)
+
+
+@pytest.fixture
+def in_threads(monkeypatch):
+    monkeypatch.setattr(inference_pool, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(inference_pool, "_worker_model", None)
+    monkeypatch.setattr(inference_pool, "_worker_features", None)
+    calls, release = [], threading.Event()
+    predict = inference_pool._predict_in_worker
+
+    def recorded(rows, features):
+        calls.append(len(rows))
+        release.wait(5)
+        return predict(rows, features)
+
+    monkeypatch.setattr(inference_pool, "_predict_in_worker", recorded)
+    return calls, release
+
+
+def test_concurrent_requests_are_merged_into_batches(model_path, in_threads):
+    calls, release = in_threads
+    release.set()
+
+    async def scenario():
+        pool = InferencePool(1, model_path, max_batch=4, batch_wait=0.05)
+        await pool.start()
+        try:
+            return await asyncio.gather(*[pool.predict(X[i:i + 1], FEATURES) for i in range(len(X))])
+        finally:
+            await pool.stop()
+
+    results = asyncio.run(scenario())
+    assert calls == [4, 4, 2]
+    expected = joblib.load(model_path).predict(pd.DataFrame(X, columns=FEATURES))
+    np.testing.assert_array_equal(np.concatenate(results), expected)
+
+
+def test_a_full_queue_raises_pool_busy(model_path, in_threads):
+    _, release = in_threads
+
+    async def scenario():
+        pool = InferencePool(1, model_path, queue_size=2, max_batch=1, batch_wait=0)
+        await pool.start()
+        accepted = []
+        try:
+            with pytest.raises(PoolBusy):
+                for _ in range(10):
+                    request = asyncio.ensure_future(pool.predict(X[:1], FEATURES))
+                    await asyncio.sleep(0.01)
+                    if request.done():
+                        request.result()
+                    accepted.append(request)
+            # One batch running, one waiting for a worker, two queued
+            assert len(accepted) == 4
+            release.set()
+            assert len(await asyncio.gather(*accepted)) == 4
+        finally:
+            release.set()
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_workers_are_restarted_on_a_new_model(model_path, monkeypatch):
+    monkeypatch.setattr(inference_pool, "CHECK_INTERVAL", 0)
+    new = forest(2)
+
+    async def scenario():
+        pool = InferencePool(1, model_path)
+        await pool.start()
+        try:
+            first = pool.version
+            joblib.dump(new, model_path)
+            for _ in range(100):
+                await pool.predict(X, FEATURES)
+                if pool.version != first:
+                    break
+                await asyncio.sleep(0.05)
+            assert pool.version != first
+            return await pool.predict(X, FEATURES)
+        finally:
+            await pool.stop()
+
+    predictions = asyncio.run(scenario())
+    np.testing.assert_array_equal(predictions, new.predict(pd.DataFrame(X, columns=FEATURES)))
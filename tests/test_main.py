@@ -0,0 +1,75 @@
+import json
+
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.linear_model import Ridge
+
+import main
+from feature_store import FeatureStore, materialize
+from snapshot import build_snapshot
+
+TEAMS = [{"id": 1, "name": "ARS"}, {"id": 2, "name": "CHE"}]
+
+
+def player(pid, minutes, form="4.0"):
+    return {"id": pid, "web_name": f"P{pid}", "team": pid % 2 + 1, "element_type": 3, "now_cost": 60,
+            "minutes": minutes, "total_points": minutes // 30, "form": form, "ict_index": "5.0"}
+
+
+def serve(tmp_path, monkeypatch):
+    snapshot = build_snapshot({"elements": [player(1, 900), player(2, 90)], "teams": TEAMS}, (), "v1")
+    store = FeatureStore(materialize(snapshot, str(tmp_path / "features"), str(tmp_path / "no_history")))
+    X = pd.DataFrame({"minutes": [0.0, 450.0, 900.0], "form": [0.0, 2.0, 4.0]})
+    model = Ridge().fit(X, [0.0, 3.0, 6.0])
+    monkeypatch.setattr(main, "latest_feature_store", lambda: store)
+    monkeypatch.setattr(main, "get_model", lambda: model)
+    return TestClient(main.app)
+
+
+def test_predict_player_serves_eligible_players(tmp_path, monkeypatch):
+    response = serve(tmp_path, monkeypatch).get("/predict/player/1")
+    assert response.status_code == 200
+    assert response.json()["eligible"] is True
+    assert response.json()["predicted_points"] > 0
+
+
+def test_predict_player_has_no_prediction_for_players_next_gameweek_leaves_out(tmp_path, monkeypatch):
+    client = serve(tmp_path, monkeypatch)
+    assert client.get("/predict/player/2").json() == {"player_id": 2, "predicted_points": None, "eligible": False}
+    assert list(client.get("/predict/next-gameweek").json()["predicted_points"]) == ["1"]
+
+
+STATS = {"minutes": 900, "goals_scored": 3, "assists": 2, "clean_sheets": 1, "ict_index": 50.0,
+         "influence": 200.0, "creativity": 150.0, "threat": 180.0, "form": 4.0, "fixture_difficulty": 3.0}
+
+
+def ndjson(*lines):
+    return "".join(line + "\n" for line in lines)
+
+
+def test_predict_stream_refuses_models_the_inputs_cant_feed(tmp_path, monkeypatch):
+    client = serve(tmp_path, monkeypatch)
+    model = Ridge().fit(pd.DataFrame({"minutes_avg": [0.0, 90.0]}), [0.0, 5.0])
+    monkeypatch.setattr(main, "get_model", lambda: model)
+    response = client.post("/predict/stream", content=ndjson(json.dumps(STATS)))
+    assert response.status_code == 503
+
+
+def test_predict_stream_reports_failed_chunks_in_the_body(tmp_path, monkeypatch):
+    client = serve(tmp_path, monkeypatch)
+    calls = []
+
+    async def flaky(players, wait=False):
+        calls.append(len(players))
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return [1.5] * len(players)
+
+    monkeypatch.setattr(main, "STREAM_CHUNK", 2)
+    monkeypatch.setattr(main, "predict_players", flaky)
+    response = client.post("/predict/stream", content=ndjson(*[json.dumps(STATS)] * 3, "not json", json.dumps(STATS)))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert lines[:2] == [{"predicted_points": 1.5}] * 2
+    assert lines[2] == {"error": "Prediction failed: worker died"} and "error" in lines[3]
+    assert lines[4] == {"predicted_points": 1.5}
@@ -0,0 +1,46 @@
+import os
+
+import joblib
+import pandas as pd
+from sklearn.linear_model import Ridge
+
+import artifact_store
+from artifact_store import fit_cached, resolve_model_path
+from model_registry import ModelRegistry
+
+
+def ridge(alpha):
+    X = pd.DataFrame({"minutes": [0.0, 45.0, 90.0], "form": [1.0, 2.0, 3.0]})
+    return Ridge(alpha=alpha).fit(X, [0.0, 2.0, 5.0])
+
+
+def test_reloads_prune_pins_no_longer_served(tmp_path):
+    model_path = str(tmp_path / "model.pkl")
+    cache_dir = tmp_path / "pins"
+    registry = ModelRegistry(check_interval=0, cache_dir=str(cache_dir), keep=1)
+
+    versions = []
+    for alpha in (1.0, 2.0, 3.0, 4.0):
+        joblib.dump(ridge(alpha), model_path)
+        versions.append(registry.version(model_path))
+
+    # The served version plus the one most recently used before it
+    assert sorted(os.listdir(cache_dir)) == sorted(f"{v}.pkl" for v in versions[-2:])
+
+
+def test_artifact_references_are_rescanned_only_when_the_store_changes(tmp_path, monkeypatch):
+    store = str(tmp_path / "artifacts")
+    X = pd.DataFrame({"minutes": [0.0, 45.0, 90.0]})
+    _, meta = fit_cached("gw_ridge", Ridge(alpha=1.0), X, [0.0, 2.0, 5.0], store_dir=store)
+    scans = []
+    list_artifacts = artifact_store.list_artifacts
+    monkeypatch.setattr(artifact_store, "list_artifacts", lambda *a, **k: scans.append(a) or list_artifacts(*a, **k))
+
+    expected = os.path.join(store, meta["key"], artifact_store.MODEL_FILE)
+    assert resolve_model_path("artifact:gw_ridge", store) == expected
+    assert resolve_model_path("artifact:gw_ridge", store) == expected
+    assert len(scans) == 1
+
+    fit_cached("gw_other", Ridge(alpha=2.0), X, [0.0, 2.0, 5.0], store_dir=store)
+    assert resolve_model_path("artifact:gw_ridge", store) == expected
+    assert len(scans) == 2
@@ -0,0 +1,92 @@
+import numpy as np
+
+import prediction_cache as pc
+from prediction_cache import PredictionCache
+
+X = np.array([[90.0, 1.0], [45.0, 0.0], [0.0, 0.0]])
+
+
+class Model:
+    def __init__(self, offset=0.0):
+        self.offset = offset
+        self.rows = 0
+
+    def __call__(self, X):
+        self.rows += len(X)
+        return X[:, 0] / 10 + self.offset
+
+
+def test_only_uncached_rows_are_predicted():
+    cache, model = PredictionCache(), Model()
+    np.testing.assert_array_equal(cache.predict(X[:2], "v1", model), [9.0, 4.5])
+    np.testing.assert_array_equal(cache.predict(X, "v1", model), [9.0, 4.5, 0.0])
+    assert model.rows == 3
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 3)
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pc.time, "monotonic", lambda: now[0])
+    cache, model = PredictionCache(ttl=60), Model()
+    cache.predict(X, "v1", model)
+    now[0] += 59
+    cache.predict(X, "v1", model)
+    assert model.rows == 3
+    now[0] += 2
+    cache.predict(X, "v1", model)
+    assert model.rows == 6
+
+
+def test_a_new_model_version_drops_every_entry():
+    cache = PredictionCache()
+    cache.predict(X, "v1", Model())
+    new = Model(offset=1.0)
+    np.testing.assert_array_equal(cache.predict(X, "v2", new), [10.0, 5.5, 1.0])
+    assert new.rows == 3
+
+
+def test_a_new_snapshot_drops_every_entry():
+    cache, model = PredictionCache(), Model()
+    cache.set_snapshot_version("s1")
+    cache.predict(X, "v1", model)
+    cache.set_snapshot_version("s1")
+    cache.predict(X, "v1", model)
+    assert model.rows == 3
+    cache.set_snapshot_version("s2")
+    cache.predict(X, "v1", model)
+    assert model.rows == 6
+
+
+def test_predictions_from_a_swapped_out_model_are_not_cached():
+    cache = PredictionCache()
+
+    def slow_old_model(rows):
+        cache.predict(X[:1], "v2", Model(offset=1.0))  # the model is swapped mid-predict
+        return Model()(rows)
+
+    cache.predict(X, "v1", slow_old_model)
+    new = Model(offset=1.0)
+    np.testing.assert_array_equal(cache.predict(X, "v2", new), [10.0, 5.5, 1.0])
+    assert new.rows == 2  # only the row v2 cached itself is reused
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache, model = PredictionCache(maxsize=2), Model()
+    cache.predict(X[:2], "v1", model)
+    cache.predict(X[:1], "v1", model)  # row 0 is now the most recent
+    cache.predict(X[2:], "v1", model)
+    assert cache.stats()["evictions"] == 1
+    cache.predict(X[:1], "v1", model)
+    assert model.rows == 3
+
+
+def test_vector_predictions_are_cached_under_their_own_namespace():
+    cache, model = PredictionCache(), Model()
+
+    def spread(X):
+        return np.column_stack([model(X), X[:, 1]])
+
+    cache.predict(X, "v1", model)
+    np.testing.assert_array_equal(cache.predict(X, "v1", spread, namespace=b"spread"), [[9.0, 1.0], [4.5, 0.0], [0.0, 0.0]])
+    np.testing.assert_array_equal(cache.predict(X[:1], "v1", spread, namespace=b"spread"), [[9.0, 1.0]])
+    assert model.rows == 6
@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import retrain_gw_model
+from artifact_store import find_artifact, load_meta, metadata_path, resolve_model_path
+from model_registry import file_hash
+from train_search import FEATURES, TARGET
+
+
+def matches(n_gws):
+    rng = np.random.default_rng(0)
+    n = 40 * n_gws
+    df = pd.DataFrame(rng.uniform(0, 5, size=(n, len(FEATURES))), columns=FEATURES)
+    df[TARGET] = rng.integers(0, 12, size=n)
+    df["season"] = "2024/25"
+    df["gw"] = np.repeat(np.arange(1, n_gws + 1), 40)
+    df["gw_rank"] = df["gw"] - 1
+    return df
+
+
+def test_retrains_are_published_with_matching_metadata(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrain_gw_model, "FULL_PARAMS", {"rf": {"n_estimators": 10, "max_depth": 4}})
+    monkeypatch.setattr("artifact_store.ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    model_path = str(tmp_path / "model.pkl")
+
+    monkeypatch.setattr(retrain_gw_model, "load_matches", lambda: matches(4))
+    full = retrain_gw_model.retrain(model_path)
+    monkeypatch.setattr(retrain_gw_model, "load_matches", lambda: matches(5))
+    update = retrain_gw_model.retrain(model_path)
+    assert (full["last_mode"], update["last_mode"]) == ("full", "incremental")
+
+    with open(metadata_path(model_path), encoding="utf-8") as f:
+        served = json.load(f)
+    assert served == load_meta(update["artifact_key"], str(tmp_path / "artifacts"))
+    assert served["model_sha256"] == file_hash(model_path)
+    assert served["lineage"]["parent"] == full["artifact_key"]
+
+
+def test_artifact_references_are_retrained_in_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrain_gw_model, "FULL_PARAMS", {"rf": {"n_estimators": 10, "max_depth": 4}})
+    store = str(tmp_path / "artifacts")
+    monkeypatch.setattr("artifact_store.ARTIFACT_DIR", store)
+    model_path = "artifact:gw_rf_served"
+
+    monkeypatch.setattr(retrain_gw_model, "load_matches", lambda: matches(4))
+    full = retrain_gw_model.retrain(model_path)
+    monkeypatch.setattr(retrain_gw_model, "load_matches", lambda: matches(5))
+    update = retrain_gw_model.retrain(model_path)
+    assert (full["last_mode"], update["last_mode"]) == ("full", "incremental")
+
+    # Both stored within the same second; the newest is still the update
+    assert find_artifact("gw_rf_served", store)["key"] == update["artifact_key"]
+    assert file_hash(resolve_model_path(model_path, store)) == update["model_sha256"]
@@ -0,0 +1,17 @@
+from benchmarks.bench_smart_score import build_bench_payload
+from fpl_api import calculate_smart_score
+from smart_score import score_pool
+from snapshot import build_snapshot
+
+
+def test_score_pool_matches_calculate_smart_score():
+    data, fixtures = build_bench_payload()
+    # Fields calculate_smart_score can't parse score 0 in both paths
+    data["elements"][0]["form"] = None
+    data["elements"][1]["form"] = "n/a"
+    data["elements"][2]["chance_of_playing_next_round"] = None
+    snapshot = build_snapshot(data, fixtures, version="parity")
+
+    scalar = [calculate_smart_score(dict(p), snapshot.fixtures, snapshot.team_names) for p in snapshot.players]
+    assert score_pool(snapshot) == scalar
+    assert scalar[:3] == [0, 0, 0]
@@ -0,0 +1,30 @@
+import pytest
+
+from fpl_api import apply_smart_scores
+from smart_score import attach_fixture_info
+from snapshot import build_snapshot
+
+TEAMS = [{"id": 1, "name": "ARS"}, {"id": 2, "name": "CHE"}]
+FIXTURES = [{"id": 1, "event": 1, "kickoff_time": "2024-08-17T14:00:00Z", "finished": False,
+             "team_h": 1, "team_a": 2, "team_h_difficulty": 3, "team_a_difficulty": 4}]
+
+
+def snapshot():
+    elements = [{"id": pid, "web_name": f"P{pid}", "team": pid, "element_type": 3, "now_cost": 60,
+                 "total_points": 40, "form": "4.0", "chance_of_playing_next_round": 100} for pid in (1, 2)]
+    return build_snapshot({"elements": elements, "teams": TEAMS}, FIXTURES, "v1")
+
+
+def test_snapshot_players_are_read_only():
+    snap = snapshot()
+    with pytest.raises(TypeError):
+        snap.players[0]["predicted_points"] = 5.0
+    assert snap.players_by_id[1] is snap.players[0]
+
+
+def test_annotations_go_on_copies():
+    snap = snapshot()
+    scored = apply_smart_scores(snap)
+    shown = attach_fixture_info(scored[:1], snap.fixture_index)
+    assert shown[0]["fixture_info"] == "vs CHE (D3)" and "smart_score" in shown[0]
+    assert all("smart_score" not in p and "fixture_info" not in p for p in snap.players)
@@ -0,0 +1,49 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fpl_http
+from gw_crawler import API_BASE
+from gw_features import derive_features
+from synthetic_league import BOOTSTRAP_URL, ENRICHED_COLUMNS, FIXTURES_URL, GAMEWEEKS, build_schedule, generate
+
+
+@pytest.fixture(scope="module")
+def league(tmp_path_factory):
+    out = str(tmp_path_factory.mktemp("synthetic"))
+    generate(n_players=120, n_seasons=2, out_dir=out, n_teams=4, finished=3, summaries=5, seed=1)
+    return out
+
+
+def test_season_csvs_match_the_enriched_format_and_derived_features(league):
+    paths = sorted(glob.glob(os.path.join(league, "fpl_gw_*_enriched.csv")))
+    assert [os.path.basename(p) for p in paths] == ["fpl_gw_2023_24_enriched.csv", "fpl_gw_2024_25_enriched.csv"]
+    for path in paths:
+        written = pd.read_csv(path)
+        assert list(written.columns) == ENRICHED_COLUMNS
+        derived = derive_features(written.drop(columns=["form", "fixture_difficulty"]))
+        derived = derived.set_index(["player_id", "gw"]).loc[written.set_index(["player_id", "gw"]).index]
+        np.testing.assert_allclose(written["form"], derived["form"])
+        np.testing.assert_array_equal(written["fixture_difficulty"], derived["fixture_difficulty"])
+
+
+def test_cassette_replays_through_fpl_http(league, monkeypatch):
+    monkeypatch.setattr(fpl_http, "_mode", "replay")
+    monkeypatch.setattr(fpl_http, "_cassette_dir", os.path.join(league, "cassette"))
+    bootstrap = fpl_http.get(BOOTSTRAP_URL).json()
+    assert len(bootstrap["elements"]) == 120 and len(bootstrap["teams"]) == 4
+    assert len(fpl_http.get(FIXTURES_URL).json()) == GAMEWEEKS * 2
+    summary = fpl_http.get(f"{API_BASE}/element-summary/1/").json()
+    assert [m["round"] for m in summary["history"]] == [1, 2, 3]
+    with pytest.raises(fpl_http.CassetteMiss):
+        fpl_http.get(f"{API_BASE}/element-summary/6/")  # only the first 5 were recorded
+
+
+def test_odd_team_counts_are_rejected():
+    with pytest.raises(ValueError):
+        build_schedule(5, GAMEWEEKS, np.random.default_rng(0))
+    schedule = build_schedule(4, GAMEWEEKS, np.random.default_rng(0))
+    assert (schedule["opponent"][1:] > 0).all()
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error
+
+import train_search
+from train_search import FEATURES, leaderboard, run_search, season_folds
+
+
+def two_seasons():
+    rng = np.random.default_rng(0)
+    n = 200
+    X = rng.uniform(0, 5, size=(n, len(FEATURES)))
+    y = X @ rng.uniform(0, 1, len(FEATURES)) + rng.normal(0, 1, n)
+    seasons = np.repeat(["2023/24", "2024/25"], n // 2)
+    return X, y, seasons
+
+
+def test_folds_never_validate_on_a_training_season():
+    seasons = ["2024/25", "2021/22", "2023/24", "2022/23"]
+    folds = season_folds(seasons, 2)
+    assert folds == [(["2021/22", "2022/23"], "2023/24"), (["2021/22", "2022/23", "2023/24"], "2024/25")]
+    for train, test in folds:
+        assert test not in train and all(season < test for season in train)
+
+
+def test_worker_data_round_trips_through_memory_mapped_files(tmp_path, monkeypatch):
+    X, y, _ = two_seasons()
+    np.save(tmp_path / "X.npy", X)
+    np.save(tmp_path / "y.npy", y)
+    monkeypatch.setattr(train_search, "_X", None)
+    monkeypatch.setattr(train_search, "_y", None)
+    train_search._init_worker(str(tmp_path))
+    assert isinstance(train_search._X, np.memmap) and not train_search._X.flags.writeable
+    np.testing.assert_array_equal(train_search._X, X)
+    np.testing.assert_array_equal(train_search._y, y)
+
+
+def test_workers_see_the_same_data_and_the_leaderboard_is_ordered_by_mae(monkeypatch):
+    monkeypatch.setattr(train_search, "PARAM_GRIDS", {"ridge": {"alpha": [0.1, 10.0, 1000.0]}})
+    X, y, seasons = two_seasons()
+    folds = season_folds(np.unique(seasons), 3)
+    results = run_search(X, y, seasons, ["ridge"], folds, n_jobs=2)
+
+    # Fit in-process on the same split: the memory-mapped copies in the workers held the same values
+    train, test = seasons == "2023/24", seasons == "2024/25"
+    for row in results:
+        model = Ridge(**row["params"]).fit(pd.DataFrame(X[train], columns=FEATURES), y[train])
+        assert row["mae"] == mean_absolute_error(y[test], model.predict(pd.DataFrame(X[test], columns=FEATURES)))
+        assert (row["n_train"], row["n_test"]) == (100, 100)
+
+    board = leaderboard(results)
+    assert board["mae"].is_monotonic_increasing
+    assert sorted(board["mae"]) == sorted(row["mae"] for row in results)
+    assert json.loads(board["config"].iloc[0]) == min(results, key=lambda row: row["mae"])["params"]
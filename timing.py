@@ -0,0 +1,113 @@
+# timing.py
+# Lightweight latency spans with p50/p95/p99 summaries.
+#
+# Wrap a block in `with span("fpl_api.fetch_data"):` or decorate a function
+# with `@timed()`; each span keeps its count, total and the last SPAN_WINDOW
+# durations, from which percentiles are computed on demand. Recording costs
+# two perf_counter calls and a deque append. The dashboard's debug sidebar and
+# main.py's /metrics endpoint read the same registry. FPL_TIMING=0 disables it.
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+ENABLED = os.environ.get("FPL_TIMING", "1") != "0"
+SPAN_WINDOW = int(os.environ.get("FPL_TIMING_WINDOW", 2048))  # durations kept per span
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class SpanStats:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self, window=SPAN_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+
+_spans = {}
+_lock = threading.Lock()
+
+
+def record(name, seconds):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = SpanStats()
+        stats.count += 1
+        stats.total += seconds
+        stats.max = max(stats.max, seconds)
+        stats.samples.append(seconds)
+
+
+@contextmanager
+def span(name):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """Decorator form of span(); the span defaults to `module.function`."""
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def summary():
+    """{span: {count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} over the recent window."""
+    with _lock:
+        snapshot = {name: (s.count, s.total, s.max, list(s.samples)) for name, s in _spans.items()}
+    out = {}
+    for name, (count, total, max_seconds, samples) in sorted(snapshot.items()):
+        p50, p95, p99 = np.quantile(samples, QUANTILES) * 1000
+        out[name] = {
+            "count": count,
+            "total_ms": round(total * 1000, 3),
+            "mean_ms": round(total * 1000 / count, 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(max_seconds * 1000, 3),
+        }
+    return out
+
+
+def prometheus_text(prefix="fpl_span"):
+    """Spans in Prometheus text exposition format, as summaries in seconds."""
+    lines = [
+        f"# HELP {prefix}_seconds Latency of instrumented code spans (quantiles over the last {SPAN_WINDOW} calls).",
+        f"# TYPE {prefix}_seconds summary",
+    ]
+    for name, s in summary().items():
+        for q, key in zip(QUANTILES, ("p50_ms", "p95_ms", "p99_ms")):
+            lines.append(f'{prefix}_seconds{{span="{name}",quantile="{q}"}} {s[key] / 1000:.6f}')
+        lines.append(f'{prefix}_seconds_sum{{span="{name}"}} {s["total_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_seconds_count{{span="{name}"}} {s["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _spans.clear()
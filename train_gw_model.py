@@ -1,47 +1,50 @@
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_absolute_error
 import matplotlib.pyplot as plt
-import joblib
 
-# Load enriched dataset
-df = pd.read_csv("fpl_gw_combined_all_seasons_enriched.csv")
+from artifact_store import fit_cached, publish
+from gw_features import MODEL_FEATURES, build_training_set
+from history_store import load_history
 
-# Drop any rows with missing values
-df.dropna(inplace=True)
+# Trailing averages of the player's previous matches plus venue – everything known
+# before kickoff, and all the history store has (see gw_features.py)
+features = MODEL_FEATURES
 
-# Filter out players who didn’t play
-df = df[df["minutes"] > 0]
+target = "total_points"
 
-# Features including new ones
-features = [
-    "minutes", "goals_scored", "assists", "clean_sheets",
-    "ict_index", "influence", "creativity", "threat",
-    "form", "fixture_difficulty", "opponent_strength", "team_form",
-    "price", "transfers_in_gw", "transfers_out_gw",
-    "yellow_cards", "red_cards", "bonus"
-]
+# Every season from the history store; features are derived by gw_features –
+# the same code that builds the live next-gameweek features
+history = load_history(columns=[
+    "season", "player_id", "gw", "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat", "opponent_team", "was_home", "total_points",
+])
+df = build_training_set(history)  # played matches only
+
+# Drop any rows with missing values
+df.dropna(subset=features + [target], inplace=True)
 
-target = "total_points"
 X = df[features]
 y = df[target]
 
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# Time-ordered split: hold out the latest season (a random split leaks future gameweeks;
+# train_search.py runs the full season-grouped CV)
+test_season = df["season"].astype(str).max()
+is_test = (df["season"].astype(str) == test_season).to_numpy()
+X_train, X_test, y_train, y_test = X[~is_test], X[is_test], y[~is_test], y[is_test]
+print(f"📅 Training on {len(X_train)} rows before {test_season}, testing on {len(X_test)} rows of {test_season}")
 
-# Train the model
-model = RandomForestRegressor(n_estimators=300, max_depth=12, random_state=42)
-model.fit(X_train, y_train)
+# Train the model (or reuse the cached fit when data, features and params are unchanged)
+model, meta = fit_cached("gw_rf", RandomForestRegressor(n_estimators=300, max_depth=12, random_state=42),
+                         X_train, y_train, eval_set=(X_test, y_test), source="history_store")
 
-# Save the model
-joblib.dump(model, "gw_score_model.pkl")
-print("✅ Model trained and saved as gw_score_model.pkl")
+# Serve it
+publish(meta, "gw_score_model.pkl")
+print("✅ Model saved as gw_score_model.pkl")
 
 # Evaluation
 y_pred = model.predict(X_test)
-r2 = r2_score(y_test, y_pred)
-mae = mean_absolute_error(y_test, y_pred)
+r2 = meta["metrics"]["r2"]
+mae = meta["metrics"]["mae"]
 print(f"📊 R² score: {r2:.4f}")
 print(f"📉 Mean Absolute Error (MAE): {mae:.2f}")
 
@@ -25,7 +25,8 @@
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
-import joblib
+
+from artifact_store import fit_cached, publish
 
 df = pd.read_csv("fpl_player_data.csv")
 
@@ -42,10 +43,11 @@ target = 'total_points'
 X = df[features]
 y = df[target]
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+# Fixed seed so an unchanged dataset maps to the same cached artifact
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-model = RandomForestRegressor()
-model.fit(X_train, y_train)
+model, meta = fit_cached("player_rf", RandomForestRegressor(), X_train, y_train,
+                         eval_set=(X_test, y_test), source="fpl_player_data.csv")
 
-joblib.dump(model, "player_score_model.pkl")
-print("Trained and saved model.")
+publish(meta, "player_score_model.pkl")
+print(f"Model ready (test MAE {meta['metrics']['mae']:.2f}).")
@@ -1,6 +1,7 @@
 import pandas as pd
 from sklearn.linear_model import Ridge
-import joblib
+
+from artifact_store import fit_cached, publish
 
 # Load the cleaned CSV
 df = pd.read_csv("fpl_gw_cleaned.csv")
@@ -23,15 +24,11 @@ X = df[available_features]
 y = df[target]
 
 # Train model
-model = Ridge(alpha=1.0)
-model.fit(X, y)
+model, meta = fit_cached("gw_ridge_cleaned", Ridge(alpha=1.0), X, y, source="fpl_gw_cleaned.csv")
 
 # Print model score
-score = model.score(X, y)
-print(f"✅ Model trained and saved as gw_score_model.pkl")
-print(f"📊 R² Score on training data: {score:.4f}")
-
+print(f"📊 R² Score on training data: {meta['metrics']['train_r2']:.4f}")
 
-# Save model
-joblib.dump(model, "gw_score_model.pkl")
-print("✅ Model trained and saved as gw_score_model.pkl")
+# Save model next to (not over) the served gw_score_model.pkl
+publish(meta, "gw_score_model_cleaned.pkl")
+print("✅ Model saved as gw_score_model_cleaned.pkl")
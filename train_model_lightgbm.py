@@ -2,8 +2,8 @@
 import pandas as pd
 import lightgbm as lgb
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error
-import joblib
+
+from artifact_store import fit_cached, publish
 
 # Load the enriched dataset
 df = pd.read_csv("fpl_gw_combined_all_seasons_enriched_ready.csv")
@@ -28,14 +28,13 @@ y = df[target]
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # Train LightGBM model
-model = lgb.LGBMRegressor(n_estimators=200, learning_rate=0.05, random_state=42)
-model.fit(X_train, y_train)
+model, meta = fit_cached("gw_lightgbm", lgb.LGBMRegressor(n_estimators=200, learning_rate=0.05, random_state=42),
+                         X_train, y_train, eval_set=(X_test, y_test),
+                         source="fpl_gw_combined_all_seasons_enriched_ready.csv")
 
 # Evaluate
-y_pred = model.predict(X_test)
-mae = mean_absolute_error(y_test, y_pred)
-print(f"Validation MAE: {mae:.2f}")
+print(f"Validation MAE: {meta['metrics']['mae']:.2f}")
 
 # Save the model
-joblib.dump(model, "gw_score_model_lightgbm.pkl")
+publish(meta, "gw_score_model_lightgbm.pkl")
 print("✅ Model saved as gw_score_model_lightgbm.pkl")
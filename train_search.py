@@ -0,0 +1,225 @@
+# train_search.py
+# Season-aware cross-validation and hyperparameter search for the gameweek model.
+#
+# Folds are time-ordered and grouped by season: fold k trains on every season
+# before test season k and scores on season k, so no future gameweek is ever
+# seen in training. Every (config, fold) pair is one task in a process pool;
+# the feature matrix and target are written once as .npy files and opened with
+# mmap_mode="r" in each worker, so workers share the page cache instead of
+# receiving pickled copies. Results are aggregated into a leaderboard of MAE,
+# R² and fit / predict time per config.
+#
+#   python train_search.py                                   # rf + ridge + lgbm grids, last 3 seasons as folds
+#   python train_search.py --models rf --search random --n-iter 12 --n-jobs 4
+#   python train_search.py --save-model gw_score_model_best.pkl
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from artifact_store import fit_cached, publish
+from gw_features import MODEL_FEATURES, build_training_set
+from history_store import load_history
+
+FEATURES = MODEL_FEATURES
+TARGET = "total_points"
+HISTORY_COLUMNS = [
+    "season", "player_id", "gw", "minutes", "goals_scored", "assists", "clean_sheets",
+    "ict_index", "influence", "creativity", "threat", "opponent_team", "was_home", "total_points",
+]
+DEFAULT_OUTPUT = "train_search_leaderboard.csv"
+
+PARAM_GRIDS = {
+    "rf": {
+        "n_estimators": [100, 300],
+        "max_depth": [8, 12, 16],
+        "min_samples_leaf": [1, 5],
+        "max_features": [1.0, 0.5],
+    },
+    "ridge": {
+        "alpha": [0.1, 1.0, 10.0, 100.0],
+    },
+    "lgbm": {
+        "n_estimators": [200, 500],
+        "learning_rate": [0.03, 0.05, 0.1],
+        "num_leaves": [15, 31, 63],
+        "min_child_samples": [20, 50],
+    },
+}
+
+
+def make_model(name, params):
+    # Each task is single-threaded; parallelism comes from the process pool
+    if name == "rf":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    if name == "ridge":
+        from sklearn.linear_model import Ridge
+        return Ridge(**params)
+    if name == "lgbm":
+        import lightgbm as lgb
+        return lgb.LGBMRegressor(random_state=42, n_jobs=1, verbose=-1, **params)
+    raise ValueError(f"Unknown model {name!r} (have {sorted(PARAM_GRIDS)})")
+
+
+def available_models(names):
+    usable = []
+    for name in names:
+        try:
+            make_model(name, {})
+        except ImportError as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        usable.append(name)
+    return usable
+
+
+def season_folds(seasons, n_folds, min_train_seasons=1):
+    """[(train_seasons, test_season)] – expanding window over the last `n_folds` seasons."""
+    seasons = sorted(seasons)
+    first = max(min_train_seasons, len(seasons) - n_folds)
+    return [(seasons[:i], seasons[i]) for i in range(first, len(seasons))]
+
+
+def configs_for(name, search, n_iter, seed):
+    grid = PARAM_GRIDS[name]
+    if search == "grid":
+        return list(ParameterGrid(grid))
+    return list(ParameterSampler(grid, n_iter=min(n_iter, len(ParameterGrid(grid))), random_state=seed))
+
+
+def load_training_data():
+    df = build_training_set(load_history(columns=HISTORY_COLUMNS))
+    df = df.dropna(subset=FEATURES + [TARGET])
+    seasons = df["season"].astype(str).to_numpy()
+    X = np.ascontiguousarray(df[FEATURES].to_numpy(dtype=np.float64))
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    return X, y, seasons
+
+
+# Opened once per worker by _init_worker
+_X = _y = None
+
+
+def _init_worker(data_dir):
+    global _X, _y
+    _X = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    _y = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+
+
+def _run_fold(name, params, train_idx, test_idx):
+    model = make_model(name, params)
+    X_train = pd.DataFrame(_X[train_idx], columns=FEATURES)
+    X_test = pd.DataFrame(_X[test_idx], columns=FEATURES)
+    start = time.perf_counter()
+    model.fit(X_train, _y[train_idx])
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    pred = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+    y_test = _y[test_idx]
+    return {
+        "mae": mean_absolute_error(y_test, pred),
+        "r2": r2_score(y_test, pred),
+        "fit_s": fit_time,
+        "predict_s": predict_time,
+    }
+
+
+def run_search(X, y, seasons, models, folds, search="grid", n_iter=10, n_jobs=None, seed=42):
+    """Fold results for every config of every model: list of dicts."""
+    n_jobs = n_jobs or os.cpu_count() or 1
+    fold_rows = [(np.flatnonzero(np.isin(seasons, train)), np.flatnonzero(seasons == test), test) for train, test in folds]
+    tasks = [
+        (name, params, fold)
+        for name in models
+        for params in configs_for(name, search, n_iter, seed)
+        for fold in range(len(fold_rows))
+    ]
+    print(f"🔎 {len(tasks)} fits ({len(tasks) // max(len(fold_rows), 1)} configs × {len(fold_rows)} folds) on {n_jobs} workers")
+
+    data_dir = tempfile.mkdtemp(prefix="fpl_train_search_")
+    results = []
+    try:
+        np.save(os.path.join(data_dir, "X.npy"), X)
+        np.save(os.path.join(data_dir, "y.npy"), y)
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+        with ProcessPoolExecutor(n_jobs, mp_context=context, initializer=_init_worker, initargs=(data_dir,)) as pool:
+            futures = {}
+            for name, params, fold in tasks:
+                train_idx, test_idx, test_season = fold_rows[fold]
+                future = pool.submit(_run_fold, name, params, train_idx, test_idx)
+                futures[future] = {"model": name, "params": params, "fold": fold, "test_season": test_season,
+                                   "n_train": len(train_idx), "n_test": len(test_idx)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = {**futures[future], **future.result()}
+                results.append(row)
+                print(f"  [{done}/{len(tasks)}] {row['model']} {row['params']} {row['test_season']}: "
+                      f"MAE {row['mae']:.3f} R² {row['r2']:.3f} ({row['fit_s']:.1f}s)")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def leaderboard(results):
+    """One row per config, best mean MAE first."""
+    df = pd.DataFrame(results)
+    df["config"] = df["params"].apply(lambda p: json.dumps(p, sort_keys=True))
+    board = df.groupby(["model", "config"], sort=False).agg(
+        mae=("mae", "mean"),
+        mae_std=("mae", "std"),
+        r2=("r2", "mean"),
+        fit_s=("fit_s", "mean"),
+        predict_s=("predict_s", "mean"),
+        folds=("fold", "count"),
+    ).reset_index()
+    return board.sort_values(["mae", "fit_s"], kind="stable").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Season-grouped CV and hyperparameter search")
+    parser.add_argument("--models", default="rf,ridge,lgbm", help=f"comma-separated, from {sorted(PARAM_GRIDS)}")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--n-iter", type=int, default=10, help="configs per model for --search random")
+    parser.add_argument("--folds", type=int, default=3, help="test on each of the last N seasons")
+    parser.add_argument("--n-jobs", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--save-model", help="refit the best config on every season and save it here")
+    args = parser.parse_args()
+
+    X, y, seasons = load_training_data()
+    folds = season_folds(np.unique(seasons), args.folds)
+    if not folds:
+        parser.error("need at least two seasons of history for season-grouped folds")
+    for train, test in folds:
+        print(f"📅 fold: train {train[0]}–{train[-1]} → test {test}")
+
+    models = available_models([m.strip() for m in args.models.split(",") if m.strip()])
+    results = run_search(X, y, seasons, models, folds, args.search, args.n_iter, args.n_jobs, args.seed)
+    board = leaderboard(results)
+    board.to_csv(args.output, index=False)
+
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(board.head(20).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"✅ Leaderboard written to {args.output}")
+
+    if args.save_model:
+        best = board.iloc[0]
+        _, meta = fit_cached(f"search_{best['model']}", make_model(best["model"], json.loads(best["config"])),
+                             pd.DataFrame(X, columns=FEATURES), pd.Series(y, name=TARGET), source="history_store")
+        publish(meta, args.save_model)
+        print(f"💾 Best config ({best['model']} {best['config']}) refit on all seasons → {args.save_model}")
+
+
+if __name__ == "__main__":
+    main()